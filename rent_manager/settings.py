@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -10,6 +11,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# TENANT DOCUMENT UPLOADS ARE CUT OFF WHILE STREAMING ONCE THEY EXCEED THIS
+DOCUMENT_MAX_UPLOAD_SIZE = int(os.environ.get('DOCUMENT_MAX_UPLOAD_SIZE', 5 * 1024 * 1024))
+
 SECRET_KEY = os.environ.get('APP_KEY')
 
 DEBUG = os.environ.get('DEBUG_MODE')
@@ -35,6 +39,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'worker.metrics.RequestMetricsMiddleware',
+    'worker.nplusone.NPlusOneMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +81,10 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # NO MIGRATION FILES ARE KEPT, THE TEST DATABASE IS BUILT STRAIGHT FROM THE MODELS
+        'TEST': {
+            'MIGRATE': False,
+        },
     }
 }
 
@@ -107,6 +117,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # TWILIO DETAILS
 TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
+TWILIO_WHATSAPP_FROM = os.environ.get('TWILIO_WHATSAPP_FROM', 'whatsapp:+14155238886')
 
 # COMPANY DETAILS
 COMPANY_EMAIL = os.environ.get('COMPANY_EMAIL')
@@ -121,9 +132,71 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL')
 
+# MESSAGES SENT PER SMTP SESSION BEFORE RECONNECTING
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 100))
+
+# NOTIFICATIONS ( worker.notifications ), BACKENDS ARE IMPORTED ON FIRST USE
+# RATE_LIMIT IS SENDS PER SECOND PER CHANNEL AND BOUNDS A DISPATCH ( 1000 EMAILS AT 10/s TAKE 100s ),
+# RAISE IT TO WHAT THE PROVIDER ALLOWS, 0 DISABLES IT
+# SET *_NOTIFICATION_BACKEND=worker.notifications.FileNotificationBackend TO SEND NOTHING ( OFFLINE / TESTS )
+NOTIFICATION_CONCURRENCY = int(os.environ.get('NOTIFICATION_CONCURRENCY', 20))
+NOTIFICATION_BACKENDS = {
+    'email': {
+        'BACKEND': os.environ.get('EMAIL_NOTIFICATION_BACKEND', 'worker.notifications.EmailNotificationBackend'),
+        'RATE_LIMIT': float(os.environ.get('EMAIL_RATE_LIMIT', 10)),
+    },
+    'whatsapp': {
+        'BACKEND': os.environ.get('WHATSAPP_NOTIFICATION_BACKEND', 'worker.notifications.TwilioWhatsAppBackend'),
+        'RATE_LIMIT': float(os.environ.get('WHATSAPP_RATE_LIMIT', 20)),
+    },
+    'file': {
+        'BACKEND': 'worker.notifications.FileNotificationBackend',
+    },
+}
+# WHERE FileNotificationBackend WRITES, STDOUT WHEN UNSET
+NOTIFICATION_FILE_PATH = os.environ.get('NOTIFICATION_FILE_PATH')
+
+# DEFAULT CHANNEL FOR RENT REMINDER CAMPAIGNS ( email / whatsapp / file )
+RENT_REMINDER_CHANNEL = os.environ.get('RENT_REMINDER_CHANNEL', 'email')
+
+# RECEIPT PDFs ( resources.generate_transaction_pdf ), RENDERED OFFLINE
+# text: NO DEPENDENCIES, PLAIN TEXT LAYOUT
+# weasyprint: FULL invoice.html LAYOUT, NEEDS `pip install -r requirements-pdf.txt` AND PANGO, FALLS BACK TO text WITHOUT THEM
+RECEIPT_PDF_RENDERER = os.environ.get('RECEIPT_PDF_RENDERER', 'text')
+# RENDER PROCESSES PER WEB PROCESS, AND HOW MANY RENDERS MAY WAIT BEFORE NEW ONES ARE LEFT FOR LATER
+RECEIPT_PDF_WORKERS = int(os.environ.get('RECEIPT_PDF_WORKERS', 2))
+RECEIPT_PDF_QUEUE_SIZE = int(os.environ.get('RECEIPT_PDF_QUEUE_SIZE', 100))
+
+# N+1 QUERY DETECTION ( worker.nplusone )
+# `manage.py test` CHECKS EVERY REQUEST AND RAISES, PRODUCTION LOGS A RANDOM SAMPLE OF REQUESTS
+TESTING = sys.argv[1:2] == ['test']
+NPLUSONE_RAISE = TESTING or os.environ.get('NPLUSONE_RAISE', 'False') == 'True'
+NPLUSONE_THRESHOLD = int(os.environ.get('NPLUSONE_THRESHOLD', 5))
+NPLUSONE_SAMPLE_RATE = 0.0 if TESTING else float(os.environ.get('NPLUSONE_SAMPLE_RATE', 0.05))
+
+# CACHE ( LocMemCache BY DEFAULT, FileBasedCache WITH CACHE_LOCATION=/path/to/dir )
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'rent-manager'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 1000)),
+        },
+    }
+}
+
+# LISTING RESPONSE CACHE ( worker.response_cache ), INVALIDATED BY BUILDING DATA VERSION
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 86400))
+
+# KEYSET PAGINATION ( worker.pagination ), ?page_size= IS CAPPED AT THIS
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 500))
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'worker.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 50)),
 }
 
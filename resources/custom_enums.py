@@ -84,5 +84,53 @@ class StateCode(models.TextChoices):
 class NoticeType(models.TextChoices):
     RENT_ALERT = "Rent Alert"
     RECEIPT_GEN = "Receipt Generation"
+    LEASE_EXPIRY = "Lease Expiry"
     NORMAL = "Normal"
     OTHER = "Other"
+
+
+class OutboxKind(models.TextChoices):
+    TRANSACTION_RECEIPT = "Transaction Receipt"
+    DE_ALLOTMENT_SUMMARY = "De Allotment Summary"
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "Pending"
+    PROCESSING = "Processing"
+    SENT = "Sent"
+    DEAD = "Dead"
+
+
+class NoticeStatus(models.TextChoices):
+    PENDING = "Pending"
+    SENDING = "Sending"
+    SENT = "Sent"
+    FAILED = "Failed"
+
+
+class NotificationChannel(models.TextChoices):
+    EMAIL = "email"
+    WHATSAPP = "whatsapp"
+    FILE = "file"
+
+
+class CampaignStatus(models.TextChoices):
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+
+
+class ExpiryBucket(models.TextChoices):
+    EXPIRED = "Expired"
+    TODAY = "Today"
+    WEEK = "Within 7 Days"
+    MONTH = "Within 30 Days"
+
+
+class SearchTokenKind(models.TextChoices):
+    NAME = "name"
+    PHONETIC = "phonetic"
+    USERNAME = "username"
+    EMAIL = "email"
+    PHONE = "phone"
+    AADHAAR = "aadhaar"
+    PAN = "pan"
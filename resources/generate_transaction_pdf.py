@@ -1,26 +1,329 @@
+import hashlib
+import html
+import logging
 import os
-from django.template.loader import render_to_string
+import re
+import textwrap
+from functools import cache
+from importlib import import_module
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string, get_template
+from django.utils.html import strip_tags
 from rent_manager import settings
+from worker.documents import store_content_addressed
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_TEMPLATE = "invoice.html"
+RECEIPT_HTML_DIR = os.path.join("receipts", "html")
+RECEIPT_PDF_DIR = "receipts/pdf"
+
+# FIELDS NEEDED TO RENDER invoice.html, FETCHED IN ONE JOINED values() QUERY
+RECEIPT_FIELDS = (
+    "id",
+    "tnx_no",
+    "amount",
+    "is_rent",
+    "payment_mode",
+    "comment",
+    "ts",
+    "rm_map__person__f_name",
+    "rm_map__person__m_name",
+    "rm_map__person__l_name",
+    "rm_map__room__build_name",
+    "rm_map__room__flr_no",
+    "rm_map__room__r_no",
+)
+
+FINGERPRINT_PREFIX = "<!-- receipt-fingerprint: "
+
+_worker_template = None
 
 
 def generate_transaction_html(transaction):
     file_name = f"{transaction.tnx_no}.html"
 
-    dir_path = os.path.join(settings.MEDIA_ROOT, "receipts", "html")
+    dir_path = os.path.join(settings.MEDIA_ROOT, RECEIPT_HTML_DIR)
     os.makedirs(dir_path, exist_ok=True)
 
     file_path = os.path.join(dir_path, file_name)
 
     html_content = render_to_string(
-        "invoice.html",
-        {
-            "transaction": transaction,
-            "COMPANY_EMAIL": settings.COMPANY_EMAIL,
-            "MONTH": transaction.ts.strftime("%B %Y").upper(),
-        }
+        RECEIPT_TEMPLATE,
+        get_transaction_context(transaction)
     )
 
     with open(file_path, "w", encoding="utf-8") as f:
         f.write(html_content)
 
     return f"receipts/html/{file_name}"
+
+
+def get_transaction_context(transaction):
+    return {
+        "transaction": transaction,
+        "COMPANY_EMAIL": settings.COMPANY_EMAIL,
+        "MONTH": transaction.ts.strftime("%B %Y").upper(),
+    }
+
+
+def get_receipt_template_version():
+    """
+    Hash of the invoice template source, part of every receipt fingerprint
+    so a template edit re-renders all receipts.
+    """
+    with open(get_template(RECEIPT_TEMPLATE).origin.name, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_receipt_fingerprint(row, template_version):
+    payload = repr((template_version, settings.COMPANY_EMAIL, [row[field] for field in RECEIPT_FIELDS]))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_receipt_html_path(row):
+    return os.path.join(settings.MEDIA_ROOT, RECEIPT_HTML_DIR, f"{row['tnx_no']}.html")
+
+
+def is_receipt_unchanged(row, fingerprint):
+    # ONLY THE FIRST LINE IS READ, THE BODY IS NEVER RE-RENDERED TO COMPARE
+    try:
+        with open(get_receipt_html_path(row), "r", encoding="utf-8") as f:
+            return f.readline().strip() == f"{FINGERPRINT_PREFIX}{fingerprint} -->"
+    except FileNotFoundError:
+        return False
+
+
+def init_receipt_worker():
+    """
+    Process pool initializer: load the invoice template once per worker.
+    """
+    import django
+    from django.apps import apps
+
+    global _worker_template
+
+    if not apps.ready:
+        django.setup()
+
+    _worker_template = get_template(RECEIPT_TEMPLATE)
+
+
+def render_receipt_row(row, fingerprint):
+    """
+    Render one receipt from a RECEIPT_FIELDS row and write it to MEDIA_ROOT.
+    """
+    html_content = render_receipt_html(row)
+
+    file_path = get_receipt_html_path(row)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(f"{FINGERPRINT_PREFIX}{fingerprint} -->\n")
+        f.write(html_content)
+
+    return f"receipts/html/{row['tnx_no']}.html"
+
+
+def render_receipt_html(row):
+    template = _worker_template or get_template(RECEIPT_TEMPLATE)
+
+    transaction = {
+        "tnx_no": row["tnx_no"],
+        "amount": row["amount"],
+        "is_rent": row["is_rent"],
+        "payment_mode": row["payment_mode"],
+        "comment": row["comment"],
+        "ts": row["ts"],
+        "rm_map": {
+            "person": {
+                "f_name": row["rm_map__person__f_name"],
+                "m_name": row["rm_map__person__m_name"],
+                "l_name": row["rm_map__person__l_name"],
+            },
+            "room": {
+                "build_name": row["rm_map__room__build_name"],
+                "flr_no": row["rm_map__room__flr_no"],
+                "r_no": row["rm_map__room__r_no"],
+            },
+        },
+    }
+
+    return template.render({
+        "transaction": transaction,
+        "COMPANY_EMAIL": settings.COMPANY_EMAIL,
+        "MONTH": row["ts"].strftime("%B %Y").upper(),
+    })
+
+
+def offline_url_fetcher(url, *args, **kwargs):
+    # RENDERING NEVER GOES TO THE NETWORK, ONLY INLINE data: RESOURCES ARE LOADED
+    from weasyprint import default_url_fetcher
+
+    if not url.startswith("data:"):
+        raise ValueError(f"Receipts may not load external resources: {url}")
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+def render_pdf_weasyprint(html_content):
+    """
+    Full HTML / CSS layout of invoice.html with WeasyPrint ( needs pango installed ).
+    """
+    # IMPORTED ON FIRST USE, ONLY PROCESSES THAT RENDER RECEIPTS NEED IT
+    from weasyprint import HTML
+
+    return HTML(string=html_content, url_fetcher=offline_url_fetcher).write_pdf()
+
+
+# A4 IN POINTS
+PDF_PAGE_WIDTH = 595
+PDF_PAGE_HEIGHT = 842
+PDF_MARGIN = 50
+PDF_FONT_SIZE = 10
+PDF_LEADING = 14
+PDF_LINE_CHARS = 95
+
+NON_TEXT_BLOCKS = re.compile(r"<(head|style|script)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+
+
+def get_receipt_text_lines(html_content):
+    text = html.unescape(strip_tags(NON_TEXT_BLOCKS.sub("", html_content)))
+    # HELVETICA ( WinAnsi ) HAS NO RUPEE SIGN
+    text = text.replace("\u20b9", "Rs.")
+
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line:
+            lines.extend(textwrap.wrap(line, PDF_LINE_CHARS))
+    return lines
+
+
+def pdf_string(text):
+    text = text.encode("cp1252", errors="replace")
+    return b"(" + text.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def build_pdf(objects):
+    """
+    PDF file from object bodies, numbered from 1 in order ( 1 must be the catalog ).
+    """
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    return bytes(pdf)
+
+
+def render_pdf_text(html_content):
+    """
+    Dependency-free renderer: the receipt's text as plain Helvetica lines, paged on A4.
+    """
+    lines = get_receipt_text_lines(html_content)
+    per_page = (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) // PDF_LEADING
+    pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+
+    # 1 CATALOG, 2 PAGE TREE, 3 FONT, THEN ( PAGE, CONTENT ) PER PAGE
+    page_refs = b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (page_refs, len(pages)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+
+    for i, page_lines in enumerate(pages):
+        stream = b"BT /F1 %d Tf %d TL %d %d Td\n" % (
+            PDF_FONT_SIZE, PDF_LEADING, PDF_MARGIN, PDF_PAGE_HEIGHT - PDF_MARGIN
+        )
+        stream += b"".join(pdf_string(line) + b" Tj T*\n" for line in page_lines)
+        stream += b"ET"
+
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PDF_PAGE_WIDTH, PDF_PAGE_HEIGHT, 5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    return build_pdf(objects)
+
+
+# RECEIPT_PDF_RENDERER SETTING -> HTML TO PDF BYTES, BOTH FULLY OFFLINE
+RECEIPT_PDF_RENDERERS = {
+    "weasyprint": render_pdf_weasyprint,
+    "text": render_pdf_text,
+}
+
+
+@cache
+def is_weasyprint_available():
+    # CHECKED ONCE PER PROCESS, WEASYPRINT ALSO FAILS TO IMPORT WHEN PANGO IS MISSING ( OSError )
+    try:
+        import_module("weasyprint")
+    except (ImportError, OSError) as exc:
+        logger.warning("WeasyPrint is not usable ( %s ), receipts are rendered with the text renderer", exc)
+        return False
+    return True
+
+
+def get_receipt_renderer(renderer=None):
+    """
+    Renderer actually used: `renderer` or RECEIPT_PDF_RENDERER,
+    "text" when WeasyPrint is asked for but not installed.
+    """
+    renderer = renderer or settings.RECEIPT_PDF_RENDERER
+    if renderer == "weasyprint" and not is_weasyprint_available():
+        return "text"
+    return renderer
+
+
+def render_receipt_pdf(row, renderer=None):
+    """
+    PDF bytes of one receipt from a RECEIPT_FIELDS row.
+    """
+    return RECEIPT_PDF_RENDERERS[get_receipt_renderer(renderer)](render_receipt_html(row))
+
+
+def get_receipt_pdf_version(renderer=None):
+    # A TEMPLATE EDIT OR A RENDERER SWITCH RENDERS EVERY RECEIPT AGAIN,
+    # THE RESOLVED RENDERER KEEPS TEXT FALLBACKS FROM BEING SERVED ONCE WEASYPRINT IS INSTALLED
+    return f"{get_receipt_template_version()}:{get_receipt_renderer(renderer)}"
+
+
+def get_receipt_pdf_name(row, version):
+    fingerprint = get_receipt_fingerprint(row, version)
+    return f"{RECEIPT_PDF_DIR}/{fingerprint[:2]}/{fingerprint}.pdf"
+
+
+def get_receipt_pdf(transaction_id, renderer=None):
+    """
+    Storage name of the transaction's receipt PDF, rendered only on a cache miss.
+    - the name is the receipt fingerprint ( tnx_no, its fields, template version, renderer ),
+      so downloads and re-sends reuse the file and an edited transaction gets a new one
+    - the name is stored on Transaction.receipt
+    """
+    from worker.models import Transaction
+
+    row = Transaction.objects.values(*RECEIPT_FIELDS, "receipt").get(id=transaction_id)
+    name = get_receipt_pdf_name(row, get_receipt_pdf_version(renderer))
+
+    # CHECKED BEFORE RENDERING, A HIT COSTS NO RENDER
+    if not default_storage.exists(name):
+        store_content_addressed(ContentFile(render_receipt_pdf(row, renderer)), name)
+
+    if row["receipt"] != name:
+        # update() NOT save(): ts IS auto_now AND MUST KEEP THE PAYMENT TIME
+        Transaction.objects.filter(id=transaction_id).update(receipt=name)
+
+    return name
@@ -0,0 +1,107 @@
+import re
+
+from resources.custom_enums import SearchTokenKind
+
+TOKEN_MAX_LENGTH = 64
+
+WORD = re.compile(r"[a-z0-9]+")
+NON_DIGIT = re.compile(r"\D")
+
+# ONE JOINED Person ROW ( contacts / docs ARE ONE PER PERSON ) HOLDS EVERYTHING THAT IS INDEXED
+SEARCH_SOURCE_FIELDS = (
+    "id",
+    "f_name",
+    "m_name",
+    "l_name",
+    "username",
+    "email",
+    "contacts__phn_no",
+    "contacts__alt_phn_no",
+    "contacts__wa_no",
+    "docs__aadhar_no",
+    "docs__pan_no",
+)
+
+SOUNDEX_CODES = {
+    letter: code
+    for code, letters in (
+        ("1", "bfpv"),
+        ("2", "cgjkqsxz"),
+        ("3", "dt"),
+        ("4", "l"),
+        ("5", "mn"),
+        ("6", "r"),
+    )
+    for letter in letters
+}
+
+
+def get_words(text):
+    return WORD.findall((text or "").lower())
+
+
+def get_digits(text):
+    return NON_DIGIT.sub("", text or "")
+
+
+def soundex(word):
+    """
+    4 character Soundex key, misspelt names that sound alike ( sharma / sarma ) share it.
+    """
+    word = "".join(char for char in word.lower() if "a" <= char <= "z")
+    if not word:
+        return None
+
+    key = word[0]
+    last = SOUNDEX_CODES.get(word[0])
+
+    for char in word[1:]:
+        code = SOUNDEX_CODES.get(char)
+        if code and code != last:
+            key += code
+            if len(key) == 4:
+                break
+        # VOWELS SEPARATE REPEATED CODES, h / w DO NOT
+        if char not in "hw":
+            last = code
+
+    return key.ljust(4, "0")
+
+
+def get_phonetic_token(word):
+    # KEY FIRST FOR THE INDEX RANGE, THE WORD AFTER IT TO RANK BY SPELLING
+    return f"{soundex(word)}:{word}"
+
+
+def build_search_tokens(row):
+    """
+    {(kind, token)} for one SEARCH_SOURCE_FIELDS row, all lowercase alphanumerics.
+    """
+    tokens = set()
+
+    for field in ("f_name", "m_name", "l_name"):
+        for word in get_words(row[field]):
+            tokens.add((SearchTokenKind.NAME, word))
+            if word.isalpha() and len(word) > 1:
+                tokens.add((SearchTokenKind.PHONETIC, get_phonetic_token(word)))
+
+    for word in get_words(row["username"]):
+        tokens.add((SearchTokenKind.USERNAME, word))
+
+    for word in get_words((row["email"] or "").split("@")[0]):
+        tokens.add((SearchTokenKind.EMAIL, word))
+
+    for field in ("contacts__phn_no", "contacts__alt_phn_no", "contacts__wa_no"):
+        phone = get_digits(row[field])
+        if phone:
+            tokens.add((SearchTokenKind.PHONE, phone))
+
+    aadhaar = get_digits(row["docs__aadhar_no"])
+    if aadhaar:
+        tokens.add((SearchTokenKind.AADHAAR, aadhaar))
+
+    pan = "".join(get_words(row["docs__pan_no"]))
+    if pan:
+        tokens.add((SearchTokenKind.PAN, pan))
+
+    return {(kind, token[:TOKEN_MAX_LENGTH]) for kind, token in tokens}
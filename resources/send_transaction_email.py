@@ -1,10 +1,16 @@
-from django.core.mail import send_mail, EmailMessage, EmailMultiAlternatives
-from django.db.models import Window, F
-from django.db.models.functions import RowNumber
+import logging
+import smtplib
+
+from django.core.files.storage import default_storage
+from django.core.mail import send_mail, EmailMessage, EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.html import strip_tags
 from rent_manager import settings
+from resources.generate_transaction_pdf import get_receipt_pdf
+
+logger = logging.getLogger(__name__)
 
 
 def send_tnx_email_in_bg(transaction_id):
@@ -14,6 +20,19 @@ def send_tnx_email_in_bg(transaction_id):
 
 
 def send_transaction_email(transaction):
+    build_transaction_email(transaction).send()
+
+
+def build_transaction_email_by_id(transaction_id):
+    from worker.models import Transaction
+    transaction = Transaction.objects.select_related(
+        "rm_map__person",
+        "rm_map__room"
+    ).get(id=transaction_id)
+    return build_transaction_email(transaction)
+
+
+def build_transaction_email(transaction):
     context = {
         "transaction": transaction,
         "COMPANY_EMAIL": settings.COMPANY_EMAIL,
@@ -34,7 +53,18 @@ def send_transaction_email(transaction):
     )
 
     email.attach_alternative(html_content, "text/html")
-    email.send()
+    attach_receipt_pdf(email, transaction)
+    return email
+
+
+def attach_receipt_pdf(email, transaction):
+    # CACHED PDF, A RE-SEND NEVER RENDERS AGAIN. NO RENDERER: THE HTML BODY STILL GOES OUT
+    try:
+        name = get_receipt_pdf(transaction.id)
+        with default_storage.open(name, "rb") as f:
+            email.attach(f"receipt_{transaction.tnx_no}.pdf", f.read(), "application/pdf")
+    except Exception:
+        logger.exception("Receipt PDF for transaction %s not attached", transaction.id)
 
 
 def test_send_transaction_email(transaction):
@@ -68,25 +98,32 @@ def send_de_allotment_email_in_bg(room_allotment_id):
 
 
 def send_de_allotment_email(room_allotment):
+    build_de_allotment_email(room_allotment).send()
+
+
+def build_de_allotment_email_by_id(room_allotment_id):
+    from worker.models import RoomAllotment
+    room_allotment = RoomAllotment.objects.select_related(
+        "person",
+        "room"
+    ).get(id=room_allotment_id)
+    return build_de_allotment_email(room_allotment)
+
+
+def build_de_allotment_email(room_allotment):
+    from worker.settlements import get_de_allotment_statement
+
     person = room_allotment.person
 
-    transactions = (
-        room_allotment.transactions
-        .annotate(
-            no=Window(
-                expression=RowNumber(),
-                order_by=F("ts").asc()
-            )
-        )
-        .values(
-            "no",
-            "tnx_no",
-            "amount",
-            "payment_mode",
-            "comment",
-            "ts"
-        )
-    )
+    # PRECOMPUTED AT DE-ALLOTMENT, A RE-SEND RUNS NO TRANSACTION QUERY
+    statement = get_de_allotment_statement(room_allotment.id)
+    if statement is None:
+        raise ValueError(f"Room allotment {room_allotment.id} is still active.")
+
+    transactions = [
+        {**line, "ts": parse_datetime(line["ts"])}
+        for line in statement.transactions
+    ]
 
     context = {
         "f_name": person.f_name,
@@ -99,6 +136,7 @@ def send_de_allotment_email(room_allotment):
         "end_date": room_allotment.end_date,
         "actual_end_date": room_allotment.actual_end_date,
         "transactions": transactions,
+        "statement": statement,
         "date": timezone.now(),
     }
 
@@ -117,4 +155,75 @@ def send_de_allotment_email(room_allotment):
     )
 
     email.attach_alternative(html_content, "text/html")
-    email.send()
+    return email
+
+
+def send_transaction_emails(transactions, batch_size=None, connection=None):
+    return send_email_batch(
+        [build_transaction_email(transaction) for transaction in transactions],
+        batch_size=batch_size,
+        connection=connection
+    )
+
+
+# DROPPED / TIMED OUT CONNECTION, WORTH ONE RECONNECT ( NOT BAD RECIPIENTS ETC. )
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def send_email_batch(messages, batch_size=None, connection=None):
+    """
+    Send many messages over one reused SMTP connection.
+    - a fresh session is opened every `batch_size` messages
+    - a dropped connection is reopened and the message retried once
+    - one failing message never aborts the rest of the batch
+    - a connection that cannot be opened fails its batch's messages, it is not raised
+
+    Returns one {"index", "to", "sent", "error"} dict per message, in order.
+    """
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    connection = connection or get_connection()
+    results = []
+
+    for start in range(0, len(messages), batch_size):
+        batch = messages[start:start + batch_size]
+
+        try:
+            connection.open()
+        except Exception as exc:
+            # SERVER UNREACHABLE: EVERY MESSAGE OF THE BATCH FAILS, THE CALLER DECIDES ON RETRIES
+            error = f"{exc.__class__.__name__}: {exc}"
+            results.extend(
+                {"index": index, "to": message.to, "sent": False, "error": error}
+                for index, message in enumerate(batch, start)
+            )
+            continue
+
+        try:
+            for index, message in enumerate(batch, start):
+                results.append(send_batch_message(connection, index, message))
+        finally:
+            connection.close()
+
+    return results
+
+
+def send_batch_message(connection, index, message):
+    result = {"index": index, "to": message.to, "sent": False, "error": None}
+    message.connection = connection
+
+    try:
+        try:
+            sent = connection.send_messages([message])
+        except RECONNECT_ERRORS:
+            connection.close()
+            connection.open()
+            sent = connection.send_messages([message])
+    except Exception as exc:
+        result["error"] = f"{exc.__class__.__name__}: {exc}"
+        return result
+
+    if sent:
+        result["sent"] = True
+    else:
+        result["error"] = "Message was not accepted by the mail backend."
+    return result
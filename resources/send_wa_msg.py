@@ -1,9 +1,7 @@
-from twilio.rest import Client
-from rent_manager import settings
+from worker.notifications import Notification, send_notifications
 
 
-def send_whatsapp_receipt(transaction):
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+def build_whatsapp_receipt(transaction, wa_no):
     message_body = f"""
     🧾 *Transaction Receipt*
     
@@ -16,9 +14,18 @@ def send_whatsapp_receipt(transaction):
     Thank you for your payment! 🙏
     """
 
-    message = client.messages.create(
+    return Notification(
+        channel="whatsapp",
+        to=f"+91{wa_no}",
         body=message_body,
-        from_='whatsapp:+14155238886',
-        to=f"whatsapp:+91{transaction.rm_map.person.contacts.wa_no}",
+        reference=transaction.id,
     )
-    return message.sid
+
+
+def send_whatsapp_receipt(transaction):
+    contact = transaction.rm_map.person.contacts.first()
+    if contact is None or not contact.wa_no:
+        return None
+
+    result, = send_notifications([build_whatsapp_receipt(transaction, contact.wa_no)])
+    return result.get("message_id")
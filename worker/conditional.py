@@ -0,0 +1,63 @@
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.renderers import JSONRenderer
+
+from worker.models import get_resource_version
+
+# MASTER DATA ONLY CHANGES WITH A DEPLOY, THE ETag STILL CATCHES THAT
+MASTER_DATA_CACHE_CONTROL = "public, max-age=86400"
+
+# BROWSER MAY KEEP A COPY BUT MUST REVALIDATE IT ( CHEAP 304 ) ON EVERY USE
+VERSIONED_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return f'"{hashlib.sha256(value).hexdigest()[:32]}"'
+
+
+class PrecomputedJSON:
+    """
+    JSON body rendered once, with its strong ETag.
+    """
+
+    def __init__(self, data):
+        self.content = JSONRenderer().render(data)
+        self.etag = make_etag(self.content)
+
+    def response(self, request):
+        response = get_conditional_response(request, etag=self.etag)
+        if response is None:
+            response = HttpResponse(self.content, content_type="application/json")
+
+        response["ETag"] = self.etag
+        response["Cache-Control"] = MASTER_DATA_CACHE_CONTROL
+        return response
+
+
+class VersionedConditionalGetMixin:
+    """
+    Conditional GET for views whose output only changes when `version_key` is bumped.
+    - ETag comes from the version and the full path, no data query is needed for a 304
+    - the version is read before the data, so a concurrent write can only make the ETag stale, never the body
+    """
+    version_key = None
+
+    def get_etag(self, request):
+        version = get_resource_version(self.version_key)
+        return make_etag(f"{self.version_key}:{version}:{request.get_full_path()}")
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Cache-Control"] = VERSIONED_CACHE_CONTROL
+        return response
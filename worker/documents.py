@@ -0,0 +1,200 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+
+# Docs FIELD PER URL KIND
+DOCUMENT_FIELDS = {
+    "aadhaar": "aadhar_doc",
+    "pan": "pan_doc",
+}
+
+CONTENT_ADDRESSED_DIR = "documents/sha256"
+
+SINGLE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    """
+    Upload spooled to a temp file, with its SHA-256 and first bytes computed while it streamed in.
+    """
+    sha256 = None
+    head = b""
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """
+    Streams every uploaded file to a temp file chunk by chunk:
+    - hashes it ( SHA-256 ) on the fly
+    - stops reading a file as soon as it exceeds DOCUMENT_MAX_UPLOAD_SIZE,
+      the rejection is kept in `request.rejected_uploads` ( field name -> message )
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.DOCUMENT_MAX_UPLOAD_SIZE
+        if request is not None:
+            request.rejected_uploads = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.hasher = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+
+        if self.size > self.max_size:
+            self.file.close()
+            self.request.rejected_uploads[self.field_name] = (
+                f"File must be at most {self.max_size // (1024 * 1024)}MB."
+            )
+            raise SkipFile()
+
+        if len(self.head) < 8:
+            self.head = (self.head + raw_data)[:8]
+
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hasher.hexdigest()
+        self.file.head = self.head
+        return self.file
+
+
+def get_file_sha256(file):
+    sha256 = getattr(file, "sha256", None)
+    if sha256:
+        return sha256
+
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def store_content_addressed(file, name=None):
+    """
+    Save `file` under documents/sha256/ab/cd/<sha256>.<ext> and return that name.
+    Identical content is stored once: a re-upload only references the existing file.
+    - name: storage name to use instead, for keys known before the content ( receipt fingerprints )
+    """
+    if name is None:
+        sha256 = get_file_sha256(file)
+        ext = os.path.splitext(file.name)[1].lower()
+        name = f"{CONTENT_ADDRESSED_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+    if default_storage.exists(name):
+        return name
+
+    saved_name = default_storage.save(name, file)
+
+    # SAME CONTENT SAVED CONCURRENTLY, KEEP THE CANONICAL COPY
+    if saved_name != name:
+        default_storage.delete(saved_name)
+
+    return name
+
+
+def get_document_etag(name):
+    # CONTENT-ADDRESSED NAMES ALREADY CARRY THE HASH, ANYTHING ELSE FALLS BACK TO THE NAME
+    return f'"{os.path.splitext(os.path.basename(name))[0]}"'
+
+
+class FileRange:
+    """
+    File-like view of `length` bytes of `file` from `start`, for FileResponse.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range,
+    None to serve the whole file, ValueError if it cannot be satisfied.
+    """
+    match = SINGLE_RANGE.match(header.strip())
+    # MULTIPLE OR MALFORMED RANGES: THE WHOLE FILE IS A VALID ANSWER
+    if match is None or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def document_file_response(request, field_file, filename):
+    """
+    Stream a stored document with FileResponse:
+    - strong ETag from the content hash, 304 on If-None-Match
+    - single byte range ( 206 ), honouring If-Range
+    """
+    etag = get_document_etag(field_file.name)
+
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+        return response
+
+    size = field_file.size
+    file = field_file.storage.open(field_file.name, "rb")
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(file, content_type="application/pdf", filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end - start + 1), content_type="application/pdf", filename=filename, status=206)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=0"
+    return response
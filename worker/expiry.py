@@ -0,0 +1,114 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from resources.custom_enums import ExpiryBucket, NoticeType
+from worker.models import Notice, RoomAllotment, bump_building_versions
+
+EXPIRY_WINDOW_DAYS = 30
+
+
+def expiry_bucket_case(today):
+    """
+    SQL version of worker.models.get_expiry_bucket, for set-based updates.
+    """
+    return Case(
+        When(is_active=False, then=Value(None)),
+        When(end_date__lt=today, then=Value(ExpiryBucket.EXPIRED)),
+        When(end_date=today, then=Value(ExpiryBucket.TODAY)),
+        When(end_date__lte=today + timedelta(days=7), then=Value(ExpiryBucket.WEEK)),
+        When(end_date__lte=today + timedelta(days=EXPIRY_WINDOW_DAYS), then=Value(ExpiryBucket.MONTH)),
+        default=Value(None),
+        output_field=CharField(),
+    )
+
+
+def expiring_allotments(buckets=None):
+    """
+    Active allotments in `buckets` ( every ExpiryBucket by default ),
+    read through the partial room_allot_expiry_bucket_idx.
+    """
+    return RoomAllotment.objects.filter(
+        is_active=True,
+        expiry_bucket__in=buckets or ExpiryBucket.values
+    ).select_related("person", "room")
+
+
+def build_expiry_notice(row):
+    return Notice(
+        rm_map_id=row["id"],
+        code=NoticeType.LEASE_EXPIRY,
+        # ONE NOTICE PER LEASE END, A RE-RUN NEVER DUPLICATES IT
+        lease_end_date=row["end_date"],
+        desc=(
+            f"Lease of {row['person__f_name']} {row['person__l_name']} for room "
+            f"{row['room__code_name']} ended on {row['end_date']:%d %b %Y}, renew or de-allot."
+        )[:255],
+    )
+
+
+def sweep_lease_expiry(today=None):
+    """
+    Move allotments into their expiry bucket as of `today`:
+    - candidates are read once ( for notices and cache versions )
+    - every candidate is updated with one set-based UPDATE
+    - every expired lease without a LEASE_EXPIRY notice gets one ( one bulk_create ),
+      also those saved already expired, whose bucket never changes here
+    Allotments stay active, de-allotment is still a manual step.
+    """
+    today = today or timezone.localdate()
+    bucket = expiry_bucket_case(today)
+
+    # ACTIVE LEASES ENDING WITHIN THE WINDOW, PLUS ROWS THAT MAY NEED THEIR BUCKET CLEARED
+    candidates = RoomAllotment.objects.filter(
+        Q(is_active=True, end_date__lte=today + timedelta(days=EXPIRY_WINDOW_DAYS)) |
+        Q(expiry_bucket__isnull=False)
+    )
+
+    rows = list(
+        candidates.annotate(
+            new_bucket=bucket,
+            notified=Exists(
+                Notice.objects.filter(
+                    rm_map_id=OuterRef("pk"),
+                    code=NoticeType.LEASE_EXPIRY,
+                    lease_end_date=OuterRef("end_date")
+                )
+            )
+        ).values(
+            "id",
+            "end_date",
+            "expiry_bucket",
+            "new_bucket",
+            "notified",
+            "person__f_name",
+            "person__l_name",
+            "room__build_name",
+            "room__code_name"
+        )
+    )
+
+    changed = [row for row in rows if row["expiry_bucket"] != row["new_bucket"]]
+    expired = [row for row in rows if row["new_bucket"] == ExpiryBucket.EXPIRED and not row["notified"]]
+
+    with transaction.atomic():
+        if changed:
+            candidates.update(expiry_bucket=bucket)
+            # UPDATE SKIPS save(), CACHED ALLOTMENT LISTINGS OF THESE BUILDINGS ARE STALE
+            bump_building_versions(row["room__build_name"] for row in changed)
+
+        # THE UNIQUE CONSTRAINT DROPS A NOTICE A CONCURRENT SWEEP ALREADY ADDED
+        Notice.objects.bulk_create(
+            [build_expiry_notice(row) for row in expired],
+            ignore_conflicts=True
+        )
+
+    return {
+        "as_of": today,
+        "changed": len(changed),
+        "expired": len(expired),
+        "buckets": dict(Counter(row["new_bucket"] for row in changed if row["new_bucket"])),
+    }
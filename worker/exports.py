@@ -0,0 +1,89 @@
+import csv
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (CSV HEADER, values_list FIELD)
+TRANSACTION_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("tnx_no", "tnx_no"),
+    ("date", "ts"),
+    ("amount", "amount"),
+    ("is_rent", "is_rent"),
+    ("payment_mode", "payment_mode"),
+    ("comment", "comment"),
+    ("allotment_id", "rm_map_id"),
+    ("person_id", "rm_map__person_id"),
+    ("f_name", "rm_map__person__f_name"),
+    ("m_name", "rm_map__person__m_name"),
+    ("l_name", "rm_map__person__l_name"),
+    ("email", "rm_map__person__email"),
+    ("room_id", "rm_map__room_id"),
+    ("r_no", "rm_map__room__r_no"),
+    ("code_name", "rm_map__room__code_name"),
+    ("building", "rm_map__room__build_name"),
+)
+
+ALLOTMENT_EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("start_date", "start_date"),
+    ("end_date", "end_date"),
+    ("actual_end_date", "actual_end_date"),
+    ("is_active", "is_active"),
+    ("person_id", "person_id"),
+    ("f_name", "person__f_name"),
+    ("m_name", "person__m_name"),
+    ("l_name", "person__l_name"),
+    ("email", "person__email"),
+    ("phn_no", "person__contacts__phn_no"),
+    ("wa_no", "person__contacts__wa_no"),
+    ("room_id", "room_id"),
+    ("r_no", "room__r_no"),
+    ("code_name", "room__code_name"),
+    ("building", "room__build_name"),
+    ("layout", "room__layout"),
+    ("deposit", "rental_details__deposit"),
+    ("rent", "rental_details__rent"),
+    ("maintenance", "rental_details__maintenance"),
+    ("rent_total", "rental_details__rent_total"),
+)
+
+
+class Echo:
+    """
+    File-like object whose write() hands the line back to the generator.
+    """
+
+    def write(self, value):
+        return value
+
+
+def format_export_value(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def stream_csv(queryset, columns):
+    writer = csv.writer(Echo())
+
+    yield writer.writerow([header for header, _ in columns])
+
+    rows = queryset.values_list(
+        *[field for _, field in columns]
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for row in rows:
+        yield writer.writerow([format_export_value(value) for value in row])
+
+
+def csv_streaming_response(queryset, columns, file_name):
+    response = StreamingHttpResponse(
+        stream_csv(queryset, columns),
+        content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+    return response
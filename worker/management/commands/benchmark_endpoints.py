@@ -0,0 +1,205 @@
+import json
+import logging
+import math
+import platform
+import time
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+from django.utils import timezone
+
+from worker import urls as worker_urls
+from worker.models import RoomAllotment
+
+API_PREFIX = "/api/worker/"
+
+# IGNORE LATENCY REGRESSIONS SMALLER THAN THIS ( TIMER / SCHEDULER NOISE )
+NOISE_FLOOR_MS = 5.0
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def get_sample_ids():
+    """
+    Ids of one active allotment ( and its person / room ) to fill URL kwargs.
+    """
+    allotment = RoomAllotment.objects.filter(
+        is_active=True
+    ).select_related(
+        "room"
+    ).order_by(
+        "id"
+    ).first()
+
+    if allotment is None:
+        raise CommandError("No active allotment found, run seed_benchmark_data first.")
+
+    return {
+        "allotment": allotment.id,
+        "person": allotment.person_id,
+        "room": allotment.room_id,
+        "r_no": allotment.room.r_no,
+        "building": allotment.room.build_name,
+    }
+
+
+def build_request_path(pattern, sample):
+    route = str(pattern.pattern)
+    today = timezone.localdate()
+
+    kwargs = {
+        "person_id": sample["person"],
+        "rm_map": sample["allotment"],
+        "room__r_no": sample["r_no"],
+    }
+    # `pk` MEANS A DIFFERENT MODEL DEPENDING ON THE ROUTE
+    if route.startswith("room/"):
+        kwargs["pk"] = sample["room"]
+    elif route.startswith("person/"):
+        kwargs["pk"] = sample["person"]
+    else:
+        kwargs["pk"] = sample["allotment"]
+
+    path = route
+    for name, value in kwargs.items():
+        path = path.replace(f"<int:{name}>", str(value))
+
+    params = {
+        "building_code": sample["building"],
+        "building_name": sample["building"],
+        "year": today.year,
+        "month": today.month,
+        "transactions_type": "all",
+    }
+
+    return f"{API_PREFIX}{path}?{urlencode(params)}"
+
+
+def allows_get(pattern):
+    view = getattr(pattern.callback, "view_class", None) or getattr(pattern.callback, "cls", None)
+    if view is None:
+        return True
+    return "get" in view.http_method_names and hasattr(view, "get")
+
+
+class Command(BaseCommand):
+    help = "Time every GET route in worker/urls.py: query count and p50 / p95 latency, optionally checked against a baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--output", default="bench_output.json", help="Where to write results.")
+        parser.add_argument("--baseline", help="Previous results JSON to compare against.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.20,
+            help="Allowed p95 slowdown vs baseline, as a fraction.",
+        )
+
+    def handle(self, *args, **options):
+        sample = get_sample_ids()
+        client = Client()
+
+        # 404s FOR SAMPLE IDS WITHOUT ADDRESS / DOCS ARE EXPECTED, KEEP OUTPUT READABLE
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        results = {}
+
+        for pattern in worker_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not allows_get(pattern):
+                continue
+
+            route = str(pattern.pattern)
+            path = build_request_path(pattern, sample)
+            results[route] = self.measure(client, path, options["iterations"], options["warmup"])
+
+            item = results[route]
+            self.stdout.write(
+                f"{route:55} {item['status']} q={item['queries']:<4} "
+                f"p50={item['p50_ms']:8.2f}ms p95={item['p95_ms']:8.2f}ms"
+            )
+
+        report = {
+            "meta": {
+                "ts": timezone.now().isoformat(),
+                "iterations": options["iterations"],
+                "python": platform.python_version(),
+                "db_vendor": connection.vendor,
+            },
+            "results": results,
+        }
+
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"]:
+            self.compare(results, options["baseline"], options["tolerance"])
+
+    @staticmethod
+    def measure(client, path, iterations, warmup):
+        for _ in range(warmup):
+            response = client.get(path)
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        timings = []
+        queries = 0
+        status_code = None
+
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(path)
+                # STREAMED BODIES ARE PRODUCED LAZILY, CONSUME THEM INSIDE THE TIMER
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            queries = max(queries, len(context.captured_queries))
+            status_code = response.status_code
+
+        return {
+            "path": path,
+            "status": status_code,
+            "queries": queries,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(sum(timings) / len(timings), 3),
+        }
+
+    def compare(self, results, baseline_path, tolerance):
+        try:
+            with open(baseline_path, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Could not read baseline {baseline_path}: {exc}")
+
+        regressions = []
+        for route, current in results.items():
+            previous = baseline.get(route)
+            if previous is None:
+                continue
+
+            if current["queries"] > previous["queries"]:
+                regressions.append(f"{route}: queries {previous['queries']} -> {current['queries']}")
+
+            allowed = previous["p95_ms"] * (1 + tolerance)
+            if current["p95_ms"] > allowed and current["p95_ms"] - previous["p95_ms"] > NOISE_FLOOR_MS:
+                regressions.append(f"{route}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {baseline_path}.")
+
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}."))
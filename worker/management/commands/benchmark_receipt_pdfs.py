@@ -0,0 +1,80 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resources.generate_transaction_pdf import (
+    RECEIPT_FIELDS,
+    RECEIPT_PDF_RENDERERS,
+    get_receipt_renderer,
+    get_receipt_pdf,
+    render_receipt_pdf
+)
+from worker.models import Transaction
+from worker.receipts import create_receipt_pool
+
+
+def render_size(row, renderer):
+    return len(render_receipt_pdf(row, renderer))
+
+
+class Command(BaseCommand):
+    help = "Receipt PDF throughput: cold renders per pool size, then the render cache ( miss and hit )."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=200, help="Latest transactions to render.")
+        parser.add_argument("--workers", default=f"1,{os.cpu_count()}", help="Pool sizes to try, comma separated.")
+        parser.add_argument("--renderer", choices=list(RECEIPT_PDF_RENDERERS), help="Defaults to RECEIPT_PDF_RENDERER.")
+        parser.add_argument("--skip-cache", action="store_true", help="Only time cold renders, store nothing.")
+
+    def handle(self, *args, **options):
+        renderer = get_receipt_renderer(options["renderer"])
+
+        try:
+            pool_sizes = [int(size) for size in options["workers"].split(",")]
+        except ValueError:
+            raise CommandError("--workers must be comma separated integers.")
+
+        rows = list(Transaction.objects.order_by("-id").values(*RECEIPT_FIELDS)[:options["limit"]])
+        if not rows:
+            raise CommandError("No transactions found, run seed_benchmark_data first.")
+
+        self.stdout.write(f"{len(rows)} receipt(s), renderer={renderer}")
+
+        for workers in pool_sizes:
+            self.bench_pool(rows, renderer, workers)
+
+        if not options["skip_cache"]:
+            ids = [row["id"] for row in rows]
+            self.bench_cache(ids, renderer, "first lookup")
+            self.bench_cache(ids, renderer, "cached lookup")
+
+    def bench_pool(self, rows, renderer, workers):
+        with create_receipt_pool(workers) as pool:
+            # START EVERY WORKER BEFORE TIMING, PROCESS SPAWN IS NOT RENDER TIME
+            list(pool.map(render_size, rows[:workers], [renderer] * workers))
+
+            started = time.perf_counter()
+            sizes = list(pool.map(
+                render_size,
+                rows,
+                [renderer] * len(rows),
+                chunksize=max(len(rows) // (workers * 4), 1)
+            ))
+            elapsed = time.perf_counter() - started
+
+        self.report(f"pool workers={workers}", len(rows), elapsed, sum(sizes) / len(sizes))
+
+    def bench_cache(self, ids, renderer, label):
+        # IN-PROCESS get_receipt_pdf: QUERY, CACHE LOOKUP, RENDER + STORE ON A MISS
+        started = time.perf_counter()
+        for transaction_id in ids:
+            get_receipt_pdf(transaction_id, renderer)
+        self.report(label, len(ids), time.perf_counter() - started)
+
+    def report(self, label, count, elapsed, avg_size=None):
+        rate = count / elapsed if elapsed else 0
+        line = f"{label:20} {count} in {elapsed:7.3f}s  {rate:9.1f}/s  {elapsed / count * 1000:8.2f}ms each"
+        if avg_size is not None:
+            line += f"  avg {avg_size / 1024:.1f}KB"
+        self.stdout.write(line)
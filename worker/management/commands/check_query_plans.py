@@ -0,0 +1,102 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from resources.custom_enums import BuildingCodes, RoomLayout
+from worker.expiry import expiring_allotments
+from worker.models import RoomAllotment, RoomMaster, Transaction
+from worker.reports import unpaid_rent_rows
+
+
+def unpaid_rent_query():
+    today = timezone.localdate()
+    return unpaid_rent_rows(today.year, today.month)
+
+
+def rent_paid_totals_query():
+    return Transaction.objects.filter(rm_map_id=1, is_rent=True, ts__lt=timezone.now()).values("amount")
+
+
+def expiring_allotments_query():
+    # SAME QUERYSET AS RoomAllotmentExpiryAPIView
+    return expiring_allotments()
+
+
+def person_is_active_query():
+    # SAME SHAPE AS PersonSerializer.get_is_active
+    return RoomAllotment.objects.filter(person_id=1, is_active=True)
+
+
+def rooms_by_layout_query():
+    return RoomMaster.objects.filter(build_name=BuildingCodes.values[0], layout=RoomLayout.values[0])
+
+
+# (NAME, QUERYSET BUILDER, TABLE THAT MUST BE READ THROUGH AN INDEX, INDEX EXPECTED IN THE PLAN)
+HOT_QUERIES = (
+    ("unpaid-rent", unpaid_rent_query, "transaction", "transaction_rm_rent_ts_idx"),
+    ("rent-paid-totals", rent_paid_totals_query, "transaction", "transaction_rm_rent_ts_idx"),
+    ("allotment-expiry", expiring_allotments_query, "room_allotment", "room_allot_expiry_bucket_idx"),
+    ("person-is-active", person_is_active_query, "room_allotment", "room_allot_person_active_idx"),
+    ("rooms-by-layout", rooms_by_layout_query, "room_master", "room_master_build_layout_idx"),
+)
+
+
+def is_full_scan(plan, table):
+    """
+    True if the plan reads `table` sequentially.
+    - postgresql : `Seq Scan on table`
+    - sqlite     : `SCAN table` without `USING ( COVERING ) INDEX`
+    """
+    name = re.escape(table)
+
+    if connection.vendor == "postgresql":
+        return re.search(rf"Seq Scan on {name}\b", plan) is not None
+
+    if connection.vendor == "sqlite":
+        for line in plan.splitlines():
+            if re.search(rf"\bSCAN {name}\b", line) and "INDEX" not in line:
+                return True
+        return False
+
+    raise CommandError(f"EXPLAIN checks are not supported on {connection.vendor}.")
+
+
+def explain(queryset):
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # SMALL TABLES ARE CHEAPER TO SEQ SCAN, ASK WHETHER AN INDEX CAN BE USED AT ALL
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot queries and fail if any of them does not use its index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan.")
+
+    def handle(self, *args, **options):
+        failures = []
+
+        for name, build_queryset, table, index in HOT_QUERIES:
+            plan = explain(build_queryset())
+
+            if options["verbose_plans"]:
+                self.stdout.write(f"-- {name}\n{plan}\n")
+
+            if is_full_scan(plan, table):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{name:20} full scan on {table}"))
+            elif index not in plan:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{name:20} {index} not used"))
+            else:
+                self.stdout.write(f"{name:20} {index} on {table}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot query(ies) not using an index: {', '.join(failures)}")
+
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index."))
@@ -0,0 +1,79 @@
+import os
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resources.generate_transaction_pdf import (
+    RECEIPT_FIELDS,
+    get_receipt_template_version,
+    get_receipt_fingerprint,
+    is_receipt_unchanged,
+    render_receipt_row
+)
+from worker.models import Transaction
+from worker.receipts import create_receipt_pool
+from worker.reports import month_bounds
+
+
+class Command(BaseCommand):
+    help = "Render HTML receipts for every transaction of a month across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", required=True, help="Month to render, YYYY-MM.")
+        parser.add_argument("--building", help="Only transactions of this building.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Render processes.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per DB round trip.")
+        parser.add_argument("--force", action="store_true", help="Re-render receipts that are already up to date.")
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options["month"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--month must be in YYYY-MM format.")
+
+        start, end = month_bounds(month)
+        queryset = Transaction.objects.filter(ts__gte=start, ts__lt=end)
+
+        if options["building"]:
+            queryset = queryset.filter(rm_map__room__build_name=options["building"])
+
+        rows = queryset.order_by("id").values(*RECEIPT_FIELDS).iterator(chunk_size=options["chunk_size"])
+        template_version = get_receipt_template_version()
+
+        rendered = skipped = 0
+        started = time.perf_counter()
+
+        with create_receipt_pool(options["workers"]) as pool:
+            futures = []
+
+            for row in rows:
+                fingerprint = get_receipt_fingerprint(row, template_version)
+
+                if not options["force"] and is_receipt_unchanged(row, fingerprint):
+                    skipped += 1
+                    continue
+
+                futures.append(pool.submit(render_receipt_row, row, fingerprint))
+
+                # KEEP MEMORY FLAT, COLLECT FINISHED WORK EVERY CHUNK
+                if len(futures) >= options["chunk_size"]:
+                    rendered += self.collect(futures)
+                    futures = []
+
+            rendered += self.collect(futures)
+
+        elapsed = time.perf_counter() - started
+        total = rendered + skipped
+        rate = total / elapsed if elapsed else 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} receipt(s) in {elapsed:.2f}s ({rate:.1f}/s): "
+            f"{rendered} rendered, {skipped} unchanged."
+        ))
+
+    @staticmethod
+    def collect(futures):
+        for future in futures:
+            future.result()
+        return len(futures)
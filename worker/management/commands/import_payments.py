@@ -0,0 +1,59 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from worker.payment_import import (
+    IMPORT_CHUNK_SIZE,
+    parse_payment_csv,
+    parse_payment_json,
+    import_payments
+)
+
+
+class Command(BaseCommand):
+    help = "Import payments from a CSV or JSON file ( columns: rm_map, amount, is_rent, payment_mode, comment )."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file, picked by extension.")
+        parser.add_argument(
+            "--partial",
+            action="store_true",
+            help="Save valid rows even if some rows are invalid ( default: all-or-nothing ).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per INSERT.")
+        parser.add_argument("--send-receipts", action="store_true", help="Queue a receipt email per payment.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+
+            if path.lower().endswith(".json"):
+                rows = parse_payment_json(content)
+            else:
+                rows = parse_payment_csv(content)
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        result = import_payments(
+            rows,
+            atomic=not options["partial"],
+            chunk_size=options["chunk_size"],
+            send_receipts=options["send_receipts"]
+        )
+
+        for error in result["errors"]:
+            messages = "; ".join(
+                f"{field}: {' '.join(str(message) for message in field_errors)}"
+                for field, field_errors in error["errors"].items()
+            )
+            self.stdout.write(f"Row {error['row']}: {messages}")
+
+        if result["errors"] and not options["partial"]:
+            raise CommandError(f"{len(result['errors'])} invalid row(s), nothing imported.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} payment(s), {len(result['errors'])} row(s) rejected."
+        ))
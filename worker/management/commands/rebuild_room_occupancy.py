@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+
+from worker.models import RoomMaster, RoomOccupancy
+
+
+def compute_room_occupancy():
+    """
+    Occupancy per (building, layout) recomputed from the source tables.
+    """
+    queryset = (
+        RoomMaster.objects
+        .values("build_name", "layout")
+        .annotate(
+            total_rooms=Count("id", distinct=True),
+            occupied_rooms=Count(
+                "id",
+                filter=Q(room_allotments__is_active=True),
+                distinct=True
+            ),
+        )
+    )
+
+    return {
+        (item["build_name"], item["layout"] or ""): (
+            item["total_rooms"],
+            item["occupied_rooms"],
+            item["total_rooms"] - item["occupied_rooms"],
+        )
+        for item in queryset
+    }
+
+
+class Command(BaseCommand):
+    help = "Rebuild the room occupancy summary table, or check it for drift with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the summary with the source tables; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            self.check_drift()
+        else:
+            self.rebuild()
+
+    def check_drift(self):
+        expected = compute_room_occupancy()
+        stored = {
+            (row.build_name, row.layout): (row.total_rooms, row.occupied_rooms, row.vacant_rooms)
+            for row in RoomOccupancy.objects.all()
+        }
+
+        drift = []
+        for key in sorted(set(expected) | set(stored)):
+            want = expected.get(key, (0, 0, 0))
+            have = stored.get(key, (0, 0, 0))
+            if want != have:
+                drift.append((key, want, have))
+
+        for (build_name, layout), want, have in drift:
+            self.stdout.write(
+                f"{build_name} / {layout or '-'}: "
+                f"expected total={want[0]} occupied={want[1]} vacant={want[2]}, "
+                f"stored total={have[0]} occupied={have[1]} vacant={have[2]}"
+            )
+
+        if drift:
+            raise CommandError(f"Room occupancy drift in {len(drift)} group(s). Run without --check to rebuild.")
+
+        self.stdout.write(self.style.SUCCESS("Room occupancy summary is in sync."))
+
+    @transaction.atomic
+    def rebuild(self):
+        # LOCK SUMMARY ROWS FIRST, CONCURRENT DELTAS WAIT AND APPLY ON TOP OF THE REBUILT VALUES
+        stored = {
+            (row.build_name, row.layout): row
+            for row in RoomOccupancy.objects.select_for_update()
+        }
+
+        expected = compute_room_occupancy()
+
+        for key, row in stored.items():
+            row.total_rooms, row.occupied_rooms, row.vacant_rooms = expected.get(key, (0, 0, 0))
+        RoomOccupancy.objects.bulk_update(
+            stored.values(),
+            ["total_rooms", "occupied_rooms", "vacant_rooms"]
+        )
+
+        RoomOccupancy.objects.bulk_create([
+            RoomOccupancy(
+                build_name=build_name,
+                layout=layout,
+                total_rooms=total,
+                occupied_rooms=occupied,
+                vacant_rooms=vacant,
+            )
+            for (build_name, layout), (total, occupied, vacant) in expected.items()
+            if (build_name, layout) not in stored
+        ])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt room occupancy for {len(expected)} group(s)."))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from resources.search_tokens import SEARCH_SOURCE_FIELDS
+from worker.models import Person, PersonSearchToken, get_search_tokens
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Rebuild the person search index ( person/search/ ) from Person, Contact and Docs, e.g. after bulk imports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Persons read and indexed per batch.")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch_size = options["batch_size"]
+
+        PersonSearchToken.objects.all().delete()
+
+        rows = Person.objects.order_by("id").values(*SEARCH_SOURCE_FIELDS).iterator(chunk_size=batch_size)
+
+        persons = tokens = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                tokens += len(PersonSearchToken.objects.bulk_create(get_search_tokens(batch), batch_size=batch_size * 10))
+                persons += len(batch)
+                batch = []
+
+        tokens += len(PersonSearchToken.objects.bulk_create(get_search_tokens(batch), batch_size=batch_size * 10))
+        persons += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {persons} person(s), {tokens} token(s) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,57 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from worker.outbox import claim_jobs, process_jobs
+
+
+def run_jobs(jobs):
+    try:
+        return process_jobs(jobs)
+    finally:
+        # EACH POOL THREAD HOLDS ITS OWN DB CONNECTION
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Drain the email outbox: send due emails, retry failures with backoff, dead-letter after max attempts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4, help="Emails sent in parallel.")
+        parser.add_argument("--batch-size", type=int, default=50, help="Jobs claimed per poll.")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain due jobs once and exit.")
+
+    def handle(self, *args, **options):
+        totals = Counter()
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            while True:
+                close_old_connections()
+                jobs = claim_jobs(options["batch_size"])
+
+                if jobs:
+                    # ONE SMTP CONNECTION PER WORKER THREAD
+                    chunks = [jobs[i::options["concurrency"]] for i in range(options["concurrency"])]
+                    results = Counter(
+                        outcome
+                        for outcomes in pool.map(run_jobs, [chunk for chunk in chunks if chunk])
+                        for outcome in outcomes
+                    )
+                    totals.update(results)
+                    self.stdout.write(self.format_counts(results))
+                    continue
+
+                if options["once"]:
+                    break
+
+                time.sleep(options["poll_interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox drained. {self.format_counts(totals)}"))
+
+    @staticmethod
+    def format_counts(counts):
+        return ", ".join(f"{label}: {counts.get(label, 0)}" for label in ("Sent", "Pending", "Dead"))
@@ -0,0 +1,198 @@
+import random
+import time
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from resources.custom_enums import BuildingCodes, RoomLayout, PaymentModeChoices
+from worker.models import (
+    Person,
+    Contact,
+    RoomMaster,
+    MeterDetails,
+    RoomAllotment,
+    RoomAllotmentExtra,
+    RentalDetails,
+    Transaction,
+    get_expiry_bucket
+)
+
+BATCH_SIZE = 5000
+
+# SPREAD TRANSACTION TIMESTAMPS OVER THIS MANY PAST MONTHS
+HISTORY_MONTHS = 12
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic buildings, rooms, tenants, allotments and payments for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buildings", type=int, default=5)
+        parser.add_argument("--rooms", type=int, default=2000, help="Rooms across all buildings.")
+        parser.add_argument("--tenants", type=int, default=20000)
+        parser.add_argument("--transactions", type=int, default=500000)
+        parser.add_argument("--occupancy", type=float, default=0.85, help="Share of rooms with an active allotment.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--force", action="store_true", help="Seed even if rooms already exist.")
+
+    def handle(self, *args, **options):
+        if RoomMaster.objects.exists() and not options["force"]:
+            raise CommandError("Database already has rooms, use a fresh database or pass --force.")
+
+        random.seed(options["seed"])
+        started = time.perf_counter()
+        self.run_id = int(time.time())
+
+        with transaction.atomic():
+            rooms = self.seed_rooms(options["buildings"], options["rooms"])
+            persons = self.seed_tenants(options["tenants"])
+            allotments = self.seed_allotments(rooms, persons, options["occupancy"])
+            self.seed_transactions(allotments, options["transactions"])
+
+        call_command("rebuild_room_occupancy", stdout=self.stdout)
+        call_command("rebuild_search_index", stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.perf_counter() - started:.1f}s."))
+
+    def get_building_names(self, count):
+        names = list(BuildingCodes.values)
+        names += [f"Building {number}" for number in range(len(names) + 1, count + 1)]
+        return names[:count]
+
+    def seed_rooms(self, building_count, room_count):
+        buildings = self.get_building_names(building_count)
+        layouts = list(RoomLayout.values)
+        rooms = []
+
+        for index in range(room_count):
+            build_name = buildings[index % len(buildings)]
+            r_no = 100 + index // len(buildings)
+            rooms.append(RoomMaster(
+                r_no=r_no,
+                flr_no=(r_no // 100) % 5,
+                build_name=build_name,
+                r_code=f"{r_no}_{build_name}"[:20],
+                code_name=f"{r_no}-{build_name}"[:20],
+                area=random.choice((250, 350, 450, 650)),
+                layout=random.choice(layouts),
+            ))
+
+        rooms = RoomMaster.objects.bulk_create(rooms, batch_size=BATCH_SIZE)
+        MeterDetails.objects.bulk_create(
+            [
+                MeterDetails(r_no=room, meter_no=f"M{self.run_id % 10000}{room.id}"[:12], bu_code=random.randint(1, 999))
+                for room in rooms
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+        self.stdout.write(f"{len(rooms)} rooms in {len(buildings)} buildings")
+        return rooms
+
+    def seed_tenants(self, tenant_count):
+        persons = Person.objects.bulk_create(
+            [
+                Person(
+                    username=f"bench_{self.run_id}_{index}",
+                    f_name=f"Tenant{index}",
+                    l_name=random.choice(("Patil", "Shinde", "Joshi", "Kulkarni", "Deshmukh")),
+                    email=f"bench_{self.run_id}_{index}@example.com",
+                )
+                for index in range(tenant_count)
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+        Contact.objects.bulk_create(
+            [
+                Contact(
+                    person=person,
+                    phn_no=f"7{person.id:09d}"[-10:],
+                    wa_no=f"6{person.id:09d}"[-10:],
+                )
+                for person in persons
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+        self.stdout.write(f"{len(persons)} tenants")
+        return persons
+
+    def seed_allotments(self, rooms, persons, occupancy):
+        today = timezone.localdate()
+        allotments = []
+        active_count = min(int(len(rooms) * occupancy), len(persons))
+
+        # ACTIVE TENANCIES FIRST, REMAINING TENANTS GET PAST ( INACTIVE ) TENANCIES
+        for index, person in enumerate(persons):
+            room = rooms[index % len(rooms)]
+            is_active = index < active_count
+            start_date = today - timedelta(days=random.randint(30, 330) if is_active else random.randint(400, 1500))
+            end_date = start_date + relativedelta(months=11, days=-1)
+
+            allotments.append(RoomAllotment(
+                person=person,
+                room=room,
+                start_date=start_date,
+                end_date=end_date,
+                actual_end_date=None if is_active else end_date,
+                is_active=is_active,
+                # bulk_create SKIPS save(), WHICH SETS THE BUCKET
+                expiry_bucket=get_expiry_bucket(end_date, today) if is_active else None,
+            ))
+
+        allotments = RoomAllotment.objects.bulk_create(allotments, batch_size=BATCH_SIZE)
+        RoomAllotmentExtra.objects.bulk_create(
+            [RoomAllotmentExtra(rm_map=allotment) for allotment in allotments],
+            batch_size=BATCH_SIZE
+        )
+
+        rental_details = []
+        for allotment in allotments:
+            rent = random.choice((4000, 5500, 7000, 9000))
+            rental_details.append(RentalDetails(
+                rm_map=allotment,
+                deposit=rent * 3,
+                rent=rent,
+                maintenance=500,
+                rent_total=rent + 500,
+            ))
+        RentalDetails.objects.bulk_create(rental_details, batch_size=BATCH_SIZE)
+
+        self.stdout.write(f"{len(allotments)} allotments ({active_count} active)")
+        return allotments
+
+    def seed_transactions(self, allotments, transaction_count):
+        modes = list(PaymentModeChoices.values)
+        created = 0
+
+        while created < transaction_count:
+            size = min(BATCH_SIZE, transaction_count - created)
+            Transaction.objects.bulk_create([
+                Transaction(
+                    rm_map=random.choice(allotments),
+                    amount=random.choice((4500, 6000, 7500, 9500)),
+                    is_rent=random.random() < 0.9,
+                    payment_mode=random.choice(modes),
+                )
+                for _ in range(size)
+            ])
+            created += size
+
+        # ts IS auto_now, SPREAD IT OVER PAST MONTHS WITH ONE UPDATE PER MONTH
+        now = timezone.now()
+        for month in range(HISTORY_MONTHS):
+            Transaction.objects.alias(
+                bucket=Mod("id", HISTORY_MONTHS)
+            ).filter(
+                bucket=month
+            ).update(
+                ts=now - relativedelta(months=month, days=random.randint(0, 27))
+            )
+
+        self.stdout.write(f"{created} transactions")
@@ -0,0 +1,80 @@
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from resources.custom_enums import NotificationChannel
+from worker.reminders import (
+    DELIVERY_CHUNK_SIZE,
+    CampaignChannelConflict,
+    create_rent_reminder_campaign,
+    deliver_campaign,
+    deliver_running_campaigns,
+    retry_failed_notices
+)
+
+
+class Command(BaseCommand):
+    help = "Create this month's rent reminder campaign ( one notice per unpaid allotment ) and deliver it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Month to remind about, YYYY-MM. Current month by default.")
+        parser.add_argument("--channel", choices=NotificationChannel.values, help="Defaults to RENT_REMINDER_CHANNEL.")
+        parser.add_argument("--chunk-size", type=int, default=DELIVERY_CHUNK_SIZE, help="Notices per dispatch.")
+        parser.add_argument("--retry-failed", action="store_true", help="Send failed notices again.")
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Only deliver the pending notices of running campaigns ( e.g. created through the API ), run it from cron."
+        )
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            return self.deliver_pending(options["chunk_size"])
+
+        if options["month"]:
+            try:
+                period = datetime.strptime(options["month"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--month must be in YYYY-MM format.")
+        else:
+            period = timezone.localdate().replace(day=1)
+
+        channel = options["channel"] or settings.RENT_REMINDER_CHANNEL
+        started = time.perf_counter()
+
+        try:
+            campaign, added = create_rent_reminder_campaign(period, channel)
+        except CampaignChannelConflict as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            f"Campaign {campaign.id} ({period:%Y-%m}, {campaign.channel}): {added} new notice(s), {campaign.total} in total."
+        )
+
+        if options["retry_failed"]:
+            self.stdout.write(f"{retry_failed_notices(campaign.id)} failed notice(s) queued again.")
+
+        campaign = deliver_campaign(campaign.id, options["chunk_size"], on_progress=self.report_progress)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Campaign {campaign.id} {campaign.status.lower()} in {time.perf_counter() - started:.1f}s: "
+            f"{campaign.sent} sent, {campaign.failed} failed."
+        ))
+
+    def deliver_pending(self, chunk_size):
+        started = time.perf_counter()
+        campaigns = deliver_running_campaigns(chunk_size, on_progress=self.report_progress)
+
+        for campaign in campaigns:
+            self.stdout.write(
+                f"Campaign {campaign.id} {campaign.status.lower()}: {campaign.sent} sent, {campaign.failed} failed."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(campaigns)} campaign(s) delivered in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def report_progress(self, campaign):
+        done = campaign.sent + campaign.failed
+        self.stdout.write(f"  {done}/{campaign.total} ({campaign.sent} sent, {campaign.failed} failed)")
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from worker.expiry import sweep_lease_expiry
+
+
+class Command(BaseCommand):
+    help = "Daily ( cron ): move active allotments into their lease expiry bucket and raise notices for expired leases."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Sweep as of this date, YYYY-MM-DD. Today by default.")
+
+    def handle(self, *args, **options):
+        today = None
+        if options["date"]:
+            try:
+                today = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format.")
+
+        result = sweep_lease_expiry(today)
+
+        buckets = ", ".join(f"{name}: {count}" for name, count in sorted(result["buckets"].items())) or "none"
+        self.stdout.write(self.style.SUCCESS(
+            f"Lease expiry as of {result['as_of']}: {result['changed']} allotment(s) moved ({buckets}), "
+            f"{result['expired']} newly expired."
+        ))
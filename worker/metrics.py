@@ -0,0 +1,160 @@
+import bisect
+import threading
+import time
+
+from django.db import connection
+from django.http import HttpResponse
+
+from worker.response_cache import counters as response_cache_counters
+
+# REQUEST LATENCY BUCKETS, SECONDS
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class ViewSeries:
+    __slots__ = ("requests", "buckets", "duration_sum", "queries", "sql_seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+class MetricsRegistry:
+    """
+    In-process request / SQL metrics per (view, route, method).
+    Each worker process keeps its own registry, scrape every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, duration, queries, sql_seconds):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ViewSeries()
+
+            series.requests += 1
+            series.buckets[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            series.duration_sum += duration
+            series.queries += queries
+            series.sql_seconds += sql_seconds
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def render(self):
+        with self._lock:
+            snapshot = [
+                (labels, series.requests, list(series.buckets), series.duration_sum,
+                 series.queries, series.sql_seconds)
+                for labels, series in sorted(self._series.items())
+            ]
+
+        requests, histogram, queries, sql_time = [], [], [], []
+
+        for labels, count, buckets, duration_sum, query_count, sql_seconds in snapshot:
+            label_text = format_labels(labels)
+
+            requests.append(f"rent_manager_http_requests_total{{{label_text}}} {count}")
+            queries.append(f"rent_manager_db_queries_total{{{label_text}}} {query_count}")
+            sql_time.append(f"rent_manager_db_query_seconds_total{{{label_text}}} {sql_seconds:.6f}")
+
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket_count
+                histogram.append(
+                    f'rent_manager_http_request_duration_seconds_bucket{{{label_text},le="{bound}"}} {cumulative}'
+                )
+            histogram.append(f'rent_manager_http_request_duration_seconds_bucket{{{label_text},le="+Inf"}} {count}')
+            histogram.append(f"rent_manager_http_request_duration_seconds_sum{{{label_text}}} {duration_sum:.6f}")
+            histogram.append(f"rent_manager_http_request_duration_seconds_count{{{label_text}}} {count}")
+
+        lines = [
+            "# HELP rent_manager_http_requests_total Requests handled, per resolved URL name.",
+            "# TYPE rent_manager_http_requests_total counter",
+            *requests,
+            "# HELP rent_manager_http_request_duration_seconds Request latency, per resolved URL name.",
+            "# TYPE rent_manager_http_request_duration_seconds histogram",
+            *histogram,
+            "# HELP rent_manager_db_queries_total SQL queries issued, per resolved URL name.",
+            "# TYPE rent_manager_db_queries_total counter",
+            *queries,
+            "# HELP rent_manager_db_query_seconds_total Time spent in SQL, per resolved URL name.",
+            "# TYPE rent_manager_db_query_seconds_total counter",
+            *sql_time,
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    view, route, method = labels
+    return f'view="{escape_label(view)}",route="{escape_label(route)}",method="{escape_label(method)}"'
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """
+    DB execute wrapper counting queries and SQL time, no DEBUG cursor needed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, SQL query count and SQL time for every request,
+    labelled with the resolved URL name and route.
+    Bodies of streaming responses are produced after this returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            labels = (match.view_name or match._func_path, match.route, request.method)
+        else:
+            labels = ("unresolved", "", request.method)
+
+        registry.observe(labels, duration, counter.count, counter.seconds)
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(
+        registry.render() + response_cache_counters.render(),
+        content_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -1,7 +1,9 @@
-import random
-from django.db import models
+from collections import defaultdict
+
+from django.db import connection, models, transaction
+from django.db.models import F, Q
 from dateutil.relativedelta import relativedelta
-from django.utils.timezone import now
+from django.utils.timezone import now, localdate
 from resources.constant import ElectricityConsumer
 from resources.custom_enums import (
     RoleChoices,
@@ -9,12 +11,24 @@ from resources.custom_enums import (
     BuildingCodes,
     PaymentModeChoices,
     NoticeType,
-    RoomLayout
+    RoomLayout,
+    OutboxKind,
+    OutboxStatus,
+    NoticeStatus,
+    NotificationChannel,
+    CampaignStatus,
+    ExpiryBucket,
+    SearchTokenKind
 )
 from resources.person_doc_file_name_generator import (
     aadhaar_upload_path,
     pan_upload_path
 )
+from resources.search_tokens import (
+    SEARCH_SOURCE_FIELDS,
+    TOKEN_MAX_LENGTH,
+    build_search_tokens
+)
 
 
 class Person(models.Model):
@@ -37,6 +51,32 @@ class Person(models.Model):
     def get_full_name(self):
         return f"{self.f_name} {self.m_name} {self.l_name}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            reindex_person_search(self.pk)
+
+            # NAME / EMAIL ARE PART OF THE ALLOTMENT LISTING PER BUILDING
+            bump_building_versions(
+                self.room_allotments.filter(is_active=True).values_list("room__build_name", flat=True)
+            )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # CASCADED ALLOTMENTS SKIP RoomAllotment.delete, RELEASE THEIR ROOMS HERE
+            active_rooms = list(
+                self.room_allotments.filter(is_active=True).values_list("room__build_name", "room__layout")
+            )
+            result = super().delete(*args, **kwargs)
+
+            for build_name, layout in active_rooms:
+                update_room_occupancy(build_name, layout, occupied=-1)
+
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_building_versions(build_name for build_name, _ in active_rooms)
+
+        return result
+
 
 class Contact(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -49,6 +89,18 @@ class Contact(models.Model):
         db_table = "contact"
         managed = True
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            reindex_person_search(self.person_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            reindex_person_search(self.person_id)
+
+        return result
+
 
 class Address(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -75,6 +127,36 @@ class Docs(models.Model):
         db_table = "docs"
         managed = True
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            reindex_person_search(self.person_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            reindex_person_search(self.person_id)
+
+        return result
+
+
+class PersonSearchToken(models.Model):
+    """
+    Normalized search index ( worker.search ), rebuilt per person on save of Person / Contact / Docs.
+    """
+    id = models.BigAutoField(primary_key=True)
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name="search_tokens")
+    kind = models.CharField(max_length=10, choices=SearchTokenKind.choices)
+    token = models.CharField(max_length=TOKEN_MAX_LENGTH)
+
+    class Meta:
+        db_table = "person_search_token"
+        managed = True
+        indexes = [
+            # EXACT / PREFIX RANGE ON token, kind AND person READ FROM THE INDEX ITSELF
+            models.Index(fields=["token", "kind", "person"], name="person_search_token_idx"),
+        ]
+
 
 class RoomMaster(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -90,6 +172,9 @@ class RoomMaster(models.Model):
     class Meta:
         db_table = "room_master"
         managed = True
+        indexes = [
+            models.Index(fields=["build_name", "layout"], name="room_master_build_layout_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         # ALWAYS GENERATE ROOM CODE
@@ -117,7 +202,56 @@ class RoomMaster(models.Model):
                 floor=str(self.flr_no),
             )
 
-        super().save(*args, **kwargs)
+        is_new = self._state.adding
+        old_key = self.get_loaded_occupancy_key()
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # KEEP OCCUPANCY SUMMARY IN SYNC
+            new_key = (self.build_name, self.layout)
+            if is_new:
+                update_room_occupancy(*new_key, total=1)
+            elif old_key != new_key:
+                occupied = 1 if self.status else 0
+                update_room_occupancy(*old_key, total=-1, occupied=-occupied)
+                update_room_occupancy(*new_key, total=1, occupied=occupied)
+
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_building_versions([self.build_name] + ([old_key[0]] if old_key else []))
+
+        self._loaded_values = {"build_name": self.build_name, "layout": self.layout}
+
+    def delete(self, *args, **kwargs):
+        key = self.get_loaded_occupancy_key()
+
+        with transaction.atomic():
+            occupied = 1 if self.status else 0
+            result = super().delete(*args, **kwargs)
+            update_room_occupancy(*key, total=-1, occupied=-occupied)
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_building_versions([key[0]])
+
+        return result
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_occupancy_key(self):
+        """
+        (build_name, layout) as currently stored in the DB.
+        """
+        if self._state.adding:
+            return None
+
+        loaded = getattr(self, "_loaded_values", {})
+        if "build_name" in loaded and "layout" in loaded:
+            return loaded["build_name"], loaded["layout"]
+
+        return RoomMaster.objects.filter(pk=self.pk).values_list("build_name", "layout").first()
 
     def __str__(self):
         return f"R-{self.r_code}"
@@ -144,6 +278,22 @@ class MeterDetails(models.Model):
     def __str__(self):
         return self.meter_no
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_room_building_versions([self.r_no_id])
+
+    def delete(self, *args, **kwargs):
+        room_id = self.r_no_id
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_room_building_versions([room_id])
+
+        return result
+
 
 class RoomAllotment(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -153,6 +303,8 @@ class RoomAllotment(models.Model):
     end_date = models.DateField()
     actual_end_date = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=False)
+    # SET ON SAVE, MOVED ALONG DAILY BY `manage.py sweep_lease_expiry`, NULL WHEN NOT EXPIRING SOON
+    expiry_bucket = models.CharField(max_length=20, choices=ExpiryBucket.choices, null=True, blank=True)
     ts = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -160,6 +312,14 @@ class RoomAllotment(models.Model):
         managed = True
         indexes = [
             models.Index(fields=["room", "is_active"]),
+            # PersonSerializer.get_is_active
+            models.Index(fields=["person", "is_active"], name="room_allot_person_active_idx"),
+            # RoomAllotmentExpiryAPIView, ONLY ROWS IN AN EXPIRY BUCKET ARE INDEXED
+            models.Index(
+                fields=["expiry_bucket", "end_date"],
+                condition=Q(is_active=True, expiry_bucket__isnull=False),
+                name="room_allot_expiry_bucket_idx"
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -170,10 +330,57 @@ class RoomAllotment(models.Model):
             # ROOM ALLOTTED
             self.is_active = True
 
-        super().save(*args, **kwargs)
+        self.expiry_bucket = get_expiry_bucket(self.end_date) if self.is_active else None
+
+        was_active, old_room_id = self.get_loaded_occupancy_state()
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if is_new:
+                RoomAllotmentExtra.objects.get_or_create(rm_map=self)
+
+            # KEEP OCCUPANCY SUMMARY IN SYNC
+            if was_active and (not self.is_active or old_room_id != self.room_id):
+                update_room_occupancy(*get_room_occupancy_key(old_room_id), occupied=-1)
+            if self.is_active and (not was_active or old_room_id != self.room_id):
+                update_room_occupancy(self.room.build_name, self.room.layout, occupied=1)
 
-        if is_new:
-            RoomAllotmentExtra.objects.get_or_create(rm_map=self)
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_room_building_versions([old_room_id, self.room_id])
+
+        self._loaded_values = {"is_active": self.is_active, "room_id": self.room_id}
+
+    def delete(self, *args, **kwargs):
+        was_active, room_id = self.get_loaded_occupancy_state()
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if was_active:
+                update_room_occupancy(*get_room_occupancy_key(room_id), occupied=-1)
+            bump_resource_version(ROOM_MASTER_VERSION)
+            bump_room_building_versions([room_id])
+
+        return result
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_occupancy_state(self):
+        """
+        (is_active, room_id) as currently stored in the DB.
+        """
+        if self._state.adding:
+            return False, None
+
+        loaded = getattr(self, "_loaded_values", {})
+        if "is_active" in loaded and "room_id" in loaded:
+            return loaded["is_active"], loaded["room_id"]
+
+        return RoomAllotment.objects.filter(pk=self.pk).values_list("is_active", "room_id").first()
 
 
 class RoomAllotmentExtra(models.Model):
@@ -215,10 +422,55 @@ class RentalDetails(models.Model):
         super().save(*args, **kwargs)
 
 
+class DeAllotmentStatement(models.Model):
+    """
+    Settlement snapshot taken when an allotment is de-allotted ( worker.settlements ).
+    """
+    id = models.BigAutoField(primary_key=True)
+    rm_map = models.OneToOneField(RoomAllotment, on_delete=models.CASCADE, related_name="statement")
+    as_of = models.DateField()
+    deposit = models.IntegerField(default=0)
+    rent_total = models.IntegerField(default=0)
+    billed_months = models.PositiveIntegerField(default=0)
+    expected_rent = models.IntegerField(default=0)
+    rent_paid = models.IntegerField(default=0)
+    other_paid = models.IntegerField(default=0)
+    amount_due = models.IntegerField(default=0)
+    refundable = models.IntegerField(default=0)
+    # RoomAllotmentExtra CHECKLIST, NULL WHEN IT WAS NEVER FILLED
+    agg_available = models.BooleanField(null=True)
+    is_painted = models.BooleanField(null=True)
+    is_water_tank = models.BooleanField(null=True)
+    is_grill = models.BooleanField(null=True)
+    is_ele_bill_clear = models.BooleanField(null=True)
+    # NUMBERED TRANSACTION LINES, OLDEST FIRST
+    transactions = models.JSONField(default=list)
+    ts = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "de_allotment_statement"
+        managed = True
+
+
+class TransactionQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # NUMBER ALL NEW ROWS WITH ONE SEQUENCE ALLOCATION PER BUILDING
+        objs = list(objs)
+
+        with transaction.atomic(using=self.db):
+            rooms = get_transaction_rooms(objs)
+            assign_transaction_numbers([obj for obj in objs if not obj.tnx_no], rooms)
+            created = super().bulk_create(objs, *args, **kwargs)
+            bump_building_versions(build_name for build_name, _ in rooms.values())
+
+        return created
+
+
 class Transaction(models.Model):
     id = models.BigAutoField(primary_key=True)
-    tnx_no = models.CharField(max_length=20, unique=True)
-    rm_map = models.ForeignKey(RoomAllotment, on_delete=models.CASCADE, related_name="transactions")
+    tnx_no = models.CharField(max_length=40, unique=True)
+    # NO SEPARATE FK INDEX, transaction_rm_rent_ts_idx STARTS WITH rm_map
+    rm_map = models.ForeignKey(RoomAllotment, on_delete=models.CASCADE, related_name="transactions", db_index=False)
     amount = models.IntegerField()
     is_rent = models.BooleanField(default=False)
     payment_mode = models.CharField(max_length=30, choices=PaymentModeChoices.choices, default=PaymentModeChoices.CASH)
@@ -233,15 +485,68 @@ class Transaction(models.Model):
     class Meta:
         db_table = "transaction"
         managed = True
+        indexes = [
+            # UNPAID RENT: rm_map = ? AND is_rent AND ts IN [month start, next month start)
+            models.Index(fields=["rm_map", "is_rent", "ts"], name="transaction_rm_rent_ts_idx"),
+        ]
+
+    objects = TransactionQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
-        self.tnx_no = (
-            f"TXN_{now().strftime('%d%m%Y%H%M%S')}"
-            f"_{get_building_code(self.rm_map.room.build_name)}"
-            f"_{self.rm_map.room.r_no}"
-            f"_{random.randint(1000, 9999)}"
-        )
-        super().save(*args, **kwargs)
+        # ONE ROOM LOOKUP FOR THE NUMBER AND THE BUILDING VERSION
+        rooms = get_transaction_rooms([self])
+
+        # NUMBER IS FIXED AT CREATION, UPDATES KEEP IT
+        with transaction.atomic():
+            if self._state.adding:
+                assign_transaction_numbers([self], rooms)
+
+            super().save(*args, **kwargs)
+            bump_building_versions(build_name for build_name, _ in rooms.values())
+
+    def delete(self, *args, **kwargs):
+        rooms = get_transaction_rooms([self])
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            bump_building_versions(build_name for build_name, _ in rooms.values())
+
+        return result
+
+
+class TransactionSequence(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    build_code = models.CharField(max_length=5)
+    day = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "transaction_sequence"
+        managed = True
+        constraints = [
+            models.UniqueConstraint(fields=["build_code", "day"], name="transaction_sequence_build_day_uniq"),
+        ]
+
+
+class NoticeCampaign(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    code = models.CharField(max_length=20, choices=NoticeType.choices)
+    period = models.DateField()
+    channel = models.CharField(max_length=20, choices=NotificationChannel.choices)
+    status = models.CharField(max_length=20, choices=CampaignStatus.choices, default=CampaignStatus.RUNNING)
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    ts = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "notice_campaign"
+        managed = True
+        constraints = [
+            # ONE CAMPAIGN PER NOTICE TYPE PER MONTH
+            models.UniqueConstraint(fields=["code", "period"], name="notice_campaign_code_period_uniq"),
+        ]
 
 
 class Notice(models.Model):
@@ -249,11 +554,288 @@ class Notice(models.Model):
     rm_map = models.ForeignKey(RoomAllotment, on_delete=models.CASCADE, related_name="notice")
     code = models.CharField(max_length=20, choices=NoticeType.choices, default=NoticeType.OTHER)
     desc = models.CharField(max_length=255, null=True, blank=True)
+    campaign = models.ForeignKey(
+        NoticeCampaign,
+        on_delete=models.SET_NULL,
+        related_name="notices",
+        null=True,
+        blank=True
+    )
+    # MONTH THE NOTICE IS ABOUT ( FIRST DAY ), SET FOR PERIODIC NOTICES
+    period = models.DateField(null=True, blank=True)
+    # LEASE END THE NOTICE IS ABOUT, SET FOR LEASE_EXPIRY NOTICES
+    lease_end_date = models.DateField(null=True, blank=True)
+    channel = models.CharField(max_length=20, choices=NotificationChannel.choices, null=True, blank=True)
+    recipient = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=NoticeStatus.choices, default=NoticeStatus.PENDING)
+    error = models.TextField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
     ts = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "notice"
         managed = True
+        constraints = [
+            # IDEMPOTENT PERIODIC NOTICES: ONE PER ALLOTMENT, TYPE AND MONTH ( NULL period IS NOT CONSTRAINED )
+            models.UniqueConstraint(fields=["rm_map", "code", "period"], name="notice_allotment_code_period_uniq"),
+            # ONE LEASE_EXPIRY NOTICE PER LEASE END
+            models.UniqueConstraint(fields=["rm_map", "code", "lease_end_date"], name="notice_allotment_code_lease_end_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["campaign", "status"]),
+        ]
+
+
+class EmailOutbox(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=30, choices=OutboxKind.choices)
+    object_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    ts = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "email_outbox"
+        managed = True
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} ({self.status})"
+
+
+class RoomOccupancy(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    build_name = models.CharField(max_length=50, choices=BuildingCodes.choices)
+    layout = models.CharField(max_length=255, choices=RoomLayout.choices, blank=True, default="")
+    total_rooms = models.IntegerField(default=0)
+    occupied_rooms = models.IntegerField(default=0)
+    vacant_rooms = models.IntegerField(default=0)
+    ts = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "room_occupancy"
+        managed = True
+        constraints = [
+            models.UniqueConstraint(fields=["build_name", "layout"], name="room_occupancy_build_layout_uniq"),
+        ]
+
+
+class ResourceVersion(models.Model):
+    """
+    Counter bumped whenever the data behind a cached representation changes.
+    Used to derive ETags without reading the data itself.
+    """
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    ts = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "resource_version"
+        managed = True
+
+
+# RoomMasterSerializer OUTPUT: ROOM, METER AND ACTIVE ALLOTMENT
+ROOM_MASTER_VERSION = "room_master"
+
+
+def bump_resource_version(key):
+    """
+    Must run inside the transaction that changed the data,
+    so readers never see new data with an old version.
+    """
+    increment_counter(ResourceVersion, {"key": key}, "version", ts=now())
+
+
+def get_resource_version(key):
+    return ResourceVersion.objects.filter(key=key).values_list("version", flat=True).first() or 0
+
+
+def get_building_version_key(build_name):
+    return f"building:{build_name}"
+
+
+def bump_building_versions(build_names):
+    """
+    Bump the per-building data version of every building in `build_names`.
+    Sorted, so concurrent writers lock the counter rows in the same order.
+    """
+    for build_name in sorted(set(build_names)):
+        bump_resource_version(get_building_version_key(build_name))
+
+
+def bump_room_building_versions(room_ids):
+    room_ids = {room_id for room_id in room_ids if room_id is not None}
+    if room_ids:
+        bump_building_versions(
+            RoomMaster.objects.filter(pk__in=room_ids).values_list("build_name", flat=True)
+        )
+
+
+def get_building_version(build_name):
+    return get_resource_version(get_building_version_key(build_name))
+
+
+def get_search_tokens(rows):
+    return [
+        PersonSearchToken(person_id=row["id"], kind=kind, token=token)
+        for row in rows
+        for kind, token in build_search_tokens(row)
+    ]
+
+
+def reindex_person_search(person_id):
+    """
+    Replace one person's search tokens from one joined query.
+    Must run inside the transaction that changed the person / contact / docs.
+    """
+    rows = Person.objects.filter(pk=person_id).values(*SEARCH_SOURCE_FIELDS)
+
+    PersonSearchToken.objects.filter(person_id=person_id).delete()
+    PersonSearchToken.objects.bulk_create(get_search_tokens(rows))
+
+
+def get_expiry_bucket(end_date, today=None):
+    """
+    ExpiryBucket of a lease ending on `end_date`, None if it ends more than 30 days out.
+    Same rules as worker.expiry.expiry_bucket_case.
+    """
+    days_left = (end_date - (today or localdate())).days
+
+    if days_left < 0:
+        return ExpiryBucket.EXPIRED
+    if days_left == 0:
+        return ExpiryBucket.TODAY
+    if days_left <= 7:
+        return ExpiryBucket.WEEK
+    if days_left <= 30:
+        return ExpiryBucket.MONTH
+    return None
+
+
+def update_room_occupancy(build_name, layout, total=0, occupied=0):
+    """
+    Apply a delta to the (building, layout) occupancy row.
+    Must run inside the transaction that changed the room / allotment.
+    """
+    if not total and not occupied:
+        return
+
+    row, _ = RoomOccupancy.objects.get_or_create(build_name=build_name, layout=layout or "")
+    RoomOccupancy.objects.filter(pk=row.pk).update(
+        total_rooms=F("total_rooms") + total,
+        occupied_rooms=F("occupied_rooms") + occupied,
+        vacant_rooms=F("vacant_rooms") + total - occupied,
+    )
+
+
+def get_room_occupancy_key(room_id):
+    return RoomMaster.objects.filter(pk=room_id).values_list("build_name", "layout").get()
+
+
+# BACKENDS WITH INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+UPSERT_VENDORS = ("postgresql", "sqlite")
+
+
+def increment_counter(model, keys, field, count=1, **defaults):
+    """
+    Add `count` to `field` of the `model` row matching `keys` ( a unique constraint ),
+    creating the row with `defaults` first if needed. Returns the new value.
+    - postgres / sqlite : one INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+    - others            : get_or_create + UPDATE + SELECT
+    The row stays locked until the caller's transaction ends.
+    """
+    if connection.vendor not in UPSERT_VENDORS:
+        with transaction.atomic():
+            model.objects.get_or_create(**keys, defaults=defaults)
+
+            counter = model.objects.filter(**keys)
+            counter.update(**{field: F(field) + count})
+            return counter.values_list(field, flat=True).get()
+
+    opts = model._meta
+    quote = connection.ops.quote_name
+    values = {**keys, **defaults, field: count}
+    fields = [opts.get_field(name) for name in values]
+
+    table = quote(opts.db_table)
+    column = quote(opts.get_field(field).column)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(item.column) for item in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({', '.join(quote(opts.get_field(name).column) for name in keys)}) "
+        f"DO UPDATE SET {column} = {table}.{column} + EXCLUDED.{column} "
+        f"RETURNING {column}"
+    )
+    params = [item.get_db_prep_save(values[item.name], connection) for item in fields]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+
+
+def allocate_transaction_sequence(build_code, day, count=1):
+    """
+    Atomically reserve `count` consecutive numbers for (building, day), one upsert.
+    Returns the first one. The counter row stays locked until the caller's
+    transaction ends, so concurrent payments never share a number.
+    """
+    last_value = increment_counter(TransactionSequence, {"build_code": build_code, "day": day}, "last_value", count)
+    return last_value - count + 1
+
+
+def get_transaction_rooms(transactions):
+    """
+    {rm_map_id: (build_name, r_no)}, from cached relations when present,
+    otherwise with one joined query for all missing allotments.
+    """
+    rooms = {}
+    for obj in transactions:
+        if Transaction.rm_map.is_cached(obj) and RoomAllotment.room.is_cached(obj.rm_map):
+            rooms[obj.rm_map_id] = (obj.rm_map.room.build_name, obj.rm_map.room.r_no)
+
+    missing = {obj.rm_map_id for obj in transactions} - rooms.keys()
+    if missing:
+        rooms.update(
+            (rm_map_id, (build_name, r_no))
+            for rm_map_id, build_name, r_no in RoomAllotment.objects.filter(
+                id__in=missing
+            ).values_list("id", "room__build_name", "room__r_no")
+        )
+
+    return rooms
+
+
+def assign_transaction_numbers(transactions, rooms=None):
+    """
+    Set tnx_no as TXN_<ddmmyyyy>_<bldg>_<room>_<seq>, where seq is a
+    per-building, per-day counter allocated in the DB.
+    `rooms` is get_transaction_rooms of the transactions when the caller already has it.
+    """
+    if not transactions:
+        return
+
+    if rooms is None:
+        rooms = get_transaction_rooms(transactions)
+    day = localdate()
+
+    by_building = defaultdict(list)
+    for obj in transactions:
+        build_name, r_no = rooms[obj.rm_map_id]
+        by_building[get_building_code(build_name)].append((obj, r_no))
+
+    for build_code, items in by_building.items():
+        first = allocate_transaction_sequence(build_code, day, len(items))
+
+        for seq, (obj, r_no) in enumerate(items, first):
+            obj.tnx_no = f"TXN_{day.strftime('%d%m%Y')}_{build_code}_{r_no}_{seq:04d}"
 
 
 def get_building_code(_building_name):
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.message import make_msgid
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TWILIO_MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+
+
+class Notification:
+    """
+    One message to one recipient. `reference` is echoed back in the result
+    so callers can match results to their own rows ( e.g. a Notice id ).
+    """
+    __slots__ = ("channel", "to", "body", "subject", "html", "reference")
+
+    def __init__(self, channel, to, body, subject=None, html=None, reference=None):
+        self.channel = channel
+        self.to = to
+        self.body = body
+        self.subject = subject
+        self.html = html
+        self.reference = reference
+
+
+class NotificationBackend:
+    """
+    Sends one notification at a time, synchronously.
+    - open() / close() wrap a whole dispatch, so clients are created once and reused
+    - send() may be called from several threads at once
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send(self, notification):
+        """
+        Returns the provider's message id, raises on failure.
+        """
+        raise NotImplementedError
+
+
+class EmailNotificationBackend(NotificationBackend):
+    """
+    Django email, one SMTP connection per dispatcher thread for the whole dispatch.
+    """
+
+    def open(self):
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Could not close email connection")
+
+    def get_thread_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # OPENED HERE, AN UNOPENED CONNECTION WOULD LOG IN AND OUT FOR EVERY MESSAGE
+            connection = get_connection()
+            connection.open()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def drop_thread_connection(self):
+        # THE THREAD'S NEXT SEND OPENS A NEW SESSION, close() STILL CLOSES THE OLD ONE
+        self._local.connection = None
+
+    def send(self, notification):
+        message_id = make_msgid()
+        email = EmailMultiAlternatives(
+            subject=notification.subject or "",
+            body=notification.body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[notification.to],
+            connection=self.get_thread_connection(),
+            headers={"Message-ID": message_id},
+        )
+        if notification.html:
+            email.attach_alternative(notification.html, "text/html")
+
+        try:
+            email.send()
+        except Exception:
+            self.drop_thread_connection()
+            raise
+        return message_id
+
+
+class TwilioWhatsAppBackend(NotificationBackend):
+    """
+    WhatsApp through the Twilio REST API over one pooled HTTP session,
+    no Twilio SDK needed.
+    """
+
+    def open(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        pool_size = settings.NOTIFICATION_CONCURRENCY
+        self.session = requests.Session()
+        self.session.auth = (settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.url = TWILIO_MESSAGES_URL.format(sid=settings.TWILIO_ACCOUNT_SID)
+
+    def close(self):
+        self.session.close()
+
+    def send(self, notification):
+        response = self.session.post(
+            self.url,
+            data={
+                "From": settings.TWILIO_WHATSAPP_FROM,
+                "To": f"whatsapp:{notification.to}",
+                "Body": notification.body,
+            },
+            timeout=self.options.get("timeout", 10),
+        )
+        response.raise_for_status()
+        return response.json()["sid"]
+
+
+class FileNotificationBackend(NotificationBackend):
+    """
+    Offline stub: one JSON line per notification, to NOTIFICATION_FILE_PATH or stdout.
+    """
+
+    def open(self):
+        self._lock = threading.Lock()
+        self._counter = 0
+        path = self.options.get("path", settings.NOTIFICATION_FILE_PATH)
+        self.stream = open(path, "a", encoding="utf-8") if path else sys.stdout
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+    def send(self, notification):
+        with self._lock:
+            self._counter += 1
+            message_id = f"stub-{self._counter}"
+            self.stream.write(json.dumps({
+                "id": message_id,
+                "ts": timezone.now().isoformat(),
+                "channel": notification.channel,
+                "to": notification.to,
+                "subject": notification.subject,
+                "body": notification.body,
+                "reference": notification.reference,
+            }, ensure_ascii=False) + "\n")
+            self.stream.flush()
+        return message_id
+
+
+def get_backend(channel):
+    """
+    Instantiate the backend configured for `channel` in NOTIFICATION_BACKENDS.
+    Imported on first use, so an unused provider's dependencies are never loaded.
+    """
+    try:
+        config = settings.NOTIFICATION_BACKENDS[channel]
+    except KeyError:
+        raise ValueError(f"No notification backend configured for {channel!r}")
+
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+def get_rate_limit(channel):
+    return settings.NOTIFICATION_BACKENDS[channel].get("RATE_LIMIT")
+
+
+class RateLimiter:
+    """
+    Spaces sends on one provider at most `rate` per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            wait = self.next_at - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.next_at = max(self.next_at, loop.time()) + self.interval
+
+
+async def dispatch(notifications, concurrency=None, on_result=None):
+    """
+    Send `notifications` concurrently.
+    - at most `concurrency` sends in flight ( NOTIFICATION_CONCURRENCY by default )
+    - each channel is rate limited on its own ( RATE_LIMIT per second )
+    - a failed send is reported in its result, it never stops the others
+    Returns one result dict per notification, in input order.
+    """
+    concurrency = concurrency or settings.NOTIFICATION_CONCURRENCY
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    backends, limiters = {}, {}
+
+    async def send_one(notification):
+        async with semaphore:
+            await limiters[notification.channel].acquire()
+
+            result = {
+                "reference": notification.reference,
+                "channel": notification.channel,
+                "to": notification.to,
+            }
+            try:
+                result["message_id"] = await loop.run_in_executor(
+                    executor, backends[notification.channel].send, notification
+                )
+                result["status"] = "sent"
+            except Exception as exc:
+                logger.warning("Notification to %s failed: %s", notification.to, exc)
+                result["status"] = "failed"
+                result["error"] = f"{exc.__class__.__name__}: {exc}"[:500]
+
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    try:
+        for notification in notifications:
+            if notification.channel not in backends:
+                backend = get_backend(notification.channel)
+                backend.open()
+                backends[notification.channel] = backend
+                limiters[notification.channel] = RateLimiter(get_rate_limit(notification.channel))
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="notify") as executor:
+            return await asyncio.gather(*[send_one(notification) for notification in notifications])
+    finally:
+        for backend in backends.values():
+            backend.close()
+
+
+def send_notifications(notifications, concurrency=None, on_result=None):
+    """
+    Synchronous entry point for views and management commands.
+    """
+    return asyncio.run(dispatch(list(notifications), concurrency, on_result))
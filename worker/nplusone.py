@@ -0,0 +1,160 @@
+import logging
+import os
+import random
+import re
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape: literals and IN lists collapsed,
+    so the same query with different parameters compares equal.
+    """
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER_LITERAL.sub("?", sql)
+    sql = IN_LIST.sub("IN (...)", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+def is_project_file(file_name):
+    return (
+        file_name.startswith(PROJECT_ROOT)
+        and "site-packages" not in file_name
+        and file_name != __file__
+    )
+
+
+def find_query_origin():
+    """
+    Name the code that issued the current query:
+    - the serializer field being rendered, when inside DRF to_representation
+    - otherwise the innermost frame from this project
+    """
+    frame = sys._getframe(2)
+    project_frame = None
+
+    while frame is not None:
+        code = frame.f_code
+
+        if code.co_name == "to_representation" and "field" in frame.f_locals:
+            serializer = frame.f_locals.get("self")
+            field = frame.f_locals["field"]
+            return f"{serializer.__class__.__name__}.{getattr(field, 'field_name', field)}"
+
+        if project_frame is None and is_project_file(code.co_filename):
+            project_frame = f"{os.path.relpath(code.co_filename, PROJECT_ROOT)}:{frame.f_lineno} in {code.co_name}"
+
+        frame = frame.f_back
+
+    return project_frame or "unknown"
+
+
+class QueryShapeCounter:
+    """
+    DB execute wrapper counting SELECTs per normalized shape.
+    The issuing stack is inspected once per shape, on its first repeat.
+    """
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == "SELECT":
+            shape = normalize_sql(sql)
+            self.shapes[shape] += 1
+
+            if self.shapes[shape] == 2:
+                self.origins[shape] = find_query_origin()
+
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return [
+            {"count": count, "origin": self.origins.get(shape, "unknown"), "sql": shape}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def format_report(label, repeated):
+    lines = [f"N+1 queries in {label}:"]
+    for item in repeated:
+        lines.append(f"  {item['count']}x from {item['origin']}: {item['sql'][:300]}")
+    return "\n".join(lines)
+
+
+class detect_n_plus_one:
+    """
+    Context manager for tests: raise NPlusOneError if any SELECT shape
+    runs `threshold` times or more inside the block.
+    """
+
+    def __init__(self, threshold=None, label="block"):
+        self.threshold = threshold or settings.NPLUSONE_THRESHOLD
+        self.label = label
+        self.counter = QueryShapeCounter()
+
+    def __enter__(self):
+        self.wrapper = connection.execute_wrapper(self.counter)
+        self.wrapper.__enter__()
+        return self.counter
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wrapper.__exit__(exc_type, exc_value, traceback)
+
+        if exc_type is None:
+            repeated = self.counter.repeated(self.threshold)
+            if repeated:
+                raise NPlusOneError(format_report(self.label, repeated))
+        return False
+
+
+class NPlusOneMiddleware:
+    """
+    Flags requests that repeat one query shape NPLUSONE_THRESHOLD times or more.
+    - NPLUSONE_RAISE=True ( tests ) : every request is checked, NPlusOneError is raised
+    - otherwise a sample of NPLUSONE_SAMPLE_RATE requests is checked and logged as a warning
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        strict = settings.NPLUSONE_RAISE
+
+        if not strict and random.random() >= settings.NPLUSONE_SAMPLE_RATE:
+            return self.get_response(request)
+
+        counter = QueryShapeCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        repeated = counter.repeated(settings.NPLUSONE_THRESHOLD)
+        if repeated:
+            match = getattr(request, "resolver_match", None)
+            label = f"{request.method} {match.view_name if match else request.path}"
+            report = format_report(label, repeated)
+
+            if strict:
+                raise NPlusOneError(report)
+            logger.warning(report)
+
+        return response
@@ -0,0 +1,122 @@
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from resources.custom_enums import OutboxKind, OutboxStatus
+from resources.send_transaction_email import (
+    build_transaction_email_by_id,
+    build_de_allotment_email_by_id,
+    send_email_batch
+)
+from worker.models import EmailOutbox
+
+OUTBOX_BUILDERS = {
+    OutboxKind.TRANSACTION_RECEIPT: build_transaction_email_by_id,
+    OutboxKind.DE_ALLOTMENT_SUMMARY: build_de_allotment_email_by_id,
+}
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+STALE_LOCK_AFTER = timedelta(minutes=10)
+
+
+def enqueue_email(kind, object_id):
+    """
+    Queue an email in the caller's DB transaction.
+    The worker only sees the row once that transaction commits,
+    and the job survives process restarts.
+    """
+    return EmailOutbox.objects.create(kind=kind, object_id=object_id)
+
+
+def claim_jobs(limit):
+    """
+    Lock and mark up to `limit` due jobs as processing.
+    Jobs left processing by a crashed worker are picked up again after STALE_LOCK_AFTER.
+    """
+    current = timezone.now()
+
+    with transaction.atomic():
+        jobs = list(
+            EmailOutbox.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                Q(status=OutboxStatus.PENDING, next_attempt_at__lte=current) |
+                Q(status=OutboxStatus.PROCESSING, locked_at__lt=current - STALE_LOCK_AFTER)
+            ).order_by(
+                "next_attempt_at",
+                "id"
+            )[:limit]
+        )
+
+        EmailOutbox.objects.filter(
+            id__in=[job.id for job in jobs]
+        ).update(
+            status=OutboxStatus.PROCESSING,
+            locked_at=current
+        )
+
+    return jobs
+
+
+def get_backoff(attempts):
+    # EXPONENTIAL BACKOFF WITH JITTER, CAPPED
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def process_jobs(jobs, batch_size=None):
+    """
+    Render the claimed jobs and send them over one SMTP connection,
+    then record each outcome:
+    - SENT on success
+    - PENDING with a backoff delay on failure
+    - DEAD once max_attempts is reached
+    """
+    outcomes = []
+    messages = []
+    rendered = []
+
+    for job in jobs:
+        try:
+            messages.append(OUTBOX_BUILDERS[job.kind](job.object_id))
+        except Exception:
+            outcomes.append(record_failure(job, traceback.format_exc()))
+        else:
+            rendered.append(job)
+
+    for job, result in zip(rendered, send_email_batch(messages, batch_size=batch_size)):
+        if result["sent"]:
+            outcomes.append(record_success(job))
+        else:
+            outcomes.append(record_failure(job, result["error"]))
+
+    return outcomes
+
+
+def record_success(job):
+    EmailOutbox.objects.filter(id=job.id).update(
+        status=OutboxStatus.SENT,
+        attempts=job.attempts + 1,
+        locked_at=None,
+        sent_at=timezone.now(),
+    )
+    return OutboxStatus.SENT
+
+
+def record_failure(job, error):
+    attempts = job.attempts + 1
+    dead = attempts >= job.max_attempts
+
+    EmailOutbox.objects.filter(id=job.id).update(
+        status=OutboxStatus.DEAD if dead else OutboxStatus.PENDING,
+        attempts=attempts,
+        next_attempt_at=timezone.now() + get_backoff(attempts),
+        locked_at=None,
+        last_error=error,
+    )
+    return OutboxStatus.DEAD if dead else OutboxStatus.PENDING
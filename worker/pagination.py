@@ -0,0 +1,142 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique, indexed key ( e.g. ts + id ).
+    - next page is fetched with a `WHERE key < last_key` seek, never an OFFSET
+    - no COUNT(*) is run, so deep pages cost the same as the first one
+    - the key is the view's `ordering` attribute, `id` when the view has none,
+      its columns must not change after insert ( not auto_now ), or edited rows move between pages
+    """
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = "page_size"
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, "ordering", None) or self.ordering
+
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_seek_filter(self.decode_cursor(cursor, queryset.model)))
+
+        # FETCH ONE EXTRA ROW TO KNOW IF THERE IS A NEXT PAGE
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        last = self.page[-1]
+        position = [
+            self.to_cursor_value(getattr(last, field.lstrip("-")))
+            for field in self.ordering
+        ]
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_previous_link(self):
+        return None
+
+    def get_seek_filter(self, position):
+        """
+        Row-value comparison `(a, b) < (x, y)` spelled out as
+        `a < x OR (a = x AND b < y)` so every backend can use the index.
+        """
+        seek = Q()
+        equal = Q()
+
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+
+            seek |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        return seek
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        """
+        Cursor position cleaned by the model fields of the ordering.
+        A cursor that decodes but holds a bad value ( a non-date for `ts` ) would
+        otherwise fail inside the query with a 500, it is a 404 like any invalid cursor.
+        """
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+        for field, value in zip(self.ordering, position):
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+
+            try:
+                values.append(model._meta.get_field(field.lstrip("-")).clean(value, None))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    @staticmethod
+    def to_cursor_value(value):
+        # KEEP FULL MICROSECOND PRECISION FOR DATETIME KEYS
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return value
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+from contextlib import nullcontext
+
+from django.db import transaction
+
+from resources.custom_enums import OutboxKind
+from worker.models import EmailOutbox, RoomAllotment, Transaction
+from worker.serializer import PaymentImportRowSerializer
+
+IMPORT_CHUNK_SIZE = 500
+
+
+def parse_payment_csv(content):
+    """
+    CSV with a header row: rm_map, amount, is_rent, payment_mode, comment.
+    Empty cells fall back to the field defaults.
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value not in (None, "")}
+        for row in csv.DictReader(io.StringIO(content))
+    ]
+
+
+def parse_payment_json(content):
+    data = json.loads(content) if isinstance(content, (str, bytes)) else content
+
+    if isinstance(data, dict):
+        data = data.get("payments")
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON list of payments.")
+
+    return data
+
+
+def import_payments(rows, atomic=True, chunk_size=IMPORT_CHUNK_SIZE, send_receipts=False):
+    """
+    Validate and insert many payments:
+    - field checks per row, allotment existence for all rows in one query
+    - valid rows inserted with bulk_create in chunks of `chunk_size`
+    - atomic=True inserts nothing if any row is invalid, otherwise invalid rows are skipped
+
+    Returns {"created": int, "errors": [{"row": n, "errors": {...}}]}, rows numbered from 1.
+    """
+    errors = []
+    valid = []
+
+    for number, row in enumerate(rows, 1):
+        serializer = PaymentImportRowSerializer(data=row if isinstance(row, dict) else {})
+        if serializer.is_valid():
+            valid.append((number, serializer.validated_data))
+        else:
+            errors.append({"row": number, "errors": serializer.errors})
+
+    # RESOLVE EVERY REFERENCED ALLOTMENT ( AND ITS ROOM FOR tnx_no ) IN ONE QUERY
+    allotments = RoomAllotment.objects.select_related("room").in_bulk(
+        {data["rm_map"] for _, data in valid}
+    )
+
+    payments = []
+    for number, data in valid:
+        allotment = allotments.get(data["rm_map"])
+        if allotment is None:
+            errors.append({"row": number, "errors": {"rm_map": ["RoomAllotment does not exist"]}})
+            continue
+
+        payments.append(Transaction(
+            rm_map=allotment,
+            amount=data["amount"],
+            is_rent=data["is_rent"],
+            payment_mode=data["payment_mode"],
+            comment=data.get("comment") or None,
+        ))
+
+    errors.sort(key=lambda error: error["row"])
+
+    if atomic and errors:
+        return {"created": 0, "errors": errors}
+
+    # ATOMIC: ONE TRANSACTION FOR ALL CHUNKS, PARTIAL: ONE PER CHUNK
+    with transaction.atomic() if atomic else nullcontext():
+        for start in range(0, len(payments), chunk_size):
+            with transaction.atomic():
+                chunk = Transaction.objects.bulk_create(payments[start:start + chunk_size])
+
+                if send_receipts:
+                    EmailOutbox.objects.bulk_create([
+                        EmailOutbox(kind=OutboxKind.TRANSACTION_RECEIPT, object_id=payment.id)
+                        for payment in chunk
+                    ])
+
+    return {"created": len(payments), "errors": errors}
@@ -0,0 +1,72 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from resources.generate_transaction_pdf import get_receipt_pdf, init_receipt_worker
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+_queue_slots = None
+
+
+def create_receipt_pool(max_workers):
+    """
+    Process pool for receipt rendering, the web process and the receipt commands all start it here.
+    Workers load the invoice template once ( init_receipt_worker ).
+    """
+    # SPAWNED ( NOT FORKED ) WORKERS NEVER INHERIT THE OPEN DB CONNECTION
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_receipt_worker
+    )
+
+
+def get_receipt_pool():
+    """
+    Process pool shared by the whole web process, created on first use.
+    Rendering is CPU bound, processes keep it off the request threads' GIL.
+    """
+    global _pool, _queue_slots
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = create_receipt_pool(settings.RECEIPT_PDF_WORKERS)
+            _queue_slots = threading.BoundedSemaphore(settings.RECEIPT_PDF_QUEUE_SIZE)
+        return _pool
+
+
+def submit_receipt_pdf(transaction_id):
+    """
+    Render in the pool unless RECEIPT_PDF_QUEUE_SIZE renders are already waiting.
+    A skipped receipt is rendered when it is first downloaded or emailed.
+    """
+    pool = get_receipt_pool()
+
+    if not _queue_slots.acquire(blocking=False):
+        logger.warning("Receipt queue full, transaction %s left for lazy rendering", transaction_id)
+        return None
+
+    future = pool.submit(get_receipt_pdf, transaction_id)
+    future.add_done_callback(lambda done: receipt_done(done, transaction_id))
+    return future
+
+
+def receipt_done(future, transaction_id):
+    _queue_slots.release()
+
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Receipt PDF for transaction %s failed", transaction_id, exc_info=future.exception())
+
+
+def queue_receipt_pdf(transaction_id):
+    """
+    Render the receipt off the request path, once the caller's transaction commits.
+    """
+    transaction.on_commit(lambda: submit_receipt_pdf(transaction_id))
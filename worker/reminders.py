@@ -0,0 +1,266 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from resources.custom_enums import (
+    NoticeType,
+    NoticeStatus,
+    NotificationChannel,
+    CampaignStatus
+)
+from worker.models import Notice, NoticeCampaign
+from worker.notifications import Notification, send_notifications
+from worker.reports import unpaid_rent_rows
+
+DELIVERY_CHUNK_SIZE = 200
+STALE_SENDING_AFTER = timedelta(minutes=10)
+
+REMINDER_SUBJECT = "Rent Reminder"
+
+
+class CampaignChannelConflict(Exception):
+    """
+    The month already has a campaign on another channel.
+    """
+
+    def __init__(self, campaign):
+        self.campaign = campaign
+        super().__init__(
+            f"Campaign {campaign.id} for {campaign.period:%Y-%m} already uses channel {campaign.channel}."
+        )
+
+
+def get_recipient(row, channel):
+    if channel == NotificationChannel.WHATSAPP:
+        wa_no = row["person__contacts__wa_no"]
+        return f"+91{wa_no}" if wa_no else None
+    return row["person__email"]
+
+
+def build_reminder_text(row, period):
+    amount = row["rental_details__rent_total"] or row["rental_details__rent"]
+    return (
+        f"Dear {row['person__f_name']}, rent of Rs. {amount} for {period.strftime('%B %Y')} "
+        f"for room {row['room__code_name']} is pending. "
+        f"Please pay at the earliest, ignore if already paid."
+    )[:255]
+
+
+def create_rent_reminder_campaign(period, channel):
+    """
+    Campaign for `period` ( first day of the month ) with one RENT_ALERT notice
+    per allotment in the unpaid rent report, inserted with one bulk_create.
+    - idempotent: campaign and notices are unique per month, a re-run only adds newly unpaid allotments
+    - a month keeps its channel, asking for another one raises CampaignChannelConflict
+    - allotments without an address for the channel get a FAILED notice straight away
+    Returns (campaign, number of notices actually inserted).
+    """
+    with transaction.atomic():
+        campaign, _ = NoticeCampaign.objects.get_or_create(
+            code=NoticeType.RENT_ALERT,
+            period=period,
+            defaults={"channel": channel}
+        )
+
+        if campaign.channel != channel:
+            raise CampaignChannelConflict(campaign)
+
+        notified = set(
+            Notice.objects.filter(
+                code=NoticeType.RENT_ALERT,
+                period=period
+            ).values_list(
+                "rm_map_id",
+                flat=True
+            )
+        )
+        existing = Notice.objects.filter(campaign_id=campaign.pk).count()
+
+        notices = []
+        for row in unpaid_rent_rows(period.year, period.month):
+            if row["id"] in notified:
+                continue
+
+            recipient = get_recipient(row, campaign.channel)
+            notices.append(Notice(
+                rm_map_id=row["id"],
+                code=NoticeType.RENT_ALERT,
+                desc=build_reminder_text(row, period),
+                campaign=campaign,
+                period=period,
+                channel=campaign.channel,
+                recipient=recipient,
+                status=NoticeStatus.PENDING if recipient else NoticeStatus.FAILED,
+                error=None if recipient else f"No recipient address for channel {campaign.channel}.",
+            ))
+
+        # A CONCURRENT RUN MAY HAVE ADDED THE SAME ALLOTMENT, THE UNIQUE CONSTRAINT DROPS IT
+        Notice.objects.bulk_create(notices, ignore_conflicts=True)
+
+        # ignore_conflicts HIDES WHICH ROWS WENT IN, COUNT THEM INSTEAD
+        campaign = refresh_campaign_counts(campaign.pk)
+        added = campaign.total - existing
+
+        if added:
+            NoticeCampaign.objects.filter(
+                pk=campaign.pk
+            ).update(
+                status=CampaignStatus.RUNNING,
+                finished_at=None
+            )
+            campaign.refresh_from_db()
+
+    return campaign, added
+
+
+def refresh_campaign_counts(campaign_id):
+    """
+    Recount total / sent / failed from the notices ( one aggregate query ) and store them.
+    """
+    counts = Notice.objects.filter(
+        campaign_id=campaign_id
+    ).aggregate(
+        total=Count("id"),
+        sent=Count("id", filter=Q(status=NoticeStatus.SENT)),
+        failed=Count("id", filter=Q(status=NoticeStatus.FAILED)),
+    )
+
+    NoticeCampaign.objects.filter(pk=campaign_id).update(**counts)
+    return NoticeCampaign.objects.get(pk=campaign_id)
+
+
+def retry_failed_notices(campaign_id):
+    """
+    Put failed notices that have an address back in the queue.
+    """
+    with transaction.atomic():
+        count = Notice.objects.filter(
+            campaign_id=campaign_id,
+            status=NoticeStatus.FAILED,
+            recipient__isnull=False
+        ).update(
+            status=NoticeStatus.PENDING,
+            error=None
+        )
+
+        if count:
+            NoticeCampaign.objects.filter(
+                pk=campaign_id
+            ).update(
+                status=CampaignStatus.RUNNING,
+                finished_at=None
+            )
+
+    return count
+
+
+def claim_notices(campaign_id, limit):
+    """
+    Lock and mark up to `limit` pending notices as sending,
+    so concurrent deliveries of one campaign never send a notice twice.
+    Notices left sending by a crashed process are picked up again after STALE_SENDING_AFTER.
+    """
+    current = timezone.now()
+
+    with transaction.atomic():
+        notices = list(
+            Notice.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                Q(status=NoticeStatus.PENDING) |
+                Q(status=NoticeStatus.SENDING, ts__lt=current - STALE_SENDING_AFTER),
+                campaign_id=campaign_id
+            ).order_by(
+                "id"
+            )[:limit]
+        )
+
+        # ts MARKS WHEN THE NOTICE WAS CLAIMED
+        Notice.objects.filter(
+            id__in=[notice.id for notice in notices]
+        ).update(
+            status=NoticeStatus.SENDING,
+            ts=current
+        )
+
+    return notices
+
+
+def deliver_campaign(campaign_id, chunk_size=DELIVERY_CHUNK_SIZE, on_progress=None):
+    """
+    Send every pending notice of the campaign, `chunk_size` at a time through the
+    notification dispatcher, storing each notice's outcome and the campaign counts after every chunk.
+    """
+    campaign = NoticeCampaign.objects.get(pk=campaign_id)
+
+    while True:
+        notices = claim_notices(campaign_id, chunk_size)
+        if not notices:
+            break
+
+        results = send_notifications(
+            Notification(
+                channel=notice.channel,
+                to=notice.recipient,
+                body=notice.desc,
+                subject=REMINDER_SUBJECT,
+                reference=notice.id,
+            )
+            for notice in notices
+        )
+
+        outcomes = {result["reference"]: result for result in results}
+        sent_at = timezone.now()
+
+        for notice in notices:
+            result = outcomes[notice.id]
+            if result["status"] == "sent":
+                notice.status = NoticeStatus.SENT
+                notice.sent_at = sent_at
+                notice.error = None
+            else:
+                notice.status = NoticeStatus.FAILED
+                notice.error = result["error"]
+
+        Notice.objects.bulk_update(notices, ["status", "sent_at", "error"])
+
+        campaign = refresh_campaign_counts(campaign_id)
+        if on_progress is not None:
+            on_progress(campaign)
+
+    in_flight = Notice.objects.filter(
+        campaign_id=campaign_id,
+        status__in=(NoticeStatus.PENDING, NoticeStatus.SENDING)
+    ).exists()
+
+    if not in_flight:
+        NoticeCampaign.objects.filter(
+            pk=campaign_id,
+            status=CampaignStatus.RUNNING
+        ).update(
+            status=CampaignStatus.COMPLETED,
+            finished_at=timezone.now()
+        )
+        campaign.refresh_from_db()
+
+    return campaign
+
+
+def deliver_running_campaigns(chunk_size=DELIVERY_CHUNK_SIZE, on_progress=None):
+    """
+    Deliver every campaign that still has notices to send, oldest first.
+    Campaigns created through the API are delivered here ( `manage.py send_rent_reminders --pending` ),
+    notices are stored rows, so a stopped worker loses nothing.
+    """
+    campaign_ids = NoticeCampaign.objects.filter(
+        status=CampaignStatus.RUNNING
+    ).order_by(
+        "id"
+    ).values_list(
+        "id",
+        flat=True
+    )
+
+    return [deliver_campaign(campaign_id, chunk_size, on_progress) for campaign_id in list(campaign_ids)]
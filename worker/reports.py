@@ -0,0 +1,312 @@
+from datetime import date, datetime, time
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import OuterRef, Exists, Subquery, Sum
+from django.db.models.functions import TruncMonth, Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from worker.models import RoomAllotment, Transaction
+
+# EVERYTHING PersonSerializer, ContactSerializer AND RoomMasterSerializer RETURN, IN ONE ROW
+UNPAID_RENT_FIELDS = (
+    "id",
+    "start_date",
+    "end_date",
+    "actual_end_date",
+    "ts",
+    "person_id",
+    "person__username",
+    "person__f_name",
+    "person__m_name",
+    "person__l_name",
+    "person__email",
+    "person__role",
+    "person__ts",
+    "person__contacts__id",
+    "person__contacts__phn_no",
+    "person__contacts__alt_phn_no",
+    "person__contacts__wa_no",
+    "room_id",
+    "room__r_no",
+    "room__flr_no",
+    "room__add",
+    "room__build_name",
+    "room__r_code",
+    "room__code_name",
+    "room__area",
+    "room__layout",
+    "room__meter_details__id",
+    "room__meter_details__meter_no",
+    "room__meter_details__bu_code",
+    "room__meter_details__con_type",
+    "rental_details__rent",
+    "rental_details__rent_total",
+)
+
+BALANCE_ORDERINGS = ("amount_due", "-amount_due")
+
+# SAME RENDERING AS THE MODEL SERIALIZERS' ts FIELDS
+TIMESTAMP_FIELD = serializers.DateTimeField()
+
+
+def month_bounds(month_start):
+    """
+    Half-open [first day, first day of next month) as aware datetimes,
+    so `ts` lookups can use an index instead of `ts__year` / `ts__month`.
+    """
+    start = timezone.make_aware(datetime.combine(month_start, time.min))
+    end = timezone.make_aware(datetime.combine(month_start + relativedelta(months=1), time.min))
+    return start, end
+
+
+def month_range(from_month, to_month):
+    months = []
+    current = from_month
+    while current <= to_month:
+        months.append(current)
+        current += relativedelta(months=1)
+    return months
+
+
+def active_allotments(building_name=None):
+    queryset = RoomAllotment.objects.filter(is_active=True)
+
+    if building_name:
+        queryset = queryset.filter(room__build_name=building_name)
+
+    return queryset
+
+
+def unpaid_rent_rows(year, month, building_name=None):
+    """
+    Active allotments started before `year-month` with no rent transaction
+    in that month, as flat `values()` rows ( one query ).
+    """
+    first_day = date(year, month, 1)
+    start, end = month_bounds(first_day)
+
+    rent_paid_subquery = Transaction.objects.filter(
+        rm_map_id=OuterRef("id"),
+        is_rent=True,
+        ts__gte=start,
+        ts__lt=end
+    )
+
+    return active_allotments(
+        building_name
+    ).filter(
+        start_date__lt=first_day
+    ).annotate(
+        rent_paid=Exists(rent_paid_subquery)
+    ).filter(
+        rent_paid=False
+    ).values(
+        *UNPAID_RENT_FIELDS
+    ).order_by(
+        "room__build_name",
+        "room__r_no"
+    )
+
+
+def rent_paid_months(from_month, to_month, building_name=None):
+    """
+    {(rm_map_id, month_start): True} for every month in the range that has
+    at least one rent transaction ( one grouped query ).
+    """
+    start, _ = month_bounds(from_month)
+    _, end = month_bounds(to_month)
+
+    queryset = Transaction.objects.filter(
+        rm_map__is_active=True,
+        is_rent=True,
+        ts__gte=start,
+        ts__lt=end
+    )
+
+    if building_name:
+        queryset = queryset.filter(rm_map__room__build_name=building_name)
+
+    paid = queryset.annotate(
+        month=TruncMonth("ts")
+    ).values_list(
+        "rm_map_id",
+        "month"
+    ).distinct()
+
+    return {
+        (rm_map_id, timezone.localtime(month).date()): True
+        for rm_map_id, month in paid
+    }
+
+
+def rent_arrears_matrix(from_month, to_month, building_name=None):
+    """
+    Allotment x month paid / unpaid matrix:
+    - True  : rent paid that month
+    - False : rent not paid
+    - None  : allotment had not started yet
+    """
+    months = month_range(from_month, to_month)
+    paid = rent_paid_months(from_month, to_month, building_name)
+
+    rows = active_allotments(
+        building_name
+    ).filter(
+        start_date__lt=to_month
+    ).values(
+        *UNPAID_RENT_FIELDS
+    ).order_by(
+        "room__build_name",
+        "room__r_no"
+    )
+
+    results = []
+    for row in rows:
+        data = {"id": row["id"], **serialize_unpaid_row(row)}
+        data["months"] = {
+            month.strftime("%Y-%m"): (
+                (row["id"], month) in paid if row["start_date"] < month else None
+            )
+            for month in months
+        }
+        results.append(data)
+
+    return {
+        "months": [month.strftime("%Y-%m") for month in months],
+        "results": results,
+    }
+
+
+def serialize_unpaid_row(row):
+    """
+    Same shape as the PersonSerializer / ContactSerializer / RoomMasterSerializer
+    payload the report always returned, built from a flat `values()` row.
+    """
+    contact = None
+    if row["person__contacts__id"] is not None:
+        contact = {
+            "id": row["person__contacts__id"],
+            "phn_no": row["person__contacts__phn_no"],
+            "alt_phn_no": row["person__contacts__alt_phn_no"],
+            "wa_no": row["person__contacts__wa_no"],
+        }
+
+    meter_details = None
+    if row["room__meter_details__id"] is not None:
+        meter_details = {
+            "id": row["room__meter_details__id"],
+            "r_no": row["room_id"],
+            "meter_no": row["room__meter_details__meter_no"],
+            "bu_code": row["room__meter_details__bu_code"],
+            "con_type": row["room__meter_details__con_type"],
+        }
+
+    return {
+        "person": {
+            "id": row["person_id"],
+            "is_active": True,
+            "username": row["person__username"],
+            "f_name": row["person__f_name"],
+            "m_name": row["person__m_name"],
+            "l_name": row["person__l_name"],
+            "email": row["person__email"],
+            "role": row["person__role"],
+            "ts": TIMESTAMP_FIELD.to_representation(row["person__ts"]),
+        },
+        "contact": contact,
+        "room": {
+            "id": row["room_id"],
+            "r_code": row["room__r_code"],
+            "meter_details": meter_details,
+            # THE ROW IS THE ROOM'S ACTIVE ALLOTMENT
+            "allotment_details": {
+                "id": row["id"],
+                "person": row["person_id"],
+                "room": row["room_id"],
+                "start_date": row["start_date"],
+                "end_date": row["end_date"],
+                "actual_end_date": row["actual_end_date"],
+                "is_active": True,
+                "ts": row["ts"],
+            },
+            "status": True,
+            "r_no": row["room__r_no"],
+            "flr_no": row["room__flr_no"],
+            "add": row["room__add"],
+            "build_name": row["room__build_name"],
+            "code_name": row["room__code_name"],
+            "area": row["room__area"],
+            "layout": row["room__layout"],
+        },
+        "start_date": row["start_date"],
+        "rent": row["rental_details__rent"],
+    }
+
+
+def billed_months(start_date, as_of):
+    """
+    Billing periods started on or before `as_of`, one per month from `start_date`
+    ( the period starting on `start_date` itself is billed ).
+    """
+    if start_date > as_of:
+        return 0
+    delta = relativedelta(as_of, start_date)
+    return delta.years * 12 + delta.months + 1
+
+
+def outstanding_balances(as_of, building_name=None, ordering="-amount_due"):
+    """
+    Expected rent ( rent_total x billed months ) vs rent paid, for every active allotment.
+    Rent paid is summed per allotment in one correlated subquery ( one query in total ),
+    the rest is arithmetic over the fetched rows.
+    """
+    # RENT PAID UP TO THE END OF `as_of`
+    until = timezone.make_aware(datetime.combine(as_of + relativedelta(days=1), time.min))
+
+    rent_paid_subquery = Transaction.objects.filter(
+        rm_map_id=OuterRef("id"),
+        is_rent=True,
+        ts__lt=until
+    ).values(
+        "rm_map_id"
+    ).annotate(
+        total=Sum("amount")
+    ).values(
+        "total"
+    )
+
+    rows = active_allotments(
+        building_name
+    ).filter(
+        start_date__lte=as_of
+    ).annotate(
+        rent_paid=Coalesce(Subquery(rent_paid_subquery), 0)
+    ).values(
+        *UNPAID_RENT_FIELDS,
+        "rent_paid"
+    )
+
+    results = []
+    for row in rows:
+        rent_total = row["rental_details__rent_total"] or 0
+        months = billed_months(row["start_date"], as_of)
+
+        data = {"id": row["id"], **serialize_unpaid_row(row)}
+        data["rent_total"] = rent_total
+        data["billed_months"] = months
+        data["expected"] = rent_total * months
+        data["rent_paid"] = row["rent_paid"]
+        data["amount_due"] = data["expected"] - row["rent_paid"]
+        results.append(data)
+
+    results.sort(
+        key=lambda item: (item["amount_due"], item["id"]),
+        reverse=ordering.startswith("-")
+    )
+
+    return {
+        "as_of": as_of,
+        "total_due": sum(item["amount_due"] for item in results if item["amount_due"] > 0),
+        "results": results,
+    }
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from worker.models import get_building_version
+
+
+class CacheCounters:
+    """
+    Per-view hit / miss counters of this process, rendered on the metrics endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, view, hit):
+        with self._lock:
+            hits, misses = self._counts.get(view, (0, 0))
+            self._counts[view] = (hits + 1, misses) if hit else (hits, misses + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+
+    def render(self):
+        counts = sorted(self.snapshot().items())
+        lines = [
+            "# HELP rent_manager_response_cache_hits_total Listing responses served from the response cache.",
+            "# TYPE rent_manager_response_cache_hits_total counter",
+            *[f'rent_manager_response_cache_hits_total{{view="{view}"}} {hits}' for view, (hits, _) in counts],
+            "# HELP rent_manager_response_cache_misses_total Listing responses computed and stored in the response cache.",
+            "# TYPE rent_manager_response_cache_misses_total counter",
+            *[f'rent_manager_response_cache_misses_total{{view="{view}"}} {misses}' for view, (_, misses) in counts],
+        ]
+        return "\n".join(lines) + "\n"
+
+
+counters = CacheCounters()
+
+
+def get_response_cache_key(view_name, version, request):
+    # HOST IS PART OF THE KEY, PAGINATED BODIES CARRY AN ABSOLUTE `next` LINK
+    query = "&".join(
+        f"{name}={value}"
+        for name, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    digest = hashlib.sha256(f"{request.get_host()}?{query}".encode()).hexdigest()[:32]
+    return f"response:{view_name}:{version}:{digest}"
+
+
+class BuildingVersionCacheMixin:
+    """
+    Caches list() output keyed on view, query params and the building's data version.
+    - the version is bumped in the same transaction as any write to that building,
+      so a stale entry is never looked up again ( no TTL needed for correctness )
+    - RESPONSE_CACHE_TIMEOUT only bounds how long dead versions occupy the cache
+    - requests without `building_param` are not cached
+    """
+    building_param = "building_code"
+
+    def list(self, request, *args, **kwargs):
+        build_name = request.query_params.get(self.building_param)
+        if not build_name:
+            return super().list(request, *args, **kwargs)
+
+        view_name = self.__class__.__name__
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        key = get_response_cache_key(view_name, get_building_version(build_name), request)
+
+        data = cache.get(key)
+        if data is not None:
+            counters.record(view_name, hit=True)
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        counters.record(view_name, hit=False)
+
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,271 @@
+from difflib import SequenceMatcher
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from resources.custom_enums import SearchTokenKind
+from resources.search_tokens import get_digits, get_words, soundex
+from worker.models import PersonSearchToken
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+MAX_TERMS = 5
+MIN_TERM_LENGTH = 2
+
+# TOKENS READ PER TERM AND MATCH TIER, SHORT PREFIXES OF COMMON NAMES STAY BOUNDED
+TERM_MATCH_LIMIT = 1000
+
+# PHONETIC MATCHES LESS SIMILAR THAN THIS ARE DROPPED
+MIN_SIMILARITY = 0.5
+
+KIND_WEIGHTS = {
+    SearchTokenKind.NAME: 10,
+    SearchTokenKind.PHONE: 9,
+    SearchTokenKind.AADHAAR: 9,
+    SearchTokenKind.PAN: 9,
+    SearchTokenKind.USERNAME: 6,
+    SearchTokenKind.EMAIL: 6,
+    SearchTokenKind.PHONETIC: 6,
+}
+
+PREFIX_KINDS = [kind for kind in SearchTokenKind.values if kind != SearchTokenKind.PHONETIC]
+
+
+def get_search_terms(query):
+    """
+    Lowercase alphanumeric terms, a query of only digits and separators
+    ( "1234 5678 9012", "+91 98765-43210" ) stays one term.
+    """
+    digits = get_digits(query)
+    if digits and not any(char.isalpha() for char in query):
+        return [digits]
+
+    return [term for term in get_words(query) if len(term) >= MIN_TERM_LENGTH][:MAX_TERMS]
+
+
+def get_prefix_upper_bound(term):
+    # token >= term AND token < upper IS A PREFIX MATCH THAT ANY B-TREE INDEX CAN RANGE SCAN
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def get_phonetic_key(term):
+    return f"{soundex(term)}:"
+
+
+def exact_filter(term):
+    condition = Q(token=term, kind__in=PREFIX_KINDS)
+
+    # A LONGER PHONE NUMBER IS USUALLY THE COUNTRY CODE IN FRONT OF IT
+    if term.isdigit() and len(term) > 10:
+        condition |= Q(token=term[-10:], kind=SearchTokenKind.PHONE)
+
+    return condition
+
+
+def prefix_filter(term):
+    # token > term LEAVES THE EXACT MATCHES TO exact_filter
+    condition = Q(token__gt=term, token__lt=get_prefix_upper_bound(term), kind__in=PREFIX_KINDS)
+
+    if term.isdigit() and len(term) > 10:
+        condition |= Q(token__gt=term[-10:], token__lt=get_prefix_upper_bound(term[-10:]), kind=SearchTokenKind.PHONE)
+
+    return condition
+
+
+def phonetic_filter(term):
+    """
+    Same-Soundex name words that do not start with `term`: the key's range with
+    the words the prefix match already finds cut out, so no person is read twice.
+    """
+    if not (term.isalpha() and len(term) > 2):
+        return None
+
+    key = get_phonetic_key(term)
+    kinds = [SearchTokenKind.PHONETIC]
+
+    return (
+        Q(token__gte=key, token__lt=key + term, kind__in=kinds) |
+        Q(token__gte=key + get_prefix_upper_bound(term), token__lt=get_prefix_upper_bound(key), kind__in=kinds)
+    )
+
+
+# BEST FIRST, EACH TIER IS ITS OWN INDEX RANGE READ UNDER ITS OWN LIMIT
+MATCH_TIERS = (exact_filter, prefix_filter, phonetic_filter)
+
+
+def term_filter(term, tiers=MATCH_TIERS):
+    """
+    Index ranges one term can match in:
+    - the exact token
+    - a longer token starting with it
+    - same Soundex key as a name word ( typos )
+    """
+    conditions = [condition for condition in (tier(term) for tier in tiers) if condition is not None]
+    return reduce(or_, conditions)
+
+
+def is_term_match(term, kind, token):
+    """
+    Python side of term_filter: whether a fetched token matched `term`.
+    """
+    if kind == SearchTokenKind.PHONETIC:
+        key = get_phonetic_key(term)
+        return (
+            term.isalpha() and len(term) > 2 and
+            token.startswith(key) and not token[len(key):].startswith(term)
+        )
+
+    if token.startswith(term):
+        return True
+
+    return kind == SearchTokenKind.PHONE and term.isdigit() and len(term) > 10 and token.startswith(term[-10:])
+
+
+def score_token(term, kind, token, similarities):
+    """
+    (score, matched kind) of a token matching `term`, None for a too different phonetic match.
+    An exact match scores double a prefix, a phonetic one is scaled by spelling similarity.
+    """
+    if kind == SearchTokenKind.PHONETIC:
+        # MANY ROWS SHARE A NAME, COMPARE EACH SPELLING ONCE
+        if token not in similarities:
+            similarities[token] = SequenceMatcher(None, term, token[len(get_phonetic_key(term)):]).ratio()
+        if similarities[token] < MIN_SIMILARITY:
+            return None
+        return KIND_WEIGHTS[kind] * similarities[token], SearchTokenKind.NAME
+
+    if kind == SearchTokenKind.PHONE and not token.startswith(term):
+        return KIND_WEIGHTS[kind] * (1 + 10 / len(token)), kind
+
+    return KIND_WEIGHTS[kind] * (1 + len(term) / len(token)), kind
+
+
+def add_match(matches, person_id, match):
+    # KEEP THE BEST MATCH PER PERSON
+    if match is not None and match[0] > matches.get(person_id, (0, None))[0]:
+        matches[person_id] = match
+
+
+def match_term(term):
+    """
+    {person_id: (score, kind)} of the best match per person for one term.
+    Each tier reads at most TERM_MATCH_LIMIT tokens, a common sound-alike
+    name can not push the exact and prefix matches out.
+    """
+    similarities = {}
+    matches = {}
+
+    for tier in MATCH_TIERS:
+        condition = tier(term)
+        if condition is None:
+            continue
+
+        rows = PersonSearchToken.objects.filter(
+            condition
+        ).order_by(
+            "token"
+        ).values_list(
+            "person_id",
+            "kind",
+            "token"
+        )[:TERM_MATCH_LIMIT]
+
+        for person_id, kind, token in rows:
+            add_match(matches, person_id, score_token(term, kind, token, similarities))
+
+    return matches
+
+
+def match_terms(terms, person_ids):
+    """
+    match_term for several terms among `person_ids`, all scored from one query.
+    """
+    rows = PersonSearchToken.objects.filter(
+        reduce(or_, [term_filter(term) for term in terms]),
+        person_id__in=person_ids
+    ).values_list(
+        "person_id",
+        "kind",
+        "token"
+    )
+
+    similarities = [{} for _ in terms]
+    matches = [{} for _ in terms]
+    for person_id, kind, token in rows:
+        for index, term in enumerate(terms):
+            if is_term_match(term, kind, token):
+                add_match(matches[index], person_id, score_token(term, kind, token, similarities[index]))
+
+    return matches
+
+
+def intersect_terms(terms, tiers, limit):
+    """
+    Persons matching every term within `tiers`, one INTERSECT of the terms' index ranges.
+    INTERSECT reads each range once, an IN ( subquery ) semi-join made SQLite
+    walk the person index row by row instead.
+    """
+    querysets = [
+        PersonSearchToken.objects.filter(term_filter(term, tiers)).values_list("person_id", flat=True)
+        for term in terms
+    ]
+    return list(querysets[0].intersection(*querysets[1:])[:limit])
+
+
+def get_candidates(terms):
+    """
+    At most TERM_MATCH_LIMIT persons matching every term.
+    Usually one INTERSECT over all tiers, when more persons match it is run again
+    per tier, so persons every term matches exactly, then by prefix, come first.
+    """
+    person_ids = intersect_terms(terms, MATCH_TIERS, TERM_MATCH_LIMIT + 1)
+    if len(person_ids) <= TERM_MATCH_LIMIT:
+        return person_ids
+
+    # DICT KEEPS THE TIER ORDER
+    candidates = {}
+    for depth in range(1, len(MATCH_TIERS)):
+        for person_id in intersect_terms(terms, MATCH_TIERS[:depth], TERM_MATCH_LIMIT):
+            candidates[person_id] = None
+        if len(candidates) >= TERM_MATCH_LIMIT:
+            break
+
+    for person_id in person_ids:
+        candidates[person_id] = None
+
+    return list(candidates)[:TERM_MATCH_LIMIT]
+
+
+def search_persons(query, limit=SEARCH_LIMIT):
+    """
+    Ranked [(person_id, score, matched kinds)] over index ranges:
+    - one term : one query per match tier
+    - more     : the persons matching all of them ( get_candidates ), then one query to score them
+    The score adds up the best match of each term, every term must match.
+    """
+    terms = get_search_terms(query)
+    if not terms:
+        return []
+
+    if len(terms) == 1:
+        term_matches = [match_term(terms[0])]
+    else:
+        person_ids = get_candidates(terms)
+        if not person_ids:
+            return []
+        term_matches = match_terms(terms, person_ids)
+
+    ranked = {
+        person_id: (score, {kind})
+        for person_id, (score, kind) in term_matches[0].items()
+    }
+    for matches in term_matches[1:]:
+        ranked = {
+            person_id: (score + matches[person_id][0], kinds | {matches[person_id][1]})
+            for person_id, (score, kinds) in ranked.items()
+            if person_id in matches
+        }
+
+    results = sorted(ranked.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+    return [(person_id, round(score, 2), sorted(kinds)) for person_id, (score, kinds) in results]
@@ -1,7 +1,11 @@
 import re
 
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import serializers
+
+from resources.custom_enums import PaymentModeChoices
+from worker.documents import DOCUMENT_FIELDS, store_content_addressed
 from worker.models import (
     RoomMaster,
     Person,
@@ -12,7 +16,10 @@ from worker.models import (
     Contact,
     RentalDetails,
     RoomAllotmentExtra,
-    MeterDetails
+    MeterDetails,
+    Notice,
+    NoticeCampaign,
+    DeAllotmentStatement
 )
 
 
@@ -27,7 +34,7 @@ class RoomMasterSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_status(self, obj):
-        return obj.status
+        return get_active_allotment(obj) is not None
 
     def get_meter_details(self, obj):
         try:
@@ -44,9 +51,7 @@ class RoomMasterSerializer(serializers.ModelSerializer):
         }
 
     def get_allotment_details(self, obj):
-        allotment = obj.room_allotments.filter(
-            is_active=True
-        ).first()
+        allotment = get_active_allotment(obj)
 
         if allotment is None:
             return None
@@ -83,6 +88,9 @@ class PersonSerializer(serializers.ModelSerializer):
         }
 
     def get_is_active(self, obj):
+        # ANNOTATED BY PersonsAPIView, ONE QUERY PER ROW OTHERWISE
+        if hasattr(obj, "has_active_allotment"):
+            return obj.has_active_allotment
         return obj.room_allotments.filter(is_active=True).exists()
 
 
@@ -122,7 +130,7 @@ class DocsSerializer(serializers.ModelSerializer):
         model = Docs
         exclude = ("person",)
 
-    def validate_aadhaar_doc(self, file):
+    def validate_aadhar_doc(self, file):
         self.validate_pdf(file, field_name="Aadhaar document")
         return file
 
@@ -147,13 +155,24 @@ class DocsSerializer(serializers.ModelSerializer):
         #         f"{field_name} must be a valid PDF."
         #     )
 
-        max_size = 5 * 1024 * 1024
+        # FIRST BYTES ARE CAPTURED BY HashingFileUploadHandler WHILE STREAMING
+        if hasattr(file, "head") and not file.head.startswith(b"%PDF-"):
+            raise serializers.ValidationError(
+                f"{field_name} must be a valid PDF."
+            )
+
+        max_size = settings.DOCUMENT_MAX_UPLOAD_SIZE
         if file.size > max_size:
             raise serializers.ValidationError(
-                f"{field_name} size must be less than 5MB."
+                f"{field_name} size must be less than {max_size // (1024 * 1024)}MB."
             )
 
     def validate(self, attrs):
+        # FILES DROPPED MID-UPLOAD FOR EXCEEDING THE SIZE LIMIT
+        request = self.context.get("request")
+        rejected = getattr(request, "rejected_uploads", None)
+        if rejected:
+            raise serializers.ValidationError(rejected)
 
         # VALIDATE PAN NO
         if attrs.get("pan_no"):
@@ -167,6 +186,20 @@ class DocsSerializer(serializers.ModelSerializer):
         validation_person(person_id)
         return attrs
 
+    def create(self, validated_data):
+        return super().create(self.store_documents(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.store_documents(validated_data))
+
+    @staticmethod
+    def store_documents(validated_data):
+        # CONTENT-ADDRESSED: THE FIELD REFERENCES documents/sha256/..., SAME FILE STORED ONCE
+        for field in DOCUMENT_FIELDS.values():
+            if validated_data.get(field):
+                validated_data[field] = store_content_addressed(validated_data[field])
+        return validated_data
+
 
 class RoomAllotmentSerializer(serializers.ModelSerializer):
     end_date = serializers.DateField(required=False, allow_null=True)
@@ -248,6 +281,7 @@ class RoomAllotmentExpirySerializer(serializers.ModelSerializer):
             "id",
             "start_date",
             "end_date",
+            "expiry_bucket",
             "remaining_days",
             "room",
         ]
@@ -392,6 +426,33 @@ class TransactionsSerializer(serializers.ModelSerializer):
         return attrs
 
 
+def get_active_allotment(room):
+    # USE PREFETCHED ACTIVE ALLOTMENT WHEN LISTING ( SEE with_room_listing_details )
+    if hasattr(room, "active_allotments"):
+        return room.active_allotments[0] if room.active_allotments else None
+
+    return room.room_allotments.filter(is_active=True).first()
+
+
+class PaymentImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk payment import. Field checks only, allotments are
+    resolved for the whole batch in one query ( see worker.payment_import ).
+    """
+    rm_map = serializers.IntegerField()
+    amount = serializers.IntegerField()
+    is_rent = serializers.BooleanField(required=False, default=False)
+    payment_mode = serializers.ChoiceField(
+        choices=PaymentModeChoices.choices,
+        required=False,
+        default=PaymentModeChoices.CASH
+    )
+    comment = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+
+    def validate_amount(self, value):
+        return validation_amount(value)
+
+
 def validation_person(value):
     if not Person.objects.filter(id=value).exists():
         raise serializers.ValidationError("Person does not exist")
@@ -426,3 +487,38 @@ def validate_pan(pan: str) -> bool | None:
     if not bool(re.match(pattern, pan)):
         raise serializers.ValidationError("Invalid PAN number.")
     return None
+
+
+class NoticeCampaignSerializer(serializers.ModelSerializer):
+    pending = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NoticeCampaign
+        fields = "__all__"
+
+    def get_pending(self, obj):
+        return obj.total - obj.sent - obj.failed
+
+
+class NoticeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notice
+        fields = [
+            "id",
+            "rm_map",
+            "code",
+            "period",
+            "lease_end_date",
+            "channel",
+            "recipient",
+            "status",
+            "error",
+            "sent_at",
+            "desc",
+        ]
+
+
+class DeAllotmentStatementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeAllotmentStatement
+        fields = "__all__"
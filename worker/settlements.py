@@ -0,0 +1,104 @@
+from django.utils import timezone
+
+from worker.models import DeAllotmentStatement, RoomAllotment, Transaction
+from worker.reports import billed_months
+
+CHECKLIST_FIELDS = (
+    "agg_available",
+    "is_painted",
+    "is_water_tank",
+    "is_grill",
+    "is_ele_bill_clear",
+)
+
+STATEMENT_TRANSACTION_FIELDS = (
+    "tnx_no",
+    "amount",
+    "is_rent",
+    "payment_mode",
+    "comment",
+    "ts",
+)
+
+
+def build_de_allotment_statement(rm_map_id):
+    """
+    Settlement of one allotment as DeAllotmentStatement field values, in two queries:
+    - allotment, rental details and checklist as one joined row
+    - transactions in one ordered pass, totals summed while the lines are numbered
+    """
+    allotment = RoomAllotment.objects.filter(
+        id=rm_map_id
+    ).values(
+        "start_date",
+        "actual_end_date",
+        "rental_details__deposit",
+        "rental_details__rent",
+        "rental_details__rent_total",
+        *(f"extra__{field}" for field in CHECKLIST_FIELDS)
+    ).get()
+
+    lines = []
+    rent_paid = other_paid = 0
+
+    transactions = Transaction.objects.filter(
+        rm_map_id=rm_map_id
+    ).order_by(
+        "ts",
+        "id"
+    ).values(
+        *STATEMENT_TRANSACTION_FIELDS
+    )
+
+    for no, row in enumerate(transactions, 1):
+        if row["is_rent"]:
+            rent_paid += row["amount"]
+        else:
+            other_paid += row["amount"]
+        lines.append({"no": no, **row, "ts": row["ts"].isoformat()})
+
+    as_of = allotment["actual_end_date"] or timezone.localdate()
+    deposit = allotment["rental_details__deposit"] or 0
+    rent_total = allotment["rental_details__rent_total"] or allotment["rental_details__rent"] or 0
+    months = billed_months(allotment["start_date"], as_of)
+    amount_due = rent_total * months - rent_paid
+
+    return {
+        "as_of": as_of,
+        "deposit": deposit,
+        "rent_total": rent_total,
+        "billed_months": months,
+        "expected_rent": rent_total * months,
+        "rent_paid": rent_paid,
+        "other_paid": other_paid,
+        "amount_due": amount_due,
+        # DUES ARE SETTLED FROM THE DEPOSIT, NEGATIVE MEANS THE TENANT STILL OWES
+        "refundable": deposit - max(amount_due, 0),
+        **{field: allotment[f"extra__{field}"] for field in CHECKLIST_FIELDS},
+        "transactions": lines,
+    }
+
+
+def save_de_allotment_statement(rm_map_id):
+    """
+    Compute and store the snapshot, replacing an earlier one.
+    """
+    statement, _ = DeAllotmentStatement.objects.update_or_create(
+        rm_map_id=rm_map_id,
+        defaults=build_de_allotment_statement(rm_map_id)
+    )
+    return statement
+
+
+def get_de_allotment_statement(rm_map_id):
+    """
+    Stored snapshot of a de-allotted allotment, None while it is still active.
+    Allotments de-allotted before snapshots existed get theirs on first use.
+    """
+    statement = DeAllotmentStatement.objects.filter(rm_map_id=rm_map_id).first()
+    if statement is not None:
+        return statement
+
+    if RoomAllotment.objects.filter(id=rm_map_id, is_active=False).exists():
+        return save_de_allotment_statement(rm_map_id)
+    return None
@@ -0,0 +1,1137 @@
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import date
+from unittest import skipIf
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.timezone import localdate
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from resources.custom_enums import (
+    BuildingCodes,
+    RoomLayout,
+    OutboxKind,
+    OutboxStatus,
+    NotificationChannel,
+    NoticeStatus,
+    NoticeType,
+    CampaignStatus,
+    ExpiryBucket
+)
+from resources.generate_transaction_pdf import get_receipt_pdf, get_receipt_renderer, is_weasyprint_available
+from worker.models import (
+    Person,
+    Contact,
+    Docs,
+    RoomMaster,
+    MeterDetails,
+    RoomAllotment,
+    RentalDetails,
+    Transaction,
+    EmailOutbox,
+    Notice,
+    NoticeCampaign,
+    ResourceVersion,
+    RoomOccupancy
+)
+from worker.conditional import MASTER_DATA_CACHE_CONTROL, VERSIONED_CACHE_CONTROL
+from worker.expiry import sweep_lease_expiry
+from worker.exports import TRANSACTION_EXPORT_COLUMNS
+from worker.management.commands.check_query_plans import HOT_QUERIES, explain, is_full_scan
+from worker.management.commands.rebuild_room_occupancy import compute_room_occupancy
+from worker.metrics import PROMETHEUS_CONTENT_TYPE, registry as metrics_registry
+from worker.nplusone import NPlusOneError, NPlusOneMiddleware, detect_n_plus_one
+from worker.notifications import Notification, send_notifications
+from worker.outbox import enqueue_email, claim_jobs, process_jobs
+from worker.response_cache import counters as response_cache_counters
+from worker.search import TERM_MATCH_LIMIT, search_persons
+from worker.serializer import PersonSerializer, ContactSerializer, RoomMasterSerializer
+
+API = "/api/worker"
+
+
+def create_room(r_no, build_name=BuildingCodes.VAMAN_NIVAS, layout=RoomLayout.ONE_RK):
+    room = RoomMaster.objects.create(r_no=r_no, flr_no=r_no // 100, build_name=build_name, layout=layout)
+    MeterDetails.objects.create(r_no=room, meter_no=f"M{room.id}", bu_code=1)
+    return room
+
+
+def create_tenant(username, f_name="Asha", l_name="Patil", phn_no=None, aadhar_no=None, pan_no=None):
+    person = Person.objects.create(username=username, f_name=f_name, l_name=l_name, email=f"{username}@example.com")
+    Contact.objects.create(person=person, phn_no=phn_no or f"9{person.id:09d}", wa_no=f"8{person.id:09d}")
+    if aadhar_no or pan_no:
+        Docs.objects.create(person=person, aadhar_no=aadhar_no, pan_no=pan_no)
+    return person
+
+
+def create_allotment(person, room, start_date=date(2025, 1, 1), rent=5000):
+    allotment = RoomAllotment.objects.create(person=person, room=room, start_date=start_date)
+    RentalDetails.objects.create(rm_map=allotment, deposit=rent * 3, rent=rent, maintenance=500)
+    return allotment
+
+
+class ListQueryCountTests(TestCase):
+    """
+    A page of any listing costs the same number of queries for N and 2N rows.
+    """
+    LISTINGS = [
+        "/room/",
+        f"/room/?building_code={BuildingCodes.VAMAN_NIVAS}",
+        "/room/available/",
+        "/person/",
+        f"/room-allotment/?building_code={BuildingCodes.VAMAN_NIVAS}",
+        "/transactions/",
+        "/transactions/?transactions_type=all",
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seeded = 0
+
+    def seed(self, count):
+        for _ in range(count):
+            index = self.seeded
+            room = create_room(100 + index)
+            create_room(500 + index)
+            allotment = create_allotment(create_tenant(f"tenant_{index}"), room)
+            Transaction.objects.create(rm_map=allotment, amount=5500, is_rent=True)
+            Transaction.objects.create(rm_map=allotment, amount=300)
+            self.seeded += 1
+
+    def get_query_count(self, url):
+        # RESPONSE CACHE WOULD HIDE THE QUERIES
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(API + url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.seed(3)
+        counts = {url: self.get_query_count(url) for url in self.LISTINGS}
+
+        self.seed(3)
+        for url in self.LISTINGS:
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(counts[url]):
+                    self.client.get(API + url)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        allotment = create_allotment(create_tenant("tenant_pages"), create_room(101))
+        self.payments = [Transaction.objects.create(rm_map=allotment, amount=100 + index) for index in range(5)]
+
+    def get_page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_edited_payment_stays_on_its_page(self):
+        first = self.get_page(f"{API}/transactions/", page_size=2)
+        # ts IS auto_now, THE EDIT MUST NOT MOVE THE OLDEST PAYMENT TO THE FRONT
+        self.payments[0].amount = 999
+        self.payments[0].save()
+
+        ids = [row["id"] for row in first["results"]]
+        url = first["next"]
+        while url:
+            page = self.get_page(url)
+            ids += [row["id"] for row in page["results"]]
+            url = page["next"]
+
+        self.assertEqual(ids, [payment.id for payment in reversed(self.payments)])
+
+    def test_bad_cursor_values_are_not_found(self):
+        def encode(position):
+            return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+        for url, position in [
+            (f"{API}/transactions/", ["not-an-id"]),
+            (f"{API}/transactions/", [None]),
+            (f"{API}/transactions/", [2 ** 70]),
+            (f"{API}/room-allotment/expiry/", ["not-a-date", 1]),
+            (f"{API}/room-allotment/expiry/", [{"date": "2025-01-01"}, 1]),
+        ]:
+            with self.subTest(url=url, position=position):
+                self.assertEqual(self.client.get(url, {"cursor": encode(position)}).status_code, 404)
+
+        self.assertEqual(self.client.get(f"{API}/transactions/", {"cursor": "%%%"}).status_code, 404)
+
+
+class RoomOccupancyTests(TestCase):
+    """
+    RoomOccupancy deltas applied on save / delete always match a full rebuild.
+    """
+
+    def setUp(self):
+        self.vaman_rk = create_room(101)
+        self.vaman_bhk = create_room(102, layout=RoomLayout.ONE_BHK)
+        self.abhishek_rk = create_room(201, build_name=BuildingCodes.ABHISHEK_APT)
+
+    def get_occupancy(self):
+        return {
+            (row.build_name, row.layout): (row.total_rooms, row.occupied_rooms, row.vacant_rooms)
+            for row in RoomOccupancy.objects.all()
+            if row.total_rooms
+        }
+
+    def assert_matches_rebuild(self):
+        self.assertEqual(self.get_occupancy(), compute_room_occupancy())
+        call_command("rebuild_room_occupancy", check=True, stdout=io.StringIO())
+
+    def test_allot_move_and_de_allot_match_rebuild(self):
+        allotment = create_allotment(create_tenant("tenant_occupancy"), self.vaman_rk)
+        self.assert_matches_rebuild()
+        self.assertEqual(self.get_occupancy()[(BuildingCodes.VAMAN_NIVAS, RoomLayout.ONE_RK)], (1, 1, 0))
+
+        allotment.room = self.abhishek_rk
+        allotment.save()
+        self.assert_matches_rebuild()
+        self.assertEqual(self.get_occupancy()[(BuildingCodes.VAMAN_NIVAS, RoomLayout.ONE_RK)], (1, 0, 1))
+        self.assertEqual(self.get_occupancy()[(BuildingCodes.ABHISHEK_APT, RoomLayout.ONE_RK)], (1, 1, 0))
+
+        # OCCUPIED ROOM CHANGES LAYOUT
+        self.abhishek_rk.layout = RoomLayout.TWO_BHK
+        self.abhishek_rk.save()
+        self.assert_matches_rebuild()
+
+        allotment.is_active = False
+        allotment.actual_end_date = localdate()
+        allotment.save()
+        self.assert_matches_rebuild()
+        self.assertEqual(self.get_occupancy()[(BuildingCodes.ABHISHEK_APT, RoomLayout.TWO_BHK)], (1, 0, 1))
+
+    def test_deleting_tenant_or_room_matches_rebuild(self):
+        create_allotment(create_tenant("tenant_deleted"), self.vaman_bhk)
+        person = create_tenant("tenant_deleted_room")
+        create_allotment(person, self.vaman_rk)
+
+        Person.objects.get(username="tenant_deleted").delete()
+        self.assert_matches_rebuild()
+
+        RoomMaster.objects.get(id=self.vaman_rk.id).delete()
+        self.assert_matches_rebuild()
+        self.assertNotIn((BuildingCodes.VAMAN_NIVAS, RoomLayout.ONE_RK), self.get_occupancy())
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        create_allotment(create_tenant("tenant_drift"), self.vaman_rk)
+        RoomOccupancy.objects.filter(
+            build_name=BuildingCodes.VAMAN_NIVAS,
+            layout=RoomLayout.ONE_RK
+        ).update(
+            occupied_rooms=F("occupied_rooms") + 1
+        )
+
+        output = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "drift in 1 group(s)"):
+            call_command("rebuild_room_occupancy", check=True, stdout=output)
+        self.assertIn(f"{BuildingCodes.VAMAN_NIVAS} / {RoomLayout.ONE_RK}: expected total=1 occupied=1", output.getvalue())
+
+        call_command("rebuild_room_occupancy", stdout=io.StringIO())
+        self.assert_matches_rebuild()
+
+
+class PaymentImportTests(TestCase):
+    URL = f"{API}/transactions/import/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.allotment = create_allotment(create_tenant("tenant_import"), create_room(101))
+
+    def upload(self, mode):
+        content = (
+            "rm_map,amount,is_rent,payment_mode,comment\n"
+            f"{self.allotment.id},5500,true,,March rent\n"
+            f"{self.allotment.id},abc,false,,\n"
+            f"{self.allotment.id + 100},300,false,,\n"
+            f"{self.allotment.id},300,false,,Light bill\n"
+        ).encode()
+        upload = SimpleUploadedFile("payments.csv", content, content_type="text/csv")
+        return self.client.post(f"{self.URL}?mode={mode}", {"file": upload}, format="multipart")
+
+    def test_atomic_mode_writes_nothing_when_a_row_is_bad(self):
+        response = self.upload("atomic")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["created"], 0)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [2, 3])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_partial_mode_imports_good_rows_and_lists_errors(self):
+        response = self.upload("partial")
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()["created"], 2)
+        errors = {error["row"]: error["errors"] for error in response.json()["errors"]}
+        self.assertEqual(sorted(errors), [2, 3])
+        self.assertIn("amount", errors[2])
+        self.assertEqual(errors[3], {"rm_map": ["RoomAllotment does not exist"]})
+        self.assertEqual(
+            sorted(Transaction.objects.values_list("amount", "is_rent")),
+            [(300, False), (5500, True)]
+        )
+
+    def test_json_rows_all_valid(self):
+        response = self.client.post(
+            f"{self.URL}?send_receipts=true",
+            [{"rm_map": self.allotment.id, "amount": 5500, "is_rent": True}],
+            format="json"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(EmailOutbox.objects.filter(kind=OutboxKind.TRANSACTION_RECEIPT).count(), 1)
+
+
+class CsvExportTests(TestCase):
+    URL = f"{API}/export/transactions.csv"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seeded = 0
+
+    def seed(self, count):
+        for _ in range(count):
+            index = self.seeded
+            allotment = create_allotment(create_tenant(f"tenant_export_{index}"), create_room(101 + index))
+            Transaction.objects.create(rm_map=allotment, amount=5000 + index, comment="Rent, March")
+            self.seeded += 1
+
+    def export(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.URL)
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        return response, lines, len(queries)
+
+    def test_streams_header_and_one_line_per_payment_with_fixed_queries(self):
+        self.seed(3)
+        response, lines, queries = self.export()
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('attachment; filename="transactions_', response["Content-Disposition"])
+        self.assertEqual(next(csv.reader(lines[:1])), [header for header, _ in TRANSACTION_EXPORT_COLUMNS])
+        self.assertEqual(len(lines), 1 + 3)
+        self.assertIn('"Rent, March"', lines[1])
+
+        self.seed(3)
+        _, lines, more_queries = self.export()
+        self.assertEqual(len(lines), 1 + 6)
+        self.assertEqual(more_queries, queries)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics_registry.reset()
+        cache.clear()
+        create_allotment(create_tenant("tenant_metrics"), create_room(101))
+
+    def test_records_queries_and_latency_per_route(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(2):
+                self.assertEqual(client.get(f"{API}/person/").status_code, 200)
+        # THE NEXT REQUEST CLEARS connection.queries
+        query_count = len(queries)
+
+        response = client.get(f"{API}/metrics/")
+        body = response.content.decode()
+        labels = 'view="person-list-create",route="api/worker/person/",method="GET"'
+
+        self.assertEqual(response["Content-Type"], PROMETHEUS_CONTENT_TYPE)
+        self.assertIn(f"rent_manager_http_requests_total{{{labels}}} 2", body)
+        self.assertIn(f"rent_manager_db_queries_total{{{labels}}} {query_count}", body)
+        self.assertIn(f"rent_manager_http_request_duration_seconds_count{{{labels}}} 2", body)
+        self.assertIn(f'rent_manager_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+
+        duration_sum = next(
+            line for line in body.splitlines()
+            if line.startswith(f"rent_manager_http_request_duration_seconds_sum{{{labels}}}")
+        )
+        self.assertGreater(float(duration_sum.rsplit(" ", 1)[1]), 0)
+
+
+class OutstandingBalancesTests(TestCase):
+    URL = f"{API}/home/outstanding-balances/"
+
+    def setUp(self):
+        self.client = APIClient()
+        today = localdate()
+
+        # 3 BILLED MONTHS OF 5500, ONE RENT PAYMENT, THE NON-RENT PAYMENT IS IGNORED
+        self.behind = create_allotment(create_tenant("tenant_behind"), create_room(101), today - relativedelta(months=2))
+        Transaction.objects.create(rm_map=self.behind, amount=5500, is_rent=True)
+        Transaction.objects.create(rm_map=self.behind, amount=300)
+
+        # 1 BILLED MONTH OF 3500, PAID
+        self.paid = create_allotment(create_tenant("tenant_paid"), create_room(102), today, rent=3000)
+        Transaction.objects.create(rm_map=self.paid, amount=3500, is_rent=True)
+
+        # 2 BILLED MONTHS OF 4500, NOTHING PAID
+        self.unpaid = create_allotment(create_tenant("tenant_unpaid"), create_room(103), today - relativedelta(months=1), rent=4000)
+
+        left = create_allotment(create_tenant("tenant_left"), create_room(104), today - relativedelta(months=3))
+        left.is_active = False
+        left.save()
+
+    def get(self, **params):
+        return self.client.get(self.URL, params)
+
+    def test_balances_sorted_by_amount_due_with_amounts(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        results = {item["id"]: item for item in data["results"]}
+        self.assertEqual([item["id"] for item in data["results"]], [self.behind.id, self.unpaid.id, self.paid.id])
+        self.assertEqual(data["total_due"], 11000 + 9000)
+
+        behind = results[self.behind.id]
+        self.assertEqual(
+            (behind["rent_total"], behind["billed_months"], behind["expected"], behind["rent_paid"], behind["amount_due"]),
+            (5500, 3, 16500, 5500, 11000)
+        )
+        self.assertEqual(results[self.unpaid.id]["amount_due"], 9000)
+        self.assertEqual(results[self.paid.id]["amount_due"], 0)
+
+    def test_ordering_and_min_due(self):
+        ascending = self.get(ordering="amount_due").json()["results"]
+        self.assertEqual([item["id"] for item in ascending], [self.paid.id, self.unpaid.id, self.behind.id])
+
+        at_least = self.get(min_due=9000).json()["results"]
+        self.assertEqual([item["id"] for item in at_least], [self.behind.id, self.unpaid.id])
+
+        self.assertEqual(self.get(ordering="room").status_code, 400)
+        self.assertEqual(self.get(min_due="lots").status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.room = create_room(101)
+
+    def test_master_data_answers_304_on_matching_etag(self):
+        url = f"{API}/master-data/building/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [choice for choice in BuildingCodes])
+        self.assertEqual(response["Cache-Control"], MASTER_DATA_CACHE_CONTROL)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(not_modified.content, b"")
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_rooms_answer_304_until_a_write(self):
+        for url in (f"{API}/room/", f"{API}/room/{self.room.id}/"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                etag = response["ETag"]
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Cache-Control"], VERSIONED_CACHE_CONTROL)
+
+                # ONLY THE VERSION IS READ FOR A 304
+                with self.assertNumQueries(1):
+                    not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(not_modified.status_code, 304)
+
+                create_allotment(create_tenant(f"tenant_etag_{self.room.id}_{len(url)}"), self.room)
+
+                changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(changed.status_code, 200)
+                self.assertNotEqual(changed["ETag"], etag)
+
+    def test_room_save_changes_the_etag(self):
+        url = f"{API}/room/{self.room.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        self.room.area = 450
+        self.room.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["area"], 450)
+
+
+class ResponseCacheTests(TestCase):
+    URL = f"{API}/room-allotment/?building_code={BuildingCodes.VAMAN_NIVAS}"
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        response_cache_counters.reset()
+        self.allotment = create_allotment(create_tenant("tenant_cache"), create_room(101))
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries]
+
+    def test_repeat_request_is_served_from_the_cache(self):
+        first, _ = self.get()
+        repeat, queries = self.get()
+
+        self.assertEqual(repeat.json(), first.json())
+        # THE BUILDING VERSION IS STILL READ ( IT KEEPS INVALIDATION EXACT ACROSS PROCESSES ), NO DATA IS
+        self.assertEqual(len(queries), 1)
+        self.assertIn(ResourceVersion._meta.db_table, queries[0])
+        self.assertEqual(response_cache_counters.snapshot(), {"RoomAllotmentByBuildingNameAPIView": (1, 1)})
+
+    def test_version_bump_invalidates_the_cached_listing(self):
+        self.get()
+
+        tenant = create_tenant("tenant_cache_new")
+        create_allotment(tenant, create_room(102))
+        response, queries = self.get()
+        self.assertIn(tenant.id, [item["person"]["id"] for item in response.json()["results"]])
+        self.assertGreater(len(queries), 1)
+
+        # A PAYMENT BUMPS THE BUILDING VERSION TOO
+        self.get()
+        Transaction.objects.create(rm_map=self.allotment, amount=5500, is_rent=True)
+        _, queries = self.get()
+        self.assertGreater(len(queries), 1)
+        self.assertEqual(response_cache_counters.snapshot(), {"RoomAllotmentByBuildingNameAPIView": (1, 3)})
+
+    def test_other_buildings_keep_their_entries(self):
+        self.get()
+        create_room(101, build_name=BuildingCodes.ABHISHEK_APT)
+
+        _, queries = self.get()
+        self.assertEqual(len(queries), 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), DOCUMENT_MAX_UPLOAD_SIZE=1024 * 1024)
+class DocumentUploadTests(TestCase):
+    PDF = b"%PDF-1.4\n" + b"0123456789" * 50
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def upload(self, person, content=PDF, aadhar_no="1234 5678 9012", pan_no="ABCPE1234F"):
+        return self.client.post(
+            f"{API}/person/{person.id}/doc/",
+            {
+                "aadhar_no": aadhar_no,
+                "pan_no": pan_no,
+                "aadhar_doc": SimpleUploadedFile("aadhaar.pdf", content, content_type="application/pdf"),
+            },
+            format="multipart",
+        )
+
+    def test_oversized_upload_is_rejected(self):
+        person = create_tenant("tenant_big_doc")
+        response = self.upload(person, content=self.PDF + bytes(1024 * 1024))
+
+        self.assertEqual(response.status_code, 400)
+        # DROPPED BY HashingFileUploadHandler WHILE STREAMING, NOT AFTER
+        self.assertEqual(response.json()["aadhar_doc"], ["File must be at most 1MB."])
+        self.assertFalse(Docs.objects.filter(person=person).exists())
+
+    def test_same_bytes_are_stored_once(self):
+        first = self.upload(create_tenant("tenant_doc_1"))
+        second = self.upload(create_tenant("tenant_doc_2"), aadhar_no="2234 5678 9012", pan_no="ABCPE1235F")
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+
+        names = set(Docs.objects.values_list("aadhar_doc", flat=True))
+        self.assertEqual(len(names), 1)
+
+        name = names.pop()
+        self.assertTrue(name.startswith("documents/sha256/"))
+        _, files = default_storage.listdir(os.path.dirname(name))
+        self.assertEqual(files, [os.path.basename(name)])
+
+    def test_range_request_returns_partial_content(self):
+        person = create_tenant("tenant_doc_range")
+        self.assertEqual(self.upload(person).status_code, 201)
+        url = f"{API}/person/{person.id}/doc/aadhaar/"
+        size = len(self.PDF)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-7")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 0-7/{size}")
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-10")
+        self.assertEqual(response["Content-Range"], f"bytes {size - 10}-{size - 1}/{size}")
+        self.assertEqual(b"".join(response.streaming_content), self.PDF[-10:])
+
+        full = self.client.get(url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(b"".join(full.streaming_content), self.PDF)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=full["ETag"]).status_code, 304)
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{size}")
+
+
+class DeAllotmentStatementTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.end_date = localdate()
+        # 3 BILLED MONTHS OF 5500, DEPOSIT 15000
+        self.allotment = create_allotment(
+            create_tenant("tenant_leaving"), create_room(101), self.end_date - relativedelta(months=2)
+        )
+        self.payments = [
+            Transaction.objects.create(rm_map=self.allotment, amount=5500, is_rent=True),
+            Transaction.objects.create(rm_map=self.allotment, amount=300, comment="Maintenance"),
+            Transaction.objects.create(rm_map=self.allotment, amount=5500, is_rent=True),
+        ]
+        self.url = f"{API}/room-de-allotment/{self.allotment.id}/statement/"
+
+    def de_allot(self):
+        response = self.client.patch(
+            f"{API}/room-de-allotment/{self.allotment.id}/",
+            {"actual_end_date": self.end_date.isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_statement_totals(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.de_allot()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(data["as_of"], self.end_date.isoformat())
+        self.assertEqual(
+            {field: data[field] for field in (
+                "deposit", "rent_total", "billed_months", "expected_rent",
+                "rent_paid", "other_paid", "amount_due", "refundable"
+            )},
+            {
+                "deposit": 15000,
+                "rent_total": 5500,
+                "billed_months": 3,
+                "expected_rent": 16500,
+                "rent_paid": 11000,
+                "other_paid": 300,
+                "amount_due": 5500,
+                "refundable": 9500,
+            }
+        )
+        self.assertEqual([line["no"] for line in data["transactions"]], [1, 2, 3])
+        self.assertEqual([line["tnx_no"] for line in data["transactions"]], [payment.tnx_no for payment in self.payments])
+
+    def test_statement_is_a_snapshot(self):
+        self.de_allot()
+        Transaction.objects.create(rm_map=self.allotment, amount=5500, is_rent=True)
+
+        data = self.client.get(self.url).json()
+        self.assertEqual((data["rent_paid"], len(data["transactions"])), (11000, 3))
+
+    def test_statement_built_on_first_read_for_older_de_allotments(self):
+        self.allotment.is_active = False
+        self.allotment.actual_end_date = self.end_date
+        self.allotment.save()
+
+        data = self.client.get(self.url).json()
+        self.assertEqual((data["amount_due"], data["refundable"]), (5500, 9500))
+
+
+class UnPaidRentShapeTests(TestCase):
+    def test_rows_match_model_serializers(self):
+        room = create_room(101)
+        allotment = create_allotment(create_tenant("tenant_unpaid"), room, start_date=date(2025, 1, 1))
+        expected = {
+            "person": PersonSerializer(allotment.person).data,
+            "contact": ContactSerializer(allotment.person.contacts.first()).data,
+            "room": RoomMasterSerializer(room).data,
+            "start_date": allotment.start_date,
+            "rent": 5000,
+        }
+
+        response = APIClient().get(
+            f"{API}/home/unpaid-rent/",
+            {"building_name": BuildingCodes.VAMAN_NIVAS, "year": 2025, "month": 3}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [json.loads(JSONRenderer().render(expected))])
+
+
+class RefusingEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError(111, "Connection refused")
+
+    def send_messages(self, email_messages):
+        raise AssertionError("No message can be sent without a connection.")
+
+
+class EmailOutboxTests(TestCase):
+    @override_settings(EMAIL_BACKEND="worker.tests.RefusingEmailBackend", MEDIA_ROOT=tempfile.mkdtemp())
+    def test_refused_connection_schedules_retries(self):
+        allotment = create_allotment(create_tenant("tenant_outbox"), create_room(101))
+        jobs = [
+            enqueue_email(OutboxKind.TRANSACTION_RECEIPT, Transaction.objects.create(rm_map=allotment, amount=5500).id)
+            for _ in range(2)
+        ]
+
+        outcomes = process_jobs(claim_jobs(10))
+
+        self.assertEqual(outcomes, [OutboxStatus.PENDING, OutboxStatus.PENDING])
+        for job in EmailOutbox.objects.filter(id__in=[job.id for job in jobs]):
+            self.assertEqual(job.status, OutboxStatus.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertGreater(job.next_attempt_at, timezone.now())
+            self.assertIn("ConnectionRefusedError", job.last_error)
+
+
+class TransactionNumberTests(TestCase):
+    def setUp(self):
+        self.vaman = create_allotment(create_tenant("tenant_vaman"), create_room(101))
+        self.abhishek = create_allotment(
+            create_tenant("tenant_abhishek"),
+            create_room(201, build_name=BuildingCodes.ABHISHEK_APT)
+        )
+
+    def get_sequences(self, allotment):
+        return sorted(
+            int(tnx_no.rsplit("_", 1)[1])
+            for tnx_no in Transaction.objects.filter(rm_map=allotment).values_list("tnx_no", flat=True)
+        )
+
+    def test_bulk_create_numbers_each_building_consecutively(self):
+        Transaction.objects.create(rm_map=self.vaman, amount=100)
+        Transaction.objects.bulk_create(
+            [Transaction(rm_map=self.vaman, amount=100) for _ in range(3)] +
+            [Transaction(rm_map=self.abhishek, amount=100) for _ in range(2)]
+        )
+
+        self.assertEqual(self.get_sequences(self.vaman), [1, 2, 3, 4])
+        self.assertEqual(self.get_sequences(self.abhishek), [1, 2])
+
+        tnx_no = Transaction.objects.filter(rm_map=self.abhishek).order_by("tnx_no").values_list("tnx_no", flat=True).first()
+        self.assertEqual(tnx_no, f"TXN_{localdate().strftime('%d%m%Y')}_A_201_0001")
+
+    def test_save_runs_one_room_lookup_and_one_statement_per_counter(self):
+        with CaptureQueriesContext(connection) as queries:
+            Transaction.objects.create(rm_map_id=self.vaman.id, amount=100)
+
+        statements = [query["sql"] for query in queries if "SAVEPOINT" not in query["sql"]]
+        # ROOM LOOKUP, SEQUENCE UPSERT, INSERT, BUILDING VERSION UPSERT
+        self.assertEqual(len(statements), 4, statements)
+        self.assertEqual(sum('FROM "room_allotment"' in sql for sql in statements), 1)
+        self.assertEqual(self.get_sequences(self.vaman), [1])
+
+    def test_update_keeps_number(self):
+        payment = Transaction.objects.create(rm_map=self.vaman, amount=100)
+        tnx_no = payment.tnx_no
+
+        payment.amount = 200
+        payment.save()
+
+        self.assertEqual(Transaction.objects.get(id=payment.id).tnx_no, tnx_no)
+        self.assertEqual(self.get_sequences(self.vaman), [1])
+
+
+# SQLITE'S IN-MEMORY TEST DATABASE FAILS CONCURRENT WRITERS INSTEAD OF MAKING THEM WAIT,
+# THIS RUNS ON BACKENDS WITH ROW LOCKS ( POSTGRES / MYSQL )
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentTransactionNumberTests(TransactionTestCase):
+    THREADS = 4
+    PER_THREAD = 10
+
+    def test_concurrent_saves_never_share_a_number(self):
+        allotment = create_allotment(create_tenant("tenant_concurrent"), create_room(101))
+        errors = []
+
+        def save_payments():
+            try:
+                for _ in range(self.PER_THREAD):
+                    Transaction.objects.create(rm_map_id=allotment.id, amount=100)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=save_payments) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        tnx_nos = list(Transaction.objects.values_list("tnx_no", flat=True))
+        self.assertEqual(len(tnx_nos), self.THREADS * self.PER_THREAD)
+        self.assertEqual(
+            sorted(int(tnx_no.rsplit("_", 1)[1]) for tnx_no in tnx_nos),
+            list(range(1, self.THREADS * self.PER_THREAD + 1))
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BenchmarkTests(TestCase):
+    """
+    seed_benchmark_data + benchmark_endpoints on a small database, compared against a baseline.
+    """
+
+    def setUp(self):
+        call_command(
+            "seed_benchmark_data",
+            buildings=2,
+            rooms=10,
+            tenants=12,
+            transactions=60,
+            stdout=io.StringIO()
+        )
+        self.folder = tempfile.mkdtemp()
+
+    def benchmark(self, name, **options):
+        output = os.path.join(self.folder, name)
+        call_command("benchmark_endpoints", iterations=2, warmup=0, output=output, stdout=io.StringIO(), **options)
+        with open(output, encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_baseline(self, report):
+        path = os.path.join(self.folder, "baseline.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        return path
+
+    def test_results_cover_get_routes(self):
+        report = self.benchmark("run.json")
+
+        results = report["results"]
+        self.assertEqual(results["transactions/"]["status"], 200)
+        self.assertEqual(results["room/"]["status"], 200)
+        self.assertNotIn("transactions/import/", results)
+        self.assertGreater(results["transactions/"]["queries"], 0)
+        for item in results.values():
+            self.assertLessEqual(item["p50_ms"], item["p95_ms"])
+
+    def test_baseline_comparison_fails_on_regression(self):
+        report = self.benchmark("run.json")
+        # LATENCY CAN VARY BETWEEN RUNS, ONLY QUERY COUNTS ARE CHECKED HERE
+        baseline = self.write_baseline(report)
+        self.benchmark("same.json", baseline=baseline, tolerance=1000)
+
+        report["results"]["transactions/"]["queries"] -= 1
+        baseline = self.write_baseline(report)
+        with self.assertRaisesMessage(CommandError, "1 regression(s)"):
+            self.benchmark("regressed.json", baseline=baseline, tolerance=1000)
+
+
+class NPlusOneTests(TestCase):
+    """
+    manage.py test runs with NPLUSONE_RAISE on, a repeated query shape fails the test.
+    """
+
+    def setUp(self):
+        for index in range(6):
+            create_allotment(create_tenant(f"tenant_nplusone_{index}"), create_room(101 + index))
+
+    def serialize_persons(self, request=None):
+        # NO has_active_allotment ANNOTATION: get_is_active QUERIES ONCE PER ROW
+        PersonSerializer(Person.objects.order_by("id"), many=True).data
+        return HttpResponse()
+
+    def test_settings_raise_in_tests(self):
+        self.assertTrue(settings.NPLUSONE_RAISE)
+        self.assertEqual(settings.NPLUSONE_SAMPLE_RATE, 0)
+
+    def test_detector_names_serializer_field(self):
+        with self.assertRaisesMessage(NPlusOneError, "PersonSerializer.is_active"):
+            with detect_n_plus_one(label="persons"):
+                self.serialize_persons()
+
+    def test_detector_names_stack_frame_outside_serializers(self):
+        with self.assertRaisesMessage(NPlusOneError, "worker/tests.py:"):
+            with detect_n_plus_one():
+                for person in Person.objects.all():
+                    person.room_allotments.exists()
+
+    def test_middleware_raises_for_request(self):
+        middleware = NPlusOneMiddleware(self.serialize_persons)
+
+        with self.assertRaisesMessage(NPlusOneError, f"GET {API}/person/"):
+            middleware(RequestFactory().get(f"{API}/person/"))
+
+    def test_annotated_listing_passes(self):
+        response = APIClient().get(f"{API}/person/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 6)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Every hot query ( check_query_plans.HOT_QUERIES ) is planned through its index.
+    """
+
+    def test_hot_queries_use_their_index(self):
+        allotment = create_allotment(create_tenant("tenant_plan"), create_room(101))
+        Transaction.objects.create(rm_map=allotment, amount=5500, is_rent=True)
+
+        for name, build_queryset, table, index in HOT_QUERIES:
+            with self.subTest(query=name):
+                plan = explain(build_queryset())
+                self.assertFalse(is_full_scan(plan, table), plan)
+                self.assertIn(index, plan)
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """
+    Locmem backend that counts sessions the way the SMTP backend opens them:
+    send_messages() on an unopened connection opens and closes its own.
+    """
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if getattr(self, "is_open", False):
+            return super().send_messages(messages)
+
+        self.open()
+        try:
+            return super().send_messages(messages)
+        finally:
+            self.close()
+
+
+class EmailNotificationBackendTests(TestCase):
+    @override_settings(EMAIL_BACKEND="worker.tests.CountingEmailBackend")
+    def test_one_connection_per_dispatcher_thread(self):
+        CountingEmailBackend.opened = 0
+        notifications = [
+            Notification(NotificationChannel.EMAIL, f"tenant{index}@example.com", "Rent due", subject="Rent")
+            for index in range(20)
+        ]
+
+        with override_settings(NOTIFICATION_BACKENDS={
+            NotificationChannel.EMAIL: {"BACKEND": "worker.notifications.EmailNotificationBackend"},
+        }):
+            results = send_notifications(notifications, concurrency=4)
+
+        self.assertEqual([result["status"] for result in results], ["sent"] * 20)
+        self.assertEqual(len(mail.outbox), 20)
+        self.assertLessEqual(CountingEmailBackend.opened, 4)
+
+
+@override_settings(
+    NOTIFICATION_BACKENDS={
+        NotificationChannel.EMAIL: {"BACKEND": "worker.notifications.FileNotificationBackend"},
+        NotificationChannel.WHATSAPP: {"BACKEND": "worker.notifications.FileNotificationBackend"},
+    },
+    NOTIFICATION_FILE_PATH=os.devnull
+)
+class RentReminderTests(TestCase):
+    URL = f"{API}/home/rent-reminders/"
+
+    def setUp(self):
+        self.client = APIClient()
+        for index in range(3):
+            create_allotment(create_tenant(f"tenant_reminder_{index}"), create_room(101 + index))
+
+    def post(self, **data):
+        return self.client.post(self.URL, {"month": "2025-03", **data}, format="json")
+
+    def test_repost_counts_only_inserted_notices(self):
+        first = self.post(channel=NotificationChannel.EMAIL)
+        second = self.post(channel=NotificationChannel.EMAIL)
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()["added"], 3)
+        self.assertEqual(second.json()["added"], 0)
+        self.assertEqual(second.json()["total"], 3)
+
+    def test_other_channel_for_the_month_conflicts(self):
+        self.post(channel=NotificationChannel.EMAIL)
+        response = self.post(channel=NotificationChannel.WHATSAPP)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["campaign"]["channel"], NotificationChannel.EMAIL)
+        self.assertFalse(Notice.objects.filter(channel=NotificationChannel.WHATSAPP).exists())
+
+    def test_pending_notices_are_delivered_by_the_command(self):
+        campaign_id = self.post(channel=NotificationChannel.EMAIL).json()["id"]
+        self.assertEqual(Notice.objects.filter(status=NoticeStatus.PENDING).count(), 3)
+
+        call_command("send_rent_reminders", pending=True, stdout=io.StringIO())
+
+        campaign = NoticeCampaign.objects.get(id=campaign_id)
+        self.assertEqual((campaign.status, campaign.sent), (CampaignStatus.COMPLETED, 3))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReceiptPdfTests(TestCase):
+    def setUp(self):
+        allotment = create_allotment(create_tenant("tenant_receipt"), create_room(101))
+        self.payment = Transaction.objects.create(rm_map=allotment, amount=5500, is_rent=True)
+
+    def test_receipt_renders_with_default_settings(self):
+        response = APIClient().get(f"{API}/transactions/{self.payment.id}/receipt/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+    def test_receipt_is_stored_once_per_content(self):
+        name = get_receipt_pdf(self.payment.id)
+
+        self.assertEqual(get_receipt_pdf(self.payment.id), name)
+        _, files = default_storage.listdir(os.path.dirname(name))
+        self.assertEqual(files, [os.path.basename(name)])
+        self.assertEqual(Transaction.objects.get(id=self.payment.id).receipt.name, name)
+
+        Transaction.objects.filter(id=self.payment.id).update(amount=6000)
+        self.assertNotEqual(get_receipt_pdf(self.payment.id), name)
+
+    @skipIf(is_weasyprint_available(), "WeasyPrint is installed")
+    def test_missing_weasyprint_falls_back_to_text(self):
+        self.assertEqual(get_receipt_renderer("weasyprint"), "text")
+        self.assertTrue(get_receipt_pdf(self.payment.id, renderer="weasyprint").endswith(".pdf"))
+
+
+class LeaseExpiryTests(TestCase):
+    def setUp(self):
+        today = localdate()
+        # 11 MONTH LEASES: ONE ENDED YESTERDAY, ONE ENDS IN 5 DAYS, ONE FAR OUT
+        self.expired = create_allotment(create_tenant("tenant_expired"), create_room(101), today - relativedelta(months=11))
+        self.week = create_allotment(create_tenant("tenant_week"), create_room(102), today - relativedelta(months=11, days=-6))
+        self.later = create_allotment(create_tenant("tenant_later"), create_room(103), today)
+
+    def test_buckets_set_on_save(self):
+        self.assertEqual(
+            list(RoomAllotment.objects.order_by("id").values_list("expiry_bucket", flat=True)),
+            [ExpiryBucket.EXPIRED, ExpiryBucket.WEEK, None]
+        )
+
+    def test_endpoint_filters_by_bucket(self):
+        response = APIClient().get(f"{API}/room-allotment/expiry/", {"bucket": ExpiryBucket.EXPIRED})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.expired.id])
+        self.assertEqual(APIClient().get(f"{API}/room-allotment/expiry/", {"bucket": "Soon"}).status_code, 400)
+
+    def test_sweep_moves_buckets_and_notices_once(self):
+        later = localdate() + relativedelta(days=10)
+
+        result = sweep_lease_expiry(later)
+        sweep_lease_expiry(later)
+
+        self.assertEqual(result["expired"], 2)
+        self.assertEqual(
+            RoomAllotment.objects.get(id=self.week.id).expiry_bucket,
+            ExpiryBucket.EXPIRED
+        )
+        notices = Notice.objects.filter(code=NoticeType.LEASE_EXPIRY).order_by("rm_map_id")
+        self.assertEqual(list(notices.values_list("rm_map_id", "lease_end_date", "period")), [
+            (self.expired.id, self.expired.end_date, None),
+            (self.week.id, self.week.end_date, None),
+        ])
+
+    def test_sweep_notices_lease_saved_already_expired(self):
+        # save() PUT IT IN EXPIRED, THE SWEEP DOES NOT CHANGE ITS BUCKET
+        first = sweep_lease_expiry()
+        second = sweep_lease_expiry()
+
+        self.assertEqual((first["changed"], first["expired"]), (0, 1))
+        self.assertEqual(second["expired"], 0)
+        self.assertEqual(
+            list(Notice.objects.filter(code=NoticeType.LEASE_EXPIRY).values_list("rm_map_id", flat=True)),
+            [self.expired.id]
+        )
+
+
+class PersonSearchTests(TestCase):
+    def setUp(self):
+        self.rahul = create_tenant("rahul_s", f_name="Rahul", l_name="Sharma", phn_no="9876543210", aadhar_no="123412341234", pan_no="ABCPE1234F")
+        self.rahil = create_tenant("rahil_v", f_name="Rahil", l_name="Verma")
+        self.raju = create_tenant("raju_s", f_name="Raju", l_name="Sarma")
+        self.ravi = create_tenant("ravi_k", f_name="Ravi", l_name="Kulkarni", phn_no="9123456780")
+
+    def get_ids(self, query):
+        return [person_id for person_id, _, _ in search_persons(query)]
+
+    def test_exact_name_ranks_above_prefix_and_phonetic(self):
+        rahulkumar = Person.objects.create(username="rahulkumar", f_name="Rahulkumar", l_name="Joshi")
+
+        # rahil SHARES rahul's SOUNDEX KEY
+        self.assertEqual(self.get_ids("rahul"), [self.rahul.id, rahulkumar.id, self.rahil.id])
+
+    def test_prefix_matches(self):
+        self.assertEqual(self.get_ids("kulk"), [self.ravi.id])
+        self.assertEqual(self.get_ids("rah sha"), [self.rahul.id])
+
+    def test_soundex_matches_typos_below_exact_spelling(self):
+        self.assertEqual(self.get_ids("rahul shrma"), [self.rahul.id])
+        # sarma SOUNDS LIKE sharma, THE EXACT SPELLING COMES FIRST
+        self.assertEqual(self.get_ids("sharma"), [self.rahul.id, self.raju.id])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.get_ids("rahul kulkarni"), [])
+
+    def test_digits_match_phone_and_aadhaar(self):
+        self.assertEqual(self.get_ids("+91 98765-43210"), [self.rahul.id])
+        self.assertEqual(self.get_ids("1234 1234 1234"), [self.rahul.id])
+        self.assertEqual(self.get_ids("abcpe1234f"), [self.rahul.id])
+        self.assertEqual(search_persons("9876543210")[0][2], ["phone"])
+
+    def test_index_follows_contact_and_docs_changes(self):
+        Contact.objects.filter(person=self.ravi).get().delete()
+        self.assertEqual(self.get_ids("9123456780"), [])
+
+        Docs.objects.create(person=self.ravi, aadhar_no="999988887777", pan_no="ZZZPE9999Z")
+        self.assertEqual(self.get_ids("999988887777"), [self.ravi.id])
+
+    def test_common_sound_alike_does_not_push_out_exact_match(self):
+        # MORE patel ( SAME SOUNDEX AS patil ) TOKENS THAN ONE TIER READS
+        Person.objects.bulk_create(
+            Person(username=f"patel_{index}", f_name="Asha", l_name="Patel")
+            for index in range(TERM_MATCH_LIMIT + 200)
+        )
+        patil = create_tenant("asha_patil", f_name="Asha", l_name="Patil")
+        call_command("rebuild_search_index", stdout=io.StringIO())
+
+        self.assertEqual(self.get_ids("patil")[0], patil.id)
+        self.assertEqual(self.get_ids("asha patil")[0], patil.id)
+        self.assertEqual(self.get_ids("ash pati")[0], patil.id)
+
+    def test_endpoint(self):
+        response = APIClient().get(f"{API}/person/search/", {"q": "rahul shrma"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.rahul.id])
+        self.assertEqual(APIClient().get(f"{API}/person/search/").status_code, 400)
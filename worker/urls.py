@@ -1,4 +1,5 @@
 from django.urls import path
+from worker.metrics import metrics_view
 from worker.views import (
     AvailableRoomsView,
     AddressByPersonAPIView,
@@ -11,17 +12,28 @@ from worker.views import (
     ListAllTransactionsByPersonAPIView,
     ListAllRentalDetailsByPersonAPIView,
     RoomDeAllotmentByPersonAPIView,
+    DeAllotmentStatementAPIView,
     RoomMasterDetailAPIView,
     RoomAllotmentByRoomNumberAPIView,
     TransactionsAPIView,
+    TransactionsImportAPIView,
+    TransactionsExportAPIView,
+    RoomAllotmentsExportAPIView,
     RentalDetailsByRoomAllotmentAPIView,
     RoomAllotmentExtraSerializerByRoomAllotmentAPIView,
     PersonsAPIView,
+    PersonSearchAPIView,
     BuildingRoomStatsView,
     RoomAllotmentByBuildingNameAPIView,
     RoomAllotmentExpiryAPIView,
     HomeMetaInfoAPIView,
     UnPaidRentAPIView,
+    OutstandingBalancesAPIView,
+    RentRemindersAPIView,
+    RentReminderCampaignAPIView,
+    RentReminderNoticesAPIView,
+    document_file,
+    transaction_receipt,
     building_details,
     states_details,
     payment_details
@@ -34,6 +46,7 @@ urlpatterns = [
     path("room/available/", AvailableRoomsView.as_view(), name="available-rooms"),
 
     path("person/", PersonsAPIView.as_view(), name="person-list-create"),
+    path("person/search/", PersonSearchAPIView.as_view(), name="person-search"),
     path("person/<int:pk>/", PersonAPIView.as_view(), name="person-detail"),
 
     path("person/<int:person_id>/contact/", ContactByPersonAPIView.as_view(), name="contact"),
@@ -41,12 +54,14 @@ urlpatterns = [
     path("person/<int:person_id>/address/", AddressByPersonAPIView.as_view(), name="address"),
 
     path("person/<int:person_id>/doc/", DocumentsByPersonAPIView.as_view(), name="documents"),
+    path("person/<int:person_id>/doc/<str:kind>/", document_file, name="document-file"),
 
     path("person/<int:person_id>/room-allotment/", RoomAllotmentByPersonAPIView.as_view(), name="room-allotment"),
     path("room-allotment/<int:room__r_no>/", RoomAllotmentByRoomNumberAPIView.as_view(), name="room-allotment"),
     path("room-allotment/", RoomAllotmentByBuildingNameAPIView.as_view(), name="room-allotment-by-building"),
     path("room-allotment/expiry/", RoomAllotmentExpiryAPIView.as_view(), name="room-allotment-expiry"),
     path("room-de-allotment/<int:pk>/", RoomDeAllotmentByPersonAPIView.as_view(), name="room-de-allotment"),
+    path("room-de-allotment/<int:pk>/statement/", DeAllotmentStatementAPIView.as_view(), name="de-allotment-statement"),
 
     path("room-allotment/<int:rm_map>/rental-details/",
          RentalDetailsByRoomAllotmentAPIView.as_view(),
@@ -61,12 +76,23 @@ urlpatterns = [
     path("room-allotment/<int:rm_map>/transactions/", TransactionsByPersonAPIView.as_view(), name="transactions"),
     path("person/<int:person_id>/transactions/", ListAllTransactionsByPersonAPIView.as_view(), name="transactions"),
     path("transactions/", TransactionsAPIView.as_view(), name="all-transactions"),
+    path("transactions/import/", TransactionsImportAPIView.as_view(), name="transactions-import"),
+    path("transactions/<int:pk>/receipt/", transaction_receipt, name="transaction-receipt"),
+
+    path("export/transactions.csv", TransactionsExportAPIView.as_view(), name="export-transactions"),
+    path("export/allotments.csv", RoomAllotmentsExportAPIView.as_view(), name="export-allotments"),
 
     path("home/", BuildingRoomStatsView.as_view(), name="room-list-create"),
     path("home/meta-info/", HomeMetaInfoAPIView.as_view(), name="home-meta-info"),
     path("home/unpaid-rent/", UnPaidRentAPIView.as_view(), name="unpaid-rent"),
+    path("home/outstanding-balances/", OutstandingBalancesAPIView.as_view(), name="outstanding-balances"),
+    path("home/rent-reminders/", RentRemindersAPIView.as_view(), name="rent-reminders"),
+    path("home/rent-reminders/<int:pk>/", RentReminderCampaignAPIView.as_view(), name="rent-reminder-campaign"),
+    path("home/rent-reminders/<int:pk>/notices/", RentReminderNoticesAPIView.as_view(), name="rent-reminder-notices"),
     path("master-data/building/", building_details, name="building-detail"),
     path("master-data/states/", states_details, name="states-detail"),
     path("master-data/payment-modes/", payment_details, name="payment-details"),
 
+    path("metrics/", metrics_view, name="metrics"),
+
 ]
@@ -1,26 +1,30 @@
-import threading
-from datetime import timedelta, date
+import csv
+from datetime import timedelta, date, datetime, time
 
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, Q, OuterRef, Exists
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch, Exists, OuterRef
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.exceptions import ValidationError
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from resources.custom_enums import (
     BuildingCodes,
     StateCode,
-    PaymentModeChoices
-)
-from resources.send_transaction_email import (
-    send_de_allotment_email,
-    send_tnx_email_in_bg,
-    send_de_allotment_email_in_bg
+    PaymentModeChoices,
+    OutboxKind,
+    NotificationChannel,
+    ExpiryBucket
 )
+from resources.generate_transaction_pdf import get_receipt_pdf
 from worker.models import (
     RoomMaster,
     RoomAllotment,
@@ -30,8 +34,47 @@ from worker.models import (
     RentalDetails,
     Transaction,
     Contact,
-    RoomAllotmentExtra
+    RoomAllotmentExtra,
+    RoomOccupancy,
+    Notice,
+    NoticeCampaign,
+    ROOM_MASTER_VERSION
+)
+from worker.conditional import (
+    PrecomputedJSON,
+    VersionedConditionalGetMixin
+)
+from worker.documents import (
+    DOCUMENT_FIELDS,
+    HashingFileUploadHandler,
+    document_file_response
+)
+from worker.expiry import expiring_allotments
+from worker.exports import (
+    TRANSACTION_EXPORT_COLUMNS,
+    ALLOTMENT_EXPORT_COLUMNS,
+    csv_streaming_response
+)
+from worker.outbox import enqueue_email
+from worker.receipts import queue_receipt_pdf
+from worker.payment_import import (
+    parse_payment_csv,
+    parse_payment_json,
+    import_payments
+)
+from worker.reminders import (
+    CampaignChannelConflict,
+    create_rent_reminder_campaign
+)
+from worker.reports import (
+    unpaid_rent_rows,
+    serialize_unpaid_row,
+    rent_arrears_matrix,
+    outstanding_balances,
+    BALANCE_ORDERINGS,
+    month_range
 )
+from worker.response_cache import BuildingVersionCacheMixin
 from worker.serializer import (
     RoomMasterSerializer,
     PersonSerializer,
@@ -43,16 +86,104 @@ from worker.serializer import (
     RentalDetailsSerializer,
     RoomAllotmentByRoomNumberSerializer,
     RoomAllotmentExtraSerializer,
-    RoomAllotmentExpirySerializer
+    RoomAllotmentExpirySerializer,
+    NoticeCampaignSerializer,
+    NoticeSerializer,
+    DeAllotmentStatementSerializer
 )
+from worker.search import (
+    SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    search_persons
+)
+from worker.settlements import (
+    get_de_allotment_statement,
+    save_de_allotment_statement
+)
+
+
+def with_room_listing_details(queryset):
+    """
+    Preload everything RoomMasterSerializer reads so a page of rooms
+    costs a fixed number of queries:
+    - meter details joined in the same query
+    - active allotment fetched once per page into `active_allotments`
+    """
+    return queryset.select_related(
+        "meter_details"
+    ).prefetch_related(
+        Prefetch(
+            "room_allotments",
+            queryset=RoomAllotment.objects.filter(is_active=True),
+            to_attr="active_allotments"
+        )
+    )
+
+
+def parse_date_param(query_params, name):
+    value = query_params.get(name)
+    if not value:
+        return None
+
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({
+            name: "Date must be in YYYY-MM-DD format."
+        })
+    return parsed
+
+
+def parse_month_param(query_params, name):
+    value = query_params.get(name)
+
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except (TypeError, ValueError):
+        raise ValidationError({
+            name: "Month must be in YYYY-MM format."
+        })
+
+
+def filter_transactions(queryset, query_params):
+    """
+    Shared transaction filters:
+    - building_code : room building name
+    - from_date / to_date : inclusive dates, applied as a half-open `ts` range
+    - payment_mode : one of PaymentModeChoices
+    """
+    building_code = query_params.get("building_code", False)
+    payment_mode = query_params.get("payment_mode", False)
+    from_date = parse_date_param(query_params, "from_date")
+    to_date = parse_date_param(query_params, "to_date")
+
+    if building_code:
+        queryset = queryset.filter(rm_map__room__build_name=building_code)
+
+    if payment_mode:
+        queryset = queryset.filter(payment_mode=payment_mode)
+
+    if from_date:
+        queryset = queryset.filter(
+            ts__gte=timezone.make_aware(datetime.combine(from_date, time.min))
+        )
+
+    if to_date:
+        queryset = queryset.filter(
+            ts__lt=timezone.make_aware(datetime.combine(to_date + timedelta(days=1), time.min))
+        )
+
+    return queryset
 
 
 class RoomMasterAPIView(
+    VersionedConditionalGetMixin,
+    BuildingVersionCacheMixin,
     generics.ListCreateAPIView,
     generics.ListAPIView,
     generics.RetrieveUpdateDestroyAPIView,
 ):
     serializer_class = RoomMasterSerializer
+    version_key = ROOM_MASTER_VERSION
 
     def get_queryset(self):
         queryset = RoomMaster.objects.all()
@@ -66,7 +197,7 @@ class RoomMasterAPIView(
         if room_id:
             queryset = queryset.filter(id=self.kwargs['pk'])
 
-        return queryset
+        return with_room_listing_details(queryset)
 
     @transaction.atomic
     def perform_create(self, serializer):
@@ -74,9 +205,11 @@ class RoomMasterAPIView(
 
 
 class RoomMasterDetailAPIView(
+    VersionedConditionalGetMixin,
     generics.RetrieveUpdateDestroyAPIView,
 ):
     serializer_class = RoomMasterSerializer
+    version_key = ROOM_MASTER_VERSION
 
     def get_queryset(self):
         queryset = RoomMaster.objects.filter(id=self.kwargs['pk'])
@@ -87,7 +220,7 @@ class RoomMasterDetailAPIView(
                 build_name=building_code
             )
 
-        return queryset
+        return with_room_listing_details(queryset)
 
     @transaction.atomic
     def perform_create(self, serializer):
@@ -102,21 +235,17 @@ class AvailableRoomsView(
     def get_queryset(self):
         building_code = self.request.query_params.get("building_code", False)
 
-        queryset = RoomMaster.objects.all()
-
-        active_rooms = RoomAllotment.objects.filter(
-            is_active=True
-        ).distinct()
-
-        if active_rooms:
-            queryset = queryset.exclude(
-                id__in=active_rooms.values_list("room_id", flat=True)
-            )
+        # OCCUPIED ROOMS ARE EXCLUDED WITH A SUBQUERY, NOT A FETCHED ID LIST
+        queryset = RoomMaster.objects.exclude(
+            id__in=RoomAllotment.objects.filter(
+                is_active=True
+            ).values("room_id")
+        )
 
         if building_code:
             queryset = queryset.filter(build_name=building_code)
 
-        return queryset
+        return with_room_listing_details(queryset)
 
 
 class PersonAPIView(
@@ -142,11 +271,56 @@ class PersonsAPIView(
     serializer_class = PersonSerializer
 
     def get_queryset(self):
-        queryset = Person.objects.all()
+        queryset = Person.objects.annotate(
+            has_active_allotment=Exists(
+                RoomAllotment.objects.filter(person_id=OuterRef("id"), is_active=True)
+            )
+        )
 
         return queryset
 
 
+class PersonSearchAPIView(APIView):
+    """
+    Tenant search through the person search index ( worker.search ).
+    - ?q=     : name ( typos tolerated ), username, email, phone, Aadhaar or PAN, prefixes match
+    - ?limit= : number of results, at most MAX_SEARCH_LIMIT
+    """
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This field is required."})
+
+        limit = request.query_params.get("limit")
+        try:
+            limit = min(int(limit), MAX_SEARCH_LIMIT) if limit else SEARCH_LIMIT
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer."})
+
+        ranked = search_persons(query, max(limit, 1))
+
+        persons = Person.objects.filter(
+            id__in=[person_id for person_id, _, _ in ranked]
+        ).annotate(
+            has_active_allotment=Exists(
+                RoomAllotment.objects.filter(person_id=OuterRef("id"), is_active=True)
+            )
+        ).in_bulk()
+
+        results = [
+            {**PersonSerializer(persons[person_id]).data, "score": score, "matched": kinds}
+            for person_id, score, kinds in ranked
+            if person_id in persons
+        ]
+
+        return Response({
+            "query": query,
+            "count": len(results),
+            "results": results,
+        })
+
+
 class ContactByPersonAPIView(
     generics.CreateAPIView,
     generics.RetrieveUpdateDestroyAPIView
@@ -186,6 +360,11 @@ class DocumentsByPersonAPIView(
     lookup_field = "person_id"
     parser_classes = (MultiPartParser, FormParser)
 
+    def initialize_request(self, request, *args, **kwargs):
+        # STREAM UPLOADS TO DISK, HASHING AND SIZE-CHECKING EACH CHUNK
+        request.upload_handlers = [HashingFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     def get_queryset(self):
         return Docs.objects.all()
 
@@ -194,6 +373,23 @@ class DocumentsByPersonAPIView(
         serializer.save(person_id=self.kwargs["person_id"])
 
 
+@require_safe
+def document_file(request, person_id, kind):
+    """
+    Stream one stored document ( kind: aadhaar / pan ), with Range and ETag support.
+    """
+    field = DOCUMENT_FIELDS.get(kind)
+    if field is None:
+        raise Http404("Unknown document kind.")
+
+    docs = get_object_or_404(Docs.objects.only("id", field), person_id=person_id)
+    field_file = getattr(docs, field)
+    if not field_file:
+        raise Http404("Document not uploaded.")
+
+    return document_file_response(request, field_file, f"{kind}_{person_id}.pdf")
+
+
 class RentalDetailsByRoomAllotmentAPIView(
     generics.CreateAPIView,
     generics.RetrieveUpdateDestroyAPIView
@@ -276,6 +472,7 @@ class RoomAllotmentByRoomNumberAPIView(
 
 
 class RoomAllotmentByBuildingNameAPIView(
+    BuildingVersionCacheMixin,
     generics.ListAPIView,
 ):
     serializer_class = RoomAllotmentByRoomNumberSerializer
@@ -291,23 +488,31 @@ class RoomAllotmentByBuildingNameAPIView(
         return RoomAllotment.objects.filter(
             is_active=True,
             room__build_name=building_code,
-        )
+        ).select_related("person", "room")
 
 
 class RoomAllotmentExpiryAPIView(
     generics.ListAPIView,
 ):
+    """
+    Active allotments by precomputed expiry bucket ( kept by sweep_lease_expiry ).
+    - ?bucket=Expired,Today : only these buckets, all of them by default
+    """
     serializer_class = RoomAllotmentExpirySerializer
+    ordering = ("end_date", "id")
 
     def get_queryset(self):
-        today = timezone.now().date()
-        next_30_days = today + timedelta(days=30)
+        buckets = None
+        if self.request.query_params.get("bucket"):
+            buckets = self.request.query_params["bucket"].split(",")
 
-        return RoomAllotment.objects.filter(
-            is_active=True,
-            end_date__gte=today,
-            end_date__lte=next_30_days
-        ).select_related("person", "room")
+            invalid = set(buckets) - set(ExpiryBucket.values)
+            if invalid:
+                raise ValidationError({
+                    "bucket": f"Must be one of {', '.join(ExpiryBucket.values)}."
+                })
+
+        return expiring_allotments(buckets)
 
 
 class RoomDeAllotmentByPersonAPIView(
@@ -329,14 +534,26 @@ class RoomDeAllotmentByPersonAPIView(
             actual_end_date=self.request.data.get("actual_end_date", timezone.now().date())
         )
 
-        threading.Thread(
-            target=send_de_allotment_email_in_bg,
-            args=(instance.id,),
-            daemon=True
-        ).start()
+        # SETTLEMENT SNAPSHOT, THE EMAIL AND statement/ READ IT AS IS
+        save_de_allotment_statement(instance.id)
+
+        # QUEUE DE ALLOTMENT EMAIL WITH DETAILS ( SENT BY run_email_outbox )
+        enqueue_email(OutboxKind.DE_ALLOTMENT_SUMMARY, instance.id)
 
-        # SEND DE ALLOTMENT EMAIL WITH DETAILS
-        send_de_allotment_email(instance)
+
+class DeAllotmentStatementAPIView(
+    generics.RetrieveAPIView,
+):
+    """
+    Settlement snapshot of a de-allotted allotment ( 404 while it is active ).
+    """
+    serializer_class = DeAllotmentStatementSerializer
+
+    def get_object(self):
+        statement = get_de_allotment_statement(self.kwargs["pk"])
+        if statement is None:
+            raise Http404("No settlement statement, the allotment is not de-allotted.")
+        return statement
 
 
 class TransactionsByPersonAPIView(
@@ -346,22 +563,41 @@ class TransactionsByPersonAPIView(
 ):
     serializer_class = TransactionsSerializer
     lookup_field = "rm_map"
+    # ts IS auto_now, AN EDITED PAYMENT WOULD MOVE BETWEEN PAGES
+    ordering = ("-id",)
 
     def get_queryset(self):
         return Transaction.objects.filter(
             # rm_map__person_id=self.kwargs["person_id"],
             rm_map_id=self.kwargs["rm_map"]
+        ).select_related(
+            "rm_map__person",
+            "rm_map__room"
         )
 
     @transaction.atomic
     def perform_create(self, serializer):
         transaction_instance = serializer.save(rm_map_id=self.kwargs["rm_map"])
 
-        threading.Thread(
-            target=send_tnx_email_in_bg,
-            args=(transaction_instance.id,),
-            daemon=True
-        ).start()
+        # RENDER THE RECEIPT PDF IN THE BACKGROUND POOL
+        queue_receipt_pdf(transaction_instance.id)
+
+        # QUEUE RECEIPT EMAIL ( SENT BY run_email_outbox )
+        enqueue_email(OutboxKind.TRANSACTION_RECEIPT, transaction_instance.id)
+
+
+@require_safe
+def transaction_receipt(request, pk):
+    """
+    Receipt PDF of a transaction, rendered on the first request if the pool has not done it yet.
+    """
+    try:
+        name = get_receipt_pdf(pk)
+    except Transaction.DoesNotExist:
+        raise Http404("Transaction not found.")
+
+    receipt = Transaction(id=pk, receipt=name).receipt
+    return document_file_response(request, receipt, f"receipt_{pk}.pdf")
 
 
 class ListAllTransactionsByPersonAPIView(
@@ -369,10 +605,15 @@ class ListAllTransactionsByPersonAPIView(
 ):
     serializer_class = TransactionsSerializer
     lookup_field = "person_id"
+    # ts IS auto_now, AN EDITED PAYMENT WOULD MOVE BETWEEN PAGES
+    ordering = ("-id",)
 
     def get_queryset(self):
         return Transaction.objects.filter(
             rm_map__person_id=self.kwargs["person_id"]
+        ).select_related(
+            "rm_map__person",
+            "rm_map__room"
         )
 
 
@@ -380,13 +621,143 @@ class TransactionsAPIView(
     generics.ListAPIView
 ):
     serializer_class = TransactionsSerializer
+    # ts IS auto_now, AN EDITED PAYMENT WOULD MOVE BETWEEN PAGES
+    ordering = ("-id",)
 
     def get_queryset(self):
         transactions_type = self.request.query_params.get("transactions_type", False)
         if transactions_type and transactions_type == "all":
-            return Transaction.objects.all()
+            queryset = Transaction.objects.all()
         else:
-            return Transaction.objects.filter(rm_map__is_active=True).all()
+            queryset = Transaction.objects.filter(rm_map__is_active=True)
+
+        return filter_transactions(
+            queryset,
+            self.request.query_params
+        ).select_related(
+            "rm_map__person",
+            "rm_map__room"
+        )
+
+
+class TransactionsImportAPIView(APIView):
+    """
+    Bulk payment import.
+    - body : JSON list of payments ( or {"payments": [...]} ), or a CSV `file` upload
+    - ?mode=atomic ( default ) : nothing is saved if any row is invalid
+    - ?mode=partial            : valid rows are saved, invalid rows reported
+    - ?send_receipts=true      : queue a receipt email per saved payment
+    """
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+
+    def post(self, request):
+        mode = request.query_params.get("mode", "atomic")
+        if mode not in ("atomic", "partial"):
+            raise ValidationError({
+                "mode": "Mode must be 'atomic' or 'partial'."
+            })
+
+        try:
+            upload = request.FILES.get("file")
+            if upload:
+                rows = parse_payment_csv(upload.read())
+            else:
+                rows = parse_payment_json(request.data)
+        except (ValueError, UnicodeDecodeError, csv.Error) as exc:
+            raise ValidationError({
+                "payments": str(exc)
+            })
+
+        result = import_payments(
+            rows,
+            atomic=mode == "atomic",
+            send_receipts=request.query_params.get("send_receipts") == "true"
+        )
+        result["mode"] = mode
+
+        if not result["errors"]:
+            response_status = status.HTTP_201_CREATED
+        elif result["created"]:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(result, status=response_status)
+
+
+class TransactionsExportAPIView(APIView):
+    """
+    Streams the transaction ledger as CSV, oldest first.
+    Filters: building_code, from_date, to_date, payment_mode, active_only=true
+    """
+
+    def get(self, request):
+        queryset = filter_transactions(
+            Transaction.objects.all(),
+            request.query_params
+        )
+
+        if request.query_params.get("active_only") == "true":
+            queryset = queryset.filter(rm_map__is_active=True)
+
+        return csv_streaming_response(
+            queryset.order_by("id"),
+            TRANSACTION_EXPORT_COLUMNS,
+            f"transactions_{timezone.localdate():%Y%m%d}.csv"
+        )
+
+
+class RoomAllotmentsExportAPIView(APIView):
+    """
+    Streams room allotments with tenant, contact, room and rent columns as CSV.
+    Filters: building_code, from_date / to_date ( on start_date ), active_only=true
+    """
+
+    def get(self, request):
+        queryset = RoomAllotment.objects.all()
+        building_code = request.query_params.get("building_code", False)
+        from_date = parse_date_param(request.query_params, "from_date")
+        to_date = parse_date_param(request.query_params, "to_date")
+
+        if building_code:
+            queryset = queryset.filter(room__build_name=building_code)
+
+        if from_date:
+            queryset = queryset.filter(start_date__gte=from_date)
+
+        if to_date:
+            queryset = queryset.filter(start_date__lte=to_date)
+
+        if request.query_params.get("active_only") == "true":
+            queryset = queryset.filter(is_active=True)
+
+        return csv_streaming_response(
+            queryset.order_by("id"),
+            ALLOTMENT_EXPORT_COLUMNS,
+            f"allotments_{timezone.localdate():%Y%m%d}.csv"
+        )
+
+
+def get_occupancy_totals(key):
+    """
+    Roll the (building, layout) occupancy rows up by `build_name` or `layout`.
+    """
+    totals = {}
+    for row in RoomOccupancy.objects.all():
+        group = getattr(row, key) or None
+        item = totals.setdefault(group, {
+            "total_rooms": 0,
+            "occupied_rooms": 0,
+            "vacant_rooms": 0,
+        })
+        item["total_rooms"] += row.total_rooms
+        item["occupied_rooms"] += row.occupied_rooms
+        item["vacant_rooms"] += row.vacant_rooms
+
+    return sorted(
+        ((group, item) for group, item in totals.items() if item["total_rooms"]),
+        key=lambda pair: (pair[0] is None, pair[0] or "")
+    )
 
 
 class BuildingRoomStatsView(APIView):
@@ -398,42 +769,23 @@ class BuildingRoomStatsView(APIView):
     """
 
     def get(self, request):
-        queryset = (
-            RoomMaster.objects
-            .values("build_name")
-            .annotate(
-                total_rooms=Count("id"),
-                occupied_rooms=Count(
-                    "room_allotments",
-                    filter=Q(room_allotments__is_active=True),
-                    distinct=True
-                )
-            )
-            .order_by("build_name")
-        )
-
         data = []
-        for item in queryset:
+        for build_name, item in get_occupancy_totals("build_name"):
             data.append({
-                "building": item["build_name"],
+                "building": build_name,
                 "total_rooms": item["total_rooms"],
                 "occupied_rooms": item["occupied_rooms"],
-                "vacant_rooms": item["total_rooms"] - item["occupied_rooms"],
+                "vacant_rooms": item["vacant_rooms"],
             })
 
-        queryset_1 = (
-            RoomMaster.objects
-            .values("layout")
-            .annotate(
-                total_rooms=Count("id"),
-                vacant_rooms=Count(
-                    "id",
-                    filter=~Q(room_allotments__is_active=True),
-                    distinct=True
-                )
-            )
-            .order_by("layout")
-        )
+        queryset_1 = [
+            {
+                "layout": layout,
+                "total_rooms": item["total_rooms"],
+                "vacant_rooms": item["vacant_rooms"],
+            }
+            for layout, item in get_occupancy_totals("layout")
+        ]
 
         return Response(
             {"test": queryset_1, "test_1": data},
@@ -443,52 +795,22 @@ class BuildingRoomStatsView(APIView):
 
 class HomeMetaInfoAPIView(APIView):
     def get(self, request):
-        base_stats = RoomMaster.objects.aggregate(
-            total_buildings=Count("build_name", distinct=True),
-            total_rooms=Count("id"),
-            total_occupied_rooms=Count(
-                "id",
-                filter=Q(room_allotments__is_active=True),
-                distinct=True
-            ),
-            total_free_rooms=Count(
-                "id",
-                filter=~Q(room_allotments__is_active=True),
-                distinct=True
-            ),
-        )
-
-        layout_stats = (
-            RoomMaster.objects
-            .values("layout")
-            .annotate(
-                total_rooms=Count("id", distinct=True),
-                occupied_rooms=Count(
-                    "id",
-                    filter=Q(room_allotments__is_active=True),
-                    distinct=True
-                ),
-            )
-        )
+        building_stats = get_occupancy_totals("build_name")
 
         layout_data = []
 
-        for item in layout_stats:
-            if item["layout"]:
-                total = item["total_rooms"]
-                occupied = item["occupied_rooms"]
-                available = total - occupied
-
+        for layout, item in get_occupancy_totals("layout"):
+            if layout:
                 layout_data.extend([
-                    {"key": f"{item['layout']} ROOMS", "value": total},
-                    {"key": f"Occupied {item['layout']} Rooms", "value": occupied},
-                    {"key": f"Available {item['layout']} Rooms", "value": available},
+                    {"key": f"{layout} ROOMS", "value": item["total_rooms"]},
+                    {"key": f"Occupied {layout} Rooms", "value": item["occupied_rooms"]},
+                    {"key": f"Available {layout} Rooms", "value": item["vacant_rooms"]},
                 ])
         data = [
-            {"key": "Buildings", "value": base_stats["total_buildings"]},
-            {"key": "rooms", "value": base_stats["total_rooms"]},
-            {"key": "Occupied Rooms", "value": base_stats["total_occupied_rooms"]},
-            {"key": "Free Rooms", "value": base_stats["total_free_rooms"]},
+            {"key": "Buildings", "value": len(building_stats)},
+            {"key": "rooms", "value": sum(item["total_rooms"] for _, item in building_stats)},
+            {"key": "Occupied Rooms", "value": sum(item["occupied_rooms"] for _, item in building_stats)},
+            {"key": "Free Rooms", "value": sum(item["vacant_rooms"] for _, item in building_stats)},
             *layout_data
         ]
 
@@ -499,64 +821,172 @@ class HomeMetaInfoAPIView(APIView):
 
 
 class UnPaidRentAPIView(APIView):
+    """
+    Unpaid rent report.
+    - ?year=&month=             : allotments with no rent paid that month
+    - ?from_month=&to_month=    : allotment x month paid / unpaid matrix ( YYYY-MM )
+    - ?building_name=           : optional, all buildings when omitted
+    """
+    max_months = 24
+
     def get(self, request):
         building_name = request.query_params.get("building_name")
 
-        year = int(request.query_params.get("year"))
-        month = int(request.query_params.get("month"))
-
-        first_day = date(year, month, 1)
+        if request.query_params.get("from_month") or request.query_params.get("to_month"):
+            from_month = parse_month_param(request.query_params, "from_month")
+            to_month = parse_month_param(request.query_params, "to_month")
+
+            if from_month > to_month:
+                raise ValidationError({
+                    "from_month": "from_month must not be after to_month."
+                })
+            if len(month_range(from_month, to_month)) > self.max_months:
+                raise ValidationError({
+                    "to_month": f"Range must not exceed {self.max_months} months."
+                })
+
+            return Response(rent_arrears_matrix(from_month, to_month, building_name))
+
+        try:
+            year = int(request.query_params.get("year"))
+            month = int(request.query_params.get("month"))
+            date(year, month, 1)
+        except (TypeError, ValueError):
+            raise ValidationError({
+                "month": "Valid year and month query parameters are required."
+            })
 
-        rent_paid_subquery = Transaction.objects.filter(
-            rm_map_id=OuterRef('id'),
-            is_rent=True,
-            ts__year=year,
-            ts__month=month
-        )
-        queryset = RoomAllotment.objects.filter(
-            room__build_name=building_name,
-            is_active=True,
-            start_date__lt=first_day
-        ).annotate(
-            rent_paid=Exists(rent_paid_subquery)
-        ).filter(
-            rent_paid=False
-        ).select_related(
-            "person",
-            "room",
-            "rental_details"
-        ).prefetch_related(
-            "person__contacts"
-        )
         data = [
-            {
-                "person": PersonSerializer(q.person).data,
-                "contact": ContactSerializer(q.person.contacts.first()).data if q.person.contacts.exists() else None,
-                "room": RoomMasterSerializer(q.room).data,
-                "start_date": q.start_date,
-                "rent": q.rental_details.first().rent
-            }
-            for q in queryset
+            serialize_unpaid_row(row)
+            for row in unpaid_rent_rows(year, month, building_name)
         ]
 
         return Response(data)
 
 
+class OutstandingBalancesAPIView(APIView):
+    """
+    Outstanding balance per active allotment: rent_total x billed months - rent paid.
+    - ?as_of=YYYY-MM-DD     : optional, today when omitted
+    - ?building_name=       : optional, all buildings when omitted
+    - ?ordering=            : -amount_due ( default ) or amount_due
+    - ?min_due=             : optional, only balances of at least this amount
+    """
+
+    def get(self, request):
+        as_of = parse_date_param(request.query_params, "as_of") or timezone.localdate()
+        building_name = request.query_params.get("building_name")
+
+        ordering = request.query_params.get("ordering", "-amount_due")
+        if ordering not in BALANCE_ORDERINGS:
+            raise ValidationError({
+                "ordering": f"Must be one of {', '.join(BALANCE_ORDERINGS)}."
+            })
+
+        min_due = request.query_params.get("min_due")
+        try:
+            min_due = int(min_due) if min_due else None
+        except ValueError:
+            raise ValidationError({
+                "min_due": "Must be an integer."
+            })
+
+        data = outstanding_balances(as_of, building_name, ordering)
+
+        if min_due is not None:
+            data["results"] = [
+                item for item in data["results"] if item["amount_due"] >= min_due
+            ]
+
+        return Response(data)
+
+
+class RentRemindersAPIView(
+    generics.ListAPIView
+):
+    """
+    Rent reminder campaigns, newest first.
+    - POST {"month": "YYYY-MM", "channel": "email" | "whatsapp"} ( both optional, current month by default ):
+      one RENT_ALERT notice per unpaid allotment, delivered by `manage.py send_rent_reminders --pending`.
+      Re-posting a month only adds allotments not reminded yet, another channel for that month is a 409.
+    """
+    serializer_class = NoticeCampaignSerializer
+    ordering = ("-id",)
+
+    def get_queryset(self):
+        return NoticeCampaign.objects.all()
+
+    def post(self, request):
+        if request.data.get("month"):
+            period = parse_month_param(request.data, "month")
+        else:
+            period = timezone.localdate().replace(day=1)
+
+        channel = request.data.get("channel") or settings.RENT_REMINDER_CHANNEL
+        if channel not in NotificationChannel.values:
+            raise ValidationError({
+                "channel": f"Must be one of {', '.join(NotificationChannel.values)}."
+            })
+
+        try:
+            campaign, added = create_rent_reminder_campaign(period, channel)
+        except CampaignChannelConflict as exc:
+            return Response(
+                {"channel": str(exc), "campaign": NoticeCampaignSerializer(exc.campaign).data},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        data = NoticeCampaignSerializer(campaign).data
+        data["added"] = added
+
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+class RentReminderCampaignAPIView(
+    generics.RetrieveAPIView
+):
+    """
+    Campaign progress: total / sent / failed / pending.
+    """
+    serializer_class = NoticeCampaignSerializer
+
+    def get_queryset(self):
+        return NoticeCampaign.objects.all()
+
+
+class RentReminderNoticesAPIView(
+    generics.ListAPIView
+):
+    """
+    Per-recipient delivery status of a campaign, ?status= to filter.
+    """
+    serializer_class = NoticeSerializer
+
+    def get_queryset(self):
+        queryset = Notice.objects.filter(campaign_id=self.kwargs["pk"])
+
+        notice_status = self.request.query_params.get("status")
+        if notice_status:
+            queryset = queryset.filter(status=notice_status)
+
+        return queryset
+
+
+# MASTER DATA IS FIXED BY THE ENUMS, RENDER IT ONCE AT STARTUP
+BUILDING_DETAILS = PrecomputedJSON([i for i in BuildingCodes])
+STATES_DETAILS = PrecomputedJSON([i for i in StateCode])
+PAYMENT_DETAILS = PrecomputedJSON([i for i in PaymentModeChoices])
+
+
 @api_view(["GET"])
 def building_details(request):
-    building_name = [i for i in BuildingCodes]
-
-    return Response(building_name)
+    return BUILDING_DETAILS.response(request)
 
 
 @api_view(["GET"])
 def states_details(request):
-    states = [i for i in StateCode]
-
-    return Response(states)
+    return STATES_DETAILS.response(request)
 
 @api_view(["GET"])
 def payment_details(request):
-    payment_mode = [i for i in PaymentModeChoices]
-
-    return Response(payment_mode)
+    return PAYMENT_DETAILS.response(request)